@@ -0,0 +1,413 @@
+"""Benchmark do Gerenciador de Caçambas com frotas sintéticas.
+
+Gera planilhas de 100 a 100 mil caçambas, mede as operações principais de
+cacamba_gui.py e grava os tempos em JSON para comparar versões. O ViaCEP e o
+Nominatim são substituídos por um servidor HTTP local, então nada sai da máquina.
+
+Uso:
+    python benchmark_cacambas.py
+    python benchmark_cacambas.py --tamanhos 100 1000 --armazenamento sqlite
+    python benchmark_cacambas.py --saida novo.json --comparar anterior.json
+"""
+import argparse
+import contextlib
+import datetime
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from colorama import Fore, init
+
+try:
+    import resource  # Indisponível no Windows
+except ImportError:
+    resource = None
+
+import cacamba_gui
+from cacamba_gui import (
+    ArmazenamentoRemoto, ArmazenamentoXlsx, Cacamba, GerenciadorArquivos, GerenciadorCacambas,
+    ImportadorLote, LimitadorTaxa, ProcessadorDatas, ServicoLocalizacao
+)
+
+
+init(autoreset=True)
+
+TAMANHOS_PADRAO = [100, 1000, 10000, 100000]
+LIMITE_IMPORTACAO = 200  # Linhas do lote importado com os serviços locais
+
+# Centro da frota sintética (São Paulo) e dispersão das coordenadas, em graus
+CENTRO_FROTA = (-23.55, -46.63)
+DISPERSAO_FROTA = 0.15
+BAIRROS = ['Sé', 'Mooca', 'Pinheiros', 'Lapa', 'Santana', 'Tatuapé', 'Butantã',
+           'Vila Mariana', 'Penha', 'Ipiranga', 'Santo Amaro', 'Itaquera']
+RUAS = ['Rua das Flores', 'Avenida Paulista', 'Rua Augusta', 'Rua da Consolação',
+        'Avenida Ipiranga', 'Rua Vergueiro', 'Rua Domingos de Morais', 'Rua Teodoro Sampaio']
+
+
+class ServidorGeoLocal:
+    """Servidor HTTP local que responde como o ViaCEP e o Nominatim."""
+
+    def __init__(self, latencia_s: float = 0.0):
+        """Inicializa o servidor numa porta livre de 127.0.0.1."""
+        latencia = latencia_s
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if latencia:
+                    time.sleep(latencia)
+                if url.path.startswith('/ws/'):
+                    corpo = ServidorGeoLocal.resposta_viacep(url.path.split('/')[2])
+                elif url.path == '/search':
+                    corpo = ServidorGeoLocal.resposta_nominatim(parse_qs(url.query).get('q', [''])[0])
+                else:
+                    self.send_error(404)
+                    return
+                dados = json.dumps(corpo).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self.servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def url_base(self) -> str:
+        """Endereço do servidor."""
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    @staticmethod
+    def resposta_viacep(cep: str) -> Dict[str, Any]:
+        """Endereço determinístico para o CEP; CEPs iniciados por 99 não existem."""
+        if cep.startswith('99'):
+            return {'erro': True}
+        indice = int(cep[-3:])
+        return {
+            'cep': cep,
+            'logradouro': RUAS[indice % len(RUAS)],
+            'bairro': BAIRROS[indice % len(BAIRROS)],
+            'localidade': 'São Paulo',
+            'uf': 'SP'
+        }
+
+    @staticmethod
+    def resposta_nominatim(endereco: str) -> List[Dict[str, str]]:
+        """Coordenadas determinísticas em torno do centro da frota."""
+        resumo = hashlib.md5(endereco.encode('utf-8')).digest()
+        dlat = (resumo[0] / 255 - 0.5) * 2 * DISPERSAO_FROTA
+        dlon = (resumo[1] / 255 - 0.5) * 2 * DISPERSAO_FROTA
+        return [{'lat': f"{CENTRO_FROTA[0] + dlat:.6f}", 'lon': f"{CENTRO_FROTA[1] + dlon:.6f}"}]
+
+    def __enter__(self) -> 'ServidorGeoLocal':
+        """Inicia o servidor e aponta o ServicoLocalizacao para ele, sem limite de taxa."""
+        self._thread.start()
+        self._originais = (ServicoLocalizacao.URL_VIACEP, ServicoLocalizacao.URL_NOMINATIM,
+                           ServicoLocalizacao.LIMITADOR_VIACEP, ServicoLocalizacao.LIMITADOR_NOMINATIM)
+        ServicoLocalizacao.URL_VIACEP = self.url_base + '/ws/{cep}/json/'
+        ServicoLocalizacao.URL_NOMINATIM = self.url_base + '/search'
+        ServicoLocalizacao.LIMITADOR_VIACEP = LimitadorTaxa(taxa_por_segundo=1e9, capacidade=1e9)
+        ServicoLocalizacao.LIMITADOR_NOMINATIM = LimitadorTaxa(taxa_por_segundo=1e9, capacidade=1e9)
+        return self
+
+    def __exit__(self, *erro) -> None:
+        """Restaura os serviços reais e encerra o servidor."""
+        (ServicoLocalizacao.URL_VIACEP, ServicoLocalizacao.URL_NOMINATIM,
+         ServicoLocalizacao.LIMITADOR_VIACEP, ServicoLocalizacao.LIMITADOR_NOMINATIM) = self._originais
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class GeradorFrota:
+    """Gera caçambas sintéticas reprodutíveis."""
+
+    def __init__(self, semente: int = 42):
+        """Inicializa o gerador com a semente informada."""
+        self.aleatorio = random.Random(semente)
+        self.hoje = datetime.date.today()
+
+    def cep(self) -> str:
+        """CEP sintético de São Paulo."""
+        return f"0{self.aleatorio.randint(1000000, 5999999)}"
+
+    def data(self) -> str:
+        """Data de colocação nos últimos 10 dias."""
+        dias = self.aleatorio.randint(0, 10)
+        return (self.hoje - datetime.timedelta(days=dias)).strftime('%d/%m/%Y')
+
+    def cacamba(self, numero: str) -> Cacamba:
+        """Caçamba completa; cerca de 5% ficam sem coordenadas."""
+        sem_coordenadas = self.aleatorio.random() < 0.05
+        return Cacamba(
+            numero=numero,
+            cep=self.cep(),
+            adnumero=str(self.aleatorio.randint(1, 3000)),
+            data_colocacao=self.data(),
+            rua=self.aleatorio.choice(RUAS),
+            bairro=self.aleatorio.choice(BAIRROS),
+            cidade='São Paulo',
+            uf='SP',
+            latitude=None if sem_coordenadas else CENTRO_FROTA[0] + self.aleatorio.gauss(0, DISPERSAO_FROTA),
+            longitude=None if sem_coordenadas else CENTRO_FROTA[1] + self.aleatorio.gauss(0, DISPERSAO_FROTA)
+        )
+
+    def frota(self, tamanho: int) -> List[Cacamba]:
+        """Frota com números de 1 a tamanho."""
+        return [self.cacamba(str(numero)) for numero in range(1, tamanho + 1)]
+
+    def datas_digitadas(self, quantidade: int) -> List[str]:
+        """Datas nos formatos aceitos na digitação, com algumas inválidas."""
+        formatos = ['%d/%m/%Y', '%d/%m/%y', '%d%m%Y', '%d%m%y']
+        datas = []
+        for _ in range(quantidade):
+            if self.aleatorio.random() < 0.1:
+                datas.append(self.aleatorio.choice(['31/02/2024', '1234', 'ab/cd/efgh', '']))
+            else:
+                data = self.hoje - datetime.timedelta(days=self.aleatorio.randint(0, 3650))
+                datas.append(data.strftime(self.aleatorio.choice(formatos)))
+        return datas
+
+    def escrever_lote(self, caminho: str, quantidade: int, primeiro_numero: int) -> None:
+        """Grava um CSV de importação em lote (número; CEP; número do endereço; data)."""
+        with open(caminho, 'w', encoding='utf-8', newline='') as f:
+            f.write('numero;cep;adnumero;data\n')
+            for numero in range(primeiro_numero, primeiro_numero + quantidade):
+                f.write(f"{numero};{self.cep()};{self.aleatorio.randint(1, 3000)};{self.data()}\n")
+
+
+def medir(funcao: Callable[[], Any], repeticoes: int,
+          preparar: Optional[Callable[[], None]] = None, itens: int = 1) -> Dict[str, Any]:
+    """Executa a função várias vezes (sem a saída do aplicativo) e resume os tempos em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if preparar:
+                preparar()
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    mediana = statistics.median(tempos)
+    return {
+        'repeticoes': repeticoes,
+        'itens': itens,
+        'mediana_s': mediana,
+        'minimo_s': min(tempos),
+        'maximo_s': max(tempos),
+        'mediana_por_item_s': mediana / itens
+    }
+
+
+def medir_memoria(funcao: Callable[[], Any], preparar: Optional[Callable[[], None]] = None) -> int:
+    """Executa a função uma vez, fora das medições de tempo, e retorna o pico de memória alocada em bytes."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if preparar:
+            preparar()
+        tracemalloc.start()
+        try:
+            funcao()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def memoria_maxima_processo() -> Optional[int]:
+    """Maior memória residente do processo até agora, em bytes (None se não houver como medir)."""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em kilobytes nos demais sistemas
+    return maximo if sys.platform == 'darwin' else maximo * 1024
+
+
+def preparar_dados(diretorio: str, frota: List[Cacamba], armazenamento: str) -> None:
+    """Grava a frota e aponta o aplicativo para ela, com caches vazios no diretório."""
+    caminho = os.path.join(diretorio, GerenciadorArquivos.ARQUIVO_PADRAO)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ArmazenamentoXlsx.escrever_planilha(caminho, frota)
+        GerenciadorArquivos.usar_arquivo_dados(caminho, diretorio, armazenamento)
+        if not issubclass(GerenciadorArquivos.ARMAZENAMENTOS[armazenamento], ArmazenamentoXlsx):
+            # Formatos fora da planilha recebem a frota pela migração usual
+            GerenciadorArquivos.importar_planilha(caminho)
+        ServicoLocalizacao.invalidar_caches()
+
+
+def medir_tamanho(tamanho: int, armazenamento: str, repeticoes: int,
+                  semente: int) -> Tuple[Dict[str, Any], Dict[str, Optional[int]]]:
+    """Mede todas as operações com uma frota do tamanho informado.
+
+    Retorna os tempos por operação e os picos de memória, em bytes.
+    """
+    gerador = GeradorFrota(semente)
+    frota = gerador.frota(tamanho)
+    resultados: Dict[str, Any] = {}
+    memoria: Dict[str, Optional[int]] = {}
+
+    with tempfile.TemporaryDirectory(prefix='bench_cacambas_') as diretorio:
+        inicio = time.perf_counter()
+        preparar_dados(diretorio, frota, armazenamento)
+        print(Fore.CYAN + f"  frota de {tamanho} gravada em {time.perf_counter() - inicio:.2f}s")
+
+        def invalidar():
+            GerenciadorArquivos.obter_repositorio().invalidar()
+
+        def invalidar_sem_snapshot():
+            invalidar()
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(diretorio, GerenciadorArquivos.ARQUIVO_PADRAO + ArmazenamentoXlsx.SUFIXO_SNAPSHOT))
+
+        # Leitura completa da planilha, que também refaz o snapshot usado pelas leituras seguintes
+        resultados['carregar_cacambas_sem_snapshot'] = medir(
+            GerenciadorArquivos.carregar_cacambas, repeticoes, preparar=invalidar_sem_snapshot, itens=tamanho)
+        resultados['carregar_cacambas_frio'] = medir(
+            GerenciadorArquivos.carregar_cacambas, repeticoes, preparar=invalidar, itens=tamanho)
+        resultados['carregar_cacambas'] = medir(
+            GerenciadorArquivos.carregar_cacambas, repeticoes, itens=tamanho)
+        memoria['carregar_cacambas_frio'] = medir_memoria(GerenciadorArquivos.carregar_cacambas, preparar=invalidar)
+
+        # Cada repetição inclui uma caçamba nova e a remove em seguida
+        novas = [gerador.cacamba(f"N{indice}") for indice in range(repeticoes)]
+        fila_salvar = iter(novas)
+        resultados['salvar_cacamba'] = medir(
+            lambda: GerenciadorArquivos.salvar_cacamba(next(fila_salvar)), repeticoes)
+        fila_remover = iter(novas)
+        resultados['remover_cacamba'] = medir(
+            lambda: GerenciadorArquivos.remover_cacamba(next(fila_remover).numero), repeticoes)
+
+        gerenciador = GerenciadorCacambas()
+        resultados['verificar_cacambas_para_retirada'] = medir(
+            gerenciador.verificar_cacambas_para_retirada, repeticoes, itens=tamanho)
+
+        cacambas = GerenciadorArquivos.carregar_cacambas()
+        versao = GerenciadorArquivos.versao_cacambas()
+        # Cada repetição recebe uma caçamba a mais, para que os dados do mapa sejam regravados
+        variacoes = iter([cacambas + [gerador.cacamba(f"M{indice}")] for indice in range(repeticoes + 1)])
+        resultados['gerar_mapa'] = medir(
+            lambda: ServicoLocalizacao.gerar_mapa(next(variacoes)), repeticoes,
+            preparar=ServicoLocalizacao.invalidar_caches, itens=tamanho)
+        memoria['gerar_mapa'] = medir_memoria(lambda: ServicoLocalizacao.gerar_mapa(next(variacoes)))
+        # Mesmos dados da gravação anterior: as caçambas são percorridas, mas nada é regravado
+        with contextlib.redirect_stdout(io.StringIO()):
+            ServicoLocalizacao.gerar_mapa(cacambas)
+        resultados['gerar_mapa_sem_alteracao'] = medir(
+            lambda: ServicoLocalizacao.gerar_mapa(cacambas), repeticoes, itens=tamanho)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ServicoLocalizacao.gerar_mapa(cacambas, versao)
+        resultados['gerar_mapa_reaproveitado'] = medir(
+            lambda: ServicoLocalizacao.gerar_mapa(cacambas, versao), repeticoes, itens=tamanho)
+
+        datas = gerador.datas_digitadas(min(tamanho, 10000))
+        resultados['validar_e_formatar_data'] = medir(
+            lambda: [ProcessadorDatas.validar_e_formatar_data(data) for data in datas],
+            repeticoes, itens=len(datas))
+
+        # Importação em lote consultando os serviços locais, com caches vazios a cada repetição
+        quantidade_lote = min(tamanho, LIMITE_IMPORTACAO)
+        lotes = []
+        for indice in range(repeticoes):
+            caminho_lote = os.path.join(diretorio, f"lote_{indice}.csv")
+            gerador.escrever_lote(caminho_lote, quantidade_lote, tamanho + 1 + indice * quantidade_lote)
+            lotes.append(caminho_lote)
+        fila_lotes = iter(lotes)
+
+        def limpar_caches():
+            ServicoLocalizacao.invalidar_caches()
+            for arquivo in (ServicoLocalizacao.ARQUIVO_CACHE_CEP, ServicoLocalizacao.ARQUIVO_CACHE_COORDENADAS):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(diretorio, arquivo))
+
+        resultados['importar_lote'] = medir(
+            lambda: ImportadorLote.importar(next(fila_lotes)), repeticoes,
+            preparar=limpar_caches, itens=quantidade_lote)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            GerenciadorArquivos.compactar_armazenamento()
+        ServicoLocalizacao.invalidar_caches()
+
+    memoria['processo'] = memoria_maxima_processo()
+    return resultados, memoria
+
+
+def comparar(atual: Dict[str, Any], caminho_anterior: str) -> None:
+    """Imprime a razão entre as medianas atuais e as de um resultado anterior."""
+    with open(caminho_anterior, 'r', encoding='utf-8') as f:
+        anterior = json.load(f)
+    print(Fore.CYAN + f"\nComparação com {caminho_anterior} (atual / anterior):")
+    for tamanho, operacoes in atual['resultados'].items():
+        for operacao, medida in operacoes.items():
+            referencia = anterior.get('resultados', {}).get(tamanho, {}).get(operacao)
+            if not referencia or not referencia['mediana_s']:
+                continue
+            razao = medida['mediana_s'] / referencia['mediana_s']
+            cor = Fore.RED if razao > 1.2 else Fore.GREEN if razao < 0.8 else Fore.WHITE
+            print(cor + f"  {tamanho:>7} {operacao:<34} {razao:6.2f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Executa o benchmark e grava os resultados em JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark do Gerenciador de Caçambas")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help="quantidades de caçambas da frota sintética")
+    parser.add_argument('--armazenamento', default=ArmazenamentoXlsx.nome,
+                        choices=sorted(set(GerenciadorArquivos.ARMAZENAMENTOS) - {ArmazenamentoRemoto.nome}))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--latencia-ms', type=float, default=0.0,
+                        help="atraso de cada resposta dos serviços locais")
+    parser.add_argument('--saida', default='benchmark_resultados.json')
+    parser.add_argument('--comparar', metavar='ARQUIVO', help="resultado anterior para comparação")
+    args = parser.parse_args(argv)
+
+    relatorio = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'script': hashlib.sha256(Path(cacamba_gui.__file__).read_bytes()).hexdigest()[:12],
+        'armazenamento': args.armazenamento,
+        'repeticoes': args.repeticoes,
+        'semente': args.semente,
+        'latencia_ms': args.latencia_ms,
+        'resultados': {},
+        'memoria_bytes': {}
+    }
+
+    with ServidorGeoLocal(args.latencia_ms / 1000):
+        for tamanho in args.tamanhos:
+            print(Fore.CYAN + f"Medindo frota de {tamanho} caçambas ({args.armazenamento})...")
+            resultados, memoria = medir_tamanho(tamanho, args.armazenamento, args.repeticoes, args.semente)
+            relatorio['resultados'][str(tamanho)] = resultados
+            relatorio['memoria_bytes'][str(tamanho)] = memoria
+            for operacao, medida in resultados.items():
+                print(f"  {operacao:<34} {medida['mediana_s'] * 1000:10.2f} ms")
+            for item, pico in memoria.items():
+                if pico is not None:
+                    print(f"  {'memória ' + item:<34} {pico / 2**20:10.1f} MB")
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(Fore.GREEN + f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        comparar(relatorio, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
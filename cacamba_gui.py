@@ -1,24 +1,86 @@
+import time
+# Início da importação do módulo, usado no tempo de inicialização
+_INICIO_IMPORTACAO = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, Scrollbar
+import argparse
+import atexit
+import bisect
+import contextlib
+import cProfile
+import csv
 import datetime
-import time
+import functools
+import hashlib
+import heapq
+import importlib
+import io
+import math
+import pstats
 import os
 import sys
 import json
-from openpyxl import load_workbook, Workbook
-from colorama import Fore, init
-import requests
-import folium
-from urllib.parse import urlencode
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional, Any
+import marshal
+import sqlite3
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlencode, urlparse
+from itertools import count, islice
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields, replace
+from typing import List, Dict, Set, Tuple, Optional, Any, Callable, Iterable, Iterator
 
 
-# Inicializa o colorama para resetar cores automaticamente
-init(autoreset=True)
+class ImportacaoPreguicosa:
+    """Adia a importação de um módulo (ou de um atributo dele) até o primeiro uso.
 
+    folium, requests, openpyxl e numpy levam segundos para carregar no
+    executável e não são necessários para exibir a janela.
+    """
 
-@dataclass
+    def __init__(self, modulo: str, atributo: Optional[str] = None,
+                 ao_importar: Optional[Callable[[Any], None]] = None):
+        """Inicializa a referência sem importar nada."""
+        self._modulo = modulo
+        self._atributo = atributo
+        self._ao_importar = ao_importar
+        self._objeto = None
+        self._lock = threading.Lock()
+
+    def _carregar(self) -> Any:
+        """Importa o módulo na primeira chamada e retorna o objeto referenciado."""
+        if self._objeto is None:
+            with self._lock:
+                if self._objeto is None:
+                    with Instrumentacao.medir(f"importacao.{self._modulo}"):
+                        modulo = importlib.import_module(self._modulo)
+                        if self._ao_importar:
+                            self._ao_importar(modulo)
+                    self._objeto = getattr(modulo, self._atributo) if self._atributo else modulo
+        return self._objeto
+
+    def __getattr__(self, nome: str) -> Any:
+        """Repassa o acesso ao módulo importado."""
+        return getattr(self._carregar(), nome)
+
+
+openpyxl = ImportacaoPreguicosa('openpyxl')
+requests = ImportacaoPreguicosa('requests')
+folium = ImportacaoPreguicosa('folium')
+plugins_folium = ImportacaoPreguicosa('folium.plugins')
+elementos_branca = ImportacaoPreguicosa('branca.element')
+np = ImportacaoPreguicosa('numpy')
+# O colorama é inicializado na primeira mensagem colorida, para resetar as cores automaticamente
+Fore = ImportacaoPreguicosa('colorama', 'Fore', ao_importar=lambda colorama: colorama.init(autoreset=True))
+
+# Em Python 3.10+ as caçambas usam __slots__: sem __dict__ por instância, o
+# acervo histórico (dezenas de milhares de registros) ocupa bem menos memória
+_OPCOES_DATACLASS_COMPACTA = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_OPCOES_DATACLASS_COMPACTA)
 class Cacamba:
     """Classe para representar uma caçamba."""
     numero: str
@@ -31,15 +93,47 @@ class Cacamba:
     uf: str
     latitude: float = None
     longitude: float = None
+    # Data de colocação já interpretada, calculada uma única vez na criação
+    data: Optional[datetime.date] = field(default=None, init=False, repr=False, compare=False)
+
+    DIAS_PARA_RETIRADA = 3  # Prazo, em dias, para a caçamba ser retirada
+
+    # Campos de texto que se repetem muito entre registros (mesma cidade, UF,
+    # bairro, rua, data...) e por isso são internados para compartilhar memória
+    CAMPOS_INTERNADOS = ('cep', 'data_colocacao', 'rua', 'bairro', 'cidade', 'uf')
+
+    def __post_init__(self):
+        """Interna os textos repetidos e interpreta a data de colocação (dd/mm/aaaa)."""
+        for nome in self.CAMPOS_INTERNADOS:
+            valor = getattr(self, nome)
+            if type(valor) is str:
+                setattr(self, nome, sys.intern(valor))
+        self.data = self.interpretar_data(self.data_colocacao)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def interpretar_data(texto: str) -> Optional[datetime.date]:
+        """Converte dd/mm/aaaa em date sem usar strptime; retorna None se inválida."""
+        try:
+            dia, mes, ano = texto.split('/')
+            return datetime.date(int(ano), int(mes), int(dia))
+        except (ValueError, AttributeError):
+            return None
+
+    def dias_em(self, hoje: datetime.date) -> int:
+        """Calcula quantos dias a caçamba está no local na data informada."""
+        if self.data is None:
+            return 0
+        return (hoje - self.data).days
+
+    def precisa_retirada_em(self, hoje: datetime.date) -> bool:
+        """Verifica se a caçamba precisa ser retirada na data informada."""
+        return self.dias_em(hoje) >= self.DIAS_PARA_RETIRADA
 
     @property
     def dias_no_local(self) -> int:
         """Calcula quantos dias a caçamba está no local."""
-        try:
-            data = datetime.datetime.strptime(self.data_colocacao, '%d/%m/%Y')
-            return (datetime.datetime.now() - data).days
-        except ValueError:
-            return 0
+        return self.dias_em(datetime.date.today())
 
     @property
     def endereco_completo(self) -> str:
@@ -49,420 +143,2981 @@ class Cacamba:
     @property
     def precisa_retirada(self) -> bool:
         """Verifica se a caçamba precisa ser retirada (mais de 3 dias no local)."""
-        return self.dias_no_local >= 3
+        return self.precisa_retirada_em(datetime.date.today())
 
 
-class GerenciadorArquivos:
-    """Classe para gerenciar operações de arquivo."""
-    
-    ARQUIVO_PADRAO = 'cacambas.xlsx'
-    ARQUIVO_CONFIG = 'config.json'
-    
+@dataclass
+class EstatisticaOperacao:
+    """Chamadas, falhas e histograma de latência de uma operação instrumentada."""
+    chamadas: int = 0
+    falhas: int = 0
+    total_s: float = 0.0
+    maximo_s: float = 0.0
+    # Contagem por faixa de Instrumentacao.LIMITES_HISTOGRAMA_MS (a última faixa não tem limite)
+    histograma: List[int] = field(default_factory=list)
+
+    def registrar(self, duracao_s: float, falhou: bool) -> None:
+        """Contabiliza uma execução."""
+        if not self.histograma:
+            self.histograma = [0] * (len(Instrumentacao.LIMITES_HISTOGRAMA_MS) + 1)
+        self.chamadas += 1
+        self.falhas += falhou
+        self.total_s += duracao_s
+        self.maximo_s = max(self.maximo_s, duracao_s)
+        self.histograma[bisect.bisect_left(Instrumentacao.LIMITES_HISTOGRAMA_MS, duracao_s * 1000)] += 1
+
+    @property
+    def media_s(self) -> float:
+        """Duração média das execuções."""
+        return self.total_s / self.chamadas if self.chamadas else 0.0
+
+    def percentil_s(self, fracao: float) -> float:
+        """Estimativa do percentil pelo limite superior da faixa do histograma."""
+        alvo = fracao * self.chamadas
+        acumulado = 0
+        for indice, quantidade in enumerate(self.histograma):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                if indice < len(Instrumentacao.LIMITES_HISTOGRAMA_MS):
+                    return min(Instrumentacao.LIMITES_HISTOGRAMA_MS[indice] / 1000, self.maximo_s)
+                return self.maximo_s
+        return 0.0
+
+
+class Instrumentacao:
+    """Medições leves dos trechos demorados (arquivos, serviços externos, mapa e interface).
+
+    Os tempos, bytes e caches são acumulados em memória durante toda a
+    execução e podem ser vistos na janela de diagnóstico ou gravados em JSON.
+    A captura com cProfile, mais cara, só roda quando solicitada.
+    """
+
+    # Limites superiores, em ms, das faixas do histograma de latência
+    LIMITES_HISTOGRAMA_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    _operacoes: Dict[str, EstatisticaOperacao] = {}
+    # Categoria -> [bytes lidos, bytes gravados]
+    _bytes: Dict[str, List[int]] = {}
+    _caches: Dict[str, Any] = {}
+    _perfil = None
+    _perfil_coletado = None
+    _lock = threading.Lock()
+    # (etapa, duração em s) da inicialização, a partir do início da importação do módulo
+    _inicializacao: List[Tuple[str, float]] = []
+    _marca_inicializacao: Optional[float] = None
+
     @staticmethod
-    def obter_caminho_arquivo() -> str:
-        """Retorna o caminho completo do arquivo de dados."""
-        try:
-            # Obtém o diretório do executável em vez do __file__ 
-            # para compatibilidade com auto-py-to-exe
-            if getattr(sys, 'frozen', False):
-                # Executando como executável compilado
-                diretorio_base = os.path.dirname(sys.executable)
-            else:
-                # Executando como script Python
-                diretorio_base = os.path.dirname(os.path.abspath(__file__))
-            
-            # Verifica se existe arquivo de configuração
-            caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
-            print(Fore.CYAN + f"Procurando configuração em: {caminho_config}")
-            
-            if os.path.exists(caminho_config):
-                with open(caminho_config, 'r') as f:
-                    config = json.load(f)
-                    caminho_arquivo = config.get('caminho_arquivo')
-                    
-                    # Verificar se o caminho existe
-                    if caminho_arquivo and os.path.exists(os.path.dirname(caminho_arquivo)):
-                        print(Fore.GREEN + f"Usando arquivo de dados em: {caminho_arquivo}")
-                        return caminho_arquivo
-                    else:
-                        print(Fore.YELLOW + f"Caminho configurado não existe mais: {caminho_arquivo}")
-                        # Se o diretório não existir mais, podemos perguntar novamente
-                        return GerenciadorArquivos.solicitar_novo_caminho(diretorio_base)
-        except Exception as e:
-            print(Fore.RED + f"Erro ao ler configuração: {e}")
-            
-        # Caminho padrão se não houver configuração
-        if getattr(sys, 'frozen', False):
-            diretorio_base = os.path.dirname(sys.executable)
-        else:
-            diretorio_base = os.path.dirname(os.path.abspath(__file__))
-            
-        caminho_padrao = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-        print(Fore.YELLOW + f"Usando caminho padrão: {caminho_padrao}")
-        return caminho_padrao
-    
+    def registrar_tempo(nome: str, duracao_s: float, falhou: bool = False) -> None:
+        """Contabiliza uma execução da operação informada."""
+        with Instrumentacao._lock:
+            estatistica = Instrumentacao._operacoes.get(nome)
+            if estatistica is None:
+                estatistica = Instrumentacao._operacoes[nome] = EstatisticaOperacao()
+            estatistica.registrar(duracao_s, falhou)
+
     @staticmethod
-    def solicitar_novo_caminho(diretorio_base=None) -> str:
-        """Solicita um novo caminho para o arquivo caso o anterior não exista mais."""
+    @contextlib.contextmanager
+    def medir(nome: str) -> Iterator[None]:
+        """Mede o bloco; exceções são contadas como falhas e repassadas."""
+        inicio = time.perf_counter()
+        falhou = True
         try:
-            from tkinter import filedialog, Tk
-            
-            root_temp = Tk()
-            root_temp.withdraw()
-            
-            messagebox.showinfo(
-                "Localização do Arquivo",
-                "O local anterior do arquivo não está mais disponível.\n"
-                "Por favor, escolha um novo local para o arquivo de dados."
-            )
-            
-            # Define o diretório inicial como o diretório do executável se não for especificado
-            if diretorio_base is None:
-                if getattr(sys, 'frozen', False):
-                    diretorio_base = os.path.dirname(sys.executable)
-                else:
-                    diretorio_base = os.path.dirname(os.path.abspath(__file__))
-                    
-            caminho_arquivo = filedialog.asksaveasfilename(
-                title="Salvar arquivo de dados das caçambas",
-                defaultextension=".xlsx",
-                filetypes=[("Arquivo Excel", "*.xlsx")],
-                initialfile=GerenciadorArquivos.ARQUIVO_PADRAO,
-                initialdir=diretorio_base
-            )
-            
-            root_temp.destroy()
-            
-            if not caminho_arquivo:
-                caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-                print(Fore.YELLOW + "Usuário cancelou. Usando caminho padrão.")
-            
-            # Salva a nova configuração
-            GerenciadorArquivos.salvar_configuracao(caminho_arquivo, diretorio_base)
-            return caminho_arquivo
-            
-        except Exception as e:
-            print(Fore.RED + f"Erro ao solicitar novo caminho: {e}")
-            if diretorio_base is None:
-                if getattr(sys, 'frozen', False):
-                    diretorio_base = os.path.dirname(sys.executable)
-                else:
-                    diretorio_base = os.path.dirname(os.path.abspath(__file__))
-            return os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-    
+            yield
+            falhou = False
+        finally:
+            Instrumentacao.registrar_tempo(nome, time.perf_counter() - inicio, falhou)
+
     @staticmethod
-    def salvar_configuracao(caminho: str, diretorio_base=None) -> None:
-        """Salva o caminho do arquivo na configuração."""
-        try:
-            config = {'caminho_arquivo': caminho}
-            
-            # Define o diretório de base para salvar a configuração
-            if diretorio_base is None:
-                if getattr(sys, 'frozen', False):
-                    diretorio_base = os.path.dirname(sys.executable)
-                else:
-                    diretorio_base = os.path.dirname(os.path.abspath(__file__))
-                    
-            caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
-            print(Fore.CYAN + f"Salvando configuração em: {caminho_config}")
-            
-            with open(caminho_config, 'w') as f:
-                json.dump(config, f)
-            print(Fore.GREEN + f"Configuração salva em {caminho_config}")
-        except Exception as e:
-            print(Fore.RED + f"Erro ao salvar configuração: {e}")
-    
+    def medido(nome: str) -> Callable[[Callable], Callable]:
+        """Decorador que mede cada chamada da função com o nome informado."""
+        def decorar(funcao: Callable) -> Callable:
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                with Instrumentacao.medir(nome):
+                    return funcao(*args, **kwargs)
+            return medida
+        return decorar
+
     @staticmethod
-    def criar_arquivo_se_nao_existir() -> None:
-        """Cria o arquivo Excel se não existir."""
-        # Determina o diretório base - diferente para script vs executable
-        if getattr(sys, 'frozen', False):
-            diretorio_base = os.path.dirname(sys.executable)
-        else:
-            diretorio_base = os.path.dirname(os.path.abspath(__file__))
-        
-        caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
-        print(Fore.CYAN + f"Verificando existência de configuração em: {caminho_config}")
-        
-        # Verifica se é a primeira execução
-        primeira_execucao = not os.path.exists(caminho_config)
-        
-        if primeira_execucao:
-            print(Fore.CYAN + "Primeira execução detectada. Solicitando local para salvar arquivo de dados.")
-            try:
-                # Solicita ao usuário o caminho para salvar o arquivo
-                from tkinter import filedialog, Tk
-                
-                root_temp = Tk()
-                root_temp.withdraw()  # Esconde a janela principal
-                
-                messagebox.showinfo(
-                    "Configuração Inicial",
-                    "Bem-vindo ao Gerenciador de Caçambas!\n\n"
-                    "Este parece ser o primeiro uso do sistema.\n"
-                    "Por favor, escolha onde salvar o arquivo de dados das caçambas."
-                )
-                
-                caminho_arquivo = filedialog.asksaveasfilename(
-                    title="Salvar arquivo de dados das caçambas",
-                    defaultextension=".xlsx",
-                    filetypes=[("Arquivo Excel", "*.xlsx")],
-                    initialfile=GerenciadorArquivos.ARQUIVO_PADRAO,
-                    initialdir=diretorio_base
-                )
-                
-                root_temp.destroy()
-                
-                if not caminho_arquivo:
-                    print(Fore.YELLOW + "Usuário cancelou a seleção de caminho. Usando caminho padrão.")
-                    caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-                
-                # Salva a configuração
-                GerenciadorArquivos.salvar_configuracao(caminho_arquivo, diretorio_base)
-                
-            except Exception as e:
-                print(Fore.RED + f"Erro ao solicitar caminho do arquivo: {e}")
-                caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-        else:
-            caminho_arquivo = GerenciadorArquivos.obter_caminho_arquivo()
-        
-        # Cria o arquivo se não existir
-        if not os.path.exists(caminho_arquivo):
-            try:
-                wb = Workbook()
-                ws = wb.active
-                ws.append(['Numero', 'CEP', 'adnumero', 'data_colocacao', 'Rua', 
-                          'Bairro', 'Cidade', 'UF', 'latitude', 'longitude'])
-                wb.save(caminho_arquivo)
-                print(Fore.GREEN + f"Arquivo {caminho_arquivo} criado com sucesso!")
-            except Exception as e:
-                print(Fore.RED + f"Erro ao criar o arquivo {caminho_arquivo}: {e}")
-                
-                # Se houver erro, tenta criar no local padrão
-                caminho_padrao = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
-                try:
-                    wb = Workbook()
-                    ws = wb.active
-                    ws.append(['Numero', 'CEP', 'adnumero', 'data_colocacao', 'Rua', 
-                              'Bairro', 'Cidade', 'UF', 'latitude', 'longitude'])
-                    wb.save(caminho_padrao)
-                    print(Fore.YELLOW + f"Arquivo criado no local padrão: {caminho_padrao}")
-                    GerenciadorArquivos.salvar_configuracao(caminho_padrao, diretorio_base)
-                except Exception as e2:
-                    print(Fore.RED + f"Erro ao criar o arquivo no local padrão: {e2}")
-    
+    def marcar_inicializacao(etapa: str) -> None:
+        """Registra a duração da etapa de inicialização que termina agora."""
+        agora = time.perf_counter()
+        anterior = Instrumentacao._marca_inicializacao or _INICIO_IMPORTACAO
+        Instrumentacao._inicializacao.append((etapa, agora - anterior))
+        Instrumentacao._marca_inicializacao = agora
+
     @staticmethod
-    def carregar_cacambas() -> List[Cacamba]:
-        """Carrega os dados das caçambas do arquivo Excel."""
-        GerenciadorArquivos.criar_arquivo_se_nao_existir()
-        try:
-            wb = load_workbook(GerenciadorArquivos.obter_caminho_arquivo())
-            ws = wb.active
-            cacambas = []
-            
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0]:  # Verifica se o número da caçamba existe
-                    cacamba = Cacamba(
-                        numero=str(row[0]),
-                        cep=str(row[1]),
-                        adnumero=str(row[2]),
-                        data_colocacao=str(row[3]),
-                        rua=str(row[4]),
-                        bairro=str(row[5]),
-                        cidade=str(row[6]),
-                        uf=str(row[7]),
-                        latitude=row[8],
-                        longitude=row[9]
-                    )
-                    cacambas.append(cacamba)
-            
-            return cacambas
-        except Exception as e:
-            print(Fore.RED + f"Erro ao carregar dados: {e}")
-            return []
-    
+    def resumo_inicializacao() -> str:
+        """Tempo total de inicialização e de cada etapa, em texto."""
+        total = sum(duracao for _, duracao in Instrumentacao._inicializacao)
+        etapas = ', '.join(f"{etapa} {duracao * 1000:.0f} ms" for etapa, duracao in Instrumentacao._inicializacao)
+        return f"Inicialização em {total * 1000:.0f} ms ({etapas})"
+
     @staticmethod
-    def salvar_cacamba(cacamba: Cacamba) -> bool:
-        """Salva uma nova caçamba no arquivo."""
-        try:
-            wb = load_workbook(GerenciadorArquivos.obter_caminho_arquivo())
-            ws = wb.active
-            
-            # Verifica se o número já existe
-            numeros_existentes = [str(row[0]) for row in ws.iter_rows(min_row=2, values_only=True)]
-            if cacamba.numero in numeros_existentes:
-                return False
-            
-            ws.append([
-                cacamba.numero, 
-                cacamba.cep, 
-                cacamba.adnumero, 
-                cacamba.data_colocacao, 
-                cacamba.rua, 
-                cacamba.bairro, 
-                cacamba.cidade, 
-                cacamba.uf, 
-                cacamba.latitude, 
-                cacamba.longitude
-            ])
-            
-            wb.save(GerenciadorArquivos.obter_caminho_arquivo())
-            return True
-        except Exception as e:
-            print(Fore.RED + f"Erro ao salvar caçamba: {e}")
-            return False
-    
+    def registrar_bytes(categoria: str, lidos: int = 0, gravados: int = 0) -> None:
+        """Contabiliza bytes lidos e gravados na categoria (planilha, journal, cache, http, mapa)."""
+        with Instrumentacao._lock:
+            totais = Instrumentacao._bytes.setdefault(categoria, [0, 0])
+            totais[0] += lidos
+            totais[1] += gravados
+
     @staticmethod
-    def remover_cacamba(numero: str) -> bool:
-        """Remove uma caçamba do arquivo pelo número."""
+    def registrar_cache(nome: str, cache: Any) -> None:
+        """Acompanha a taxa de acertos de um cache (com atributos acertos e falhas)."""
+        with Instrumentacao._lock:
+            Instrumentacao._caches[nome] = cache
+
+    @staticmethod
+    def tamanho_arquivo(caminho: str) -> int:
+        """Tamanho do arquivo em bytes, ou 0 se ele não existir."""
         try:
-            wb = load_workbook(GerenciadorArquivos.obter_caminho_arquivo())
-            ws = wb.active
-    
-            linha_para_remover = None
-            for row in ws.iter_rows(min_row=2):
-                if str(row[0].value) == numero:
-                    linha_para_remover = row[0].row
-                    break
-            
-            if linha_para_remover:
-                ws.delete_rows(linha_para_remover, 1)
-                wb.save(GerenciadorArquivos.obter_caminho_arquivo())
-                return True
-            
-            return False
-        except Exception as e:
-            print(Fore.RED + f"Erro ao remover caçamba: {e}")
-            return False
+            return os.path.getsize(caminho)
+        except OSError:
+            return 0
 
+    @staticmethod
+    def perfil_ativo() -> bool:
+        """Indica se a captura com cProfile está em andamento."""
+        return Instrumentacao._perfil is not None
 
-class ServicoLocalizacao:
-    """Classe para serviços de localização e geolocalização."""
-    
     @staticmethod
-    def obter_endereco_por_cep(cep: str) -> Optional[Dict[str, str]]:
-        """Obtém informações de endereço a partir do CEP usando a API ViaCEP."""
+    def iniciar_perfil() -> None:
+        """Inicia a captura com cProfile (apenas da thread principal)."""
+        if Instrumentacao._perfil is None:
+            Instrumentacao._perfil = cProfile.Profile()
+            Instrumentacao._perfil.enable()
+
+    @staticmethod
+    def parar_perfil() -> None:
+        """Encerra a captura; o resultado fica disponível para o relatório."""
+        if Instrumentacao._perfil is not None:
+            Instrumentacao._perfil.disable()
+            Instrumentacao._perfil_coletado = Instrumentacao._perfil
+            Instrumentacao._perfil = None
+
+    @staticmethod
+    def parar_perfil_e_gravar(caminho: str) -> None:
+        """Encerra a captura em andamento e grava o relatório (usado ao sair do aplicativo)."""
+        Instrumentacao.parar_perfil()
         try:
-            url = f"https://viacep.com.br/ws/{cep}/json/"
-            resposta = requests.get(url).json()
-            
-            if "erro" not in resposta:
-                endereco = {
-                    'rua': resposta["logradouro"],
-                    'bairro': resposta["bairro"],
-                    'cidade': resposta["localidade"],
-                    'uf': resposta["uf"]
-                }
-                time.sleep(1)  # Evita sobrecarga na API
-                return endereco
-            return None
-        except Exception as e:
-            print(Fore.RED + f"Erro ao obter endereço pelo CEP: {e}")
+            Instrumentacao.gravar_relatorio(caminho)
+        except OSError as e:
+            print(Fore.RED + f"Erro ao gravar relatório de diagnóstico: {e}")
+
+    @staticmethod
+    def resumo_perfil(linhas: int = 30) -> Optional[str]:
+        """Funções com maior tempo acumulado na última captura encerrada, em texto."""
+        perfil = Instrumentacao._perfil_coletado
+        if perfil is None:
             return None
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(linhas)
+        return saida.getvalue()
 
     @staticmethod
-    def obter_coordenadas(endereco: str) -> Optional[Tuple[float, float]]:
-        """Obtém as coordenadas geográficas a partir do endereço usando a API Nominatim."""
-        try:
-            params = urlencode({"q": endereco, "format": "json"})
-            url = f"https://nominatim.openstreetmap.org/search?{params}"
-            time.sleep(1)  # Respeita limites da API
-    
-            headers = {
-                "User-Agent": "Mozilla/5.0 (compatible; CacambaGerenciador/1.0)"
+    def zerar() -> None:
+        """Descarta as medições acumuladas (os caches continuam acompanhados)."""
+        with Instrumentacao._lock:
+            Instrumentacao._operacoes.clear()
+            Instrumentacao._bytes.clear()
+        Instrumentacao._perfil_coletado = None
+
+    @staticmethod
+    def relatorio() -> Dict[str, Any]:
+        """Monta o relatório das medições, com os tempos em milissegundos."""
+        with Instrumentacao._lock:
+            operacoes = {
+                nome: {
+                    'chamadas': e.chamadas,
+                    'falhas': e.falhas,
+                    'total_ms': e.total_s * 1000,
+                    'media_ms': e.media_s * 1000,
+                    'p50_ms': e.percentil_s(0.5) * 1000,
+                    'p95_ms': e.percentil_s(0.95) * 1000,
+                    'maximo_ms': e.maximo_s * 1000,
+                    'histograma': dict(zip(
+                        [f"<={limite}ms" for limite in Instrumentacao.LIMITES_HISTOGRAMA_MS]
+                        + [f">{Instrumentacao.LIMITES_HISTOGRAMA_MS[-1]}ms"],
+                        e.histograma
+                    )),
+                }
+                for nome, e in sorted(Instrumentacao._operacoes.items())
             }
-    
-            resposta = requests.get(url, headers=headers).json()
+            bytes_por_categoria = {
+                categoria: {'lidos': lidos, 'gravados': gravados}
+                for categoria, (lidos, gravados) in sorted(Instrumentacao._bytes.items())
+            }
+            caches = {
+                nome: {'acertos': cache.acertos, 'falhas': cache.falhas, 'taxa_acertos': cache.taxa_acertos}
+                for nome, cache in sorted(Instrumentacao._caches.items())
+            }
+
+        informacoes = Cacamba.interpretar_data.cache_info()
+        consultas = informacoes.hits + informacoes.misses
+        caches['datas'] = {'acertos': informacoes.hits, 'falhas': informacoes.misses,
+                           'taxa_acertos': informacoes.hits / consultas if consultas else 0.0}
+        return {
+            'data': datetime.datetime.now().isoformat(timespec='seconds'),
+            'inicializacao_ms': {etapa: duracao * 1000 for etapa, duracao in Instrumentacao._inicializacao},
+            'operacoes': operacoes,
+            'bytes': bytes_por_categoria,
+            'caches': caches,
+            'perfil': Instrumentacao.resumo_perfil(),
+        }
+
+    @staticmethod
+    def gravar_relatorio(caminho: str) -> None:
+        """Grava o relatório em JSON e, se houver captura encerrada, os dados do cProfile em .prof."""
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(Instrumentacao.relatorio(), f, indent=2, ensure_ascii=False)
+        perfil = Instrumentacao._perfil_coletado
+        if perfil is not None:
+            perfil.dump_stats(os.path.splitext(caminho)[0] + '.prof')
+        print(Fore.GREEN + f"Relatório de diagnóstico gravado em {caminho}")
+
+
+COLUNAS_PLANILHA = ['Numero', 'CEP', 'adnumero', 'data_colocacao', 'Rua',
+                    'Bairro', 'Cidade', 'UF', 'latitude', 'longitude']
+
+
+class Armazenamento:
+    """Classe base para os formatos de armazenamento das caçambas."""
+
+    nome = ''
+    consultas_indexadas = False  # Suporta existe() e listar_para_retirada() sem carga completa
+
+    def __init__(self, caminho: str):
+        """Inicializa o armazenamento para a planilha informada."""
+        self.caminho = caminho
+
+    @staticmethod
+    def _assinatura_arquivo(caminho: str) -> Optional[Tuple[int, int]]:
+        """Retorna (mtime, tamanho) do arquivo ou None se ele não existir."""
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def assinatura(self) -> Optional[tuple]:
+        """Identifica a versão atual dos dados em disco."""
+        return self._assinatura_arquivo(self.caminho)
+
+    def carregar(self) -> List[Cacamba]:
+        """Lê todas as caçambas."""
+        raise NotImplementedError
+
+    def iterar(self) -> Iterator[Cacamba]:
+        """Percorre as caçambas uma a uma (por padrão, a partir da carga completa)."""
+        return iter(self.carregar())
+
+    def adicionar(self, cacamba: Cacamba) -> None:
+        """Grava uma nova caçamba."""
+        raise NotImplementedError
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> Optional[List[str]]:
+        """Grava várias caçambas novas.
+
+        Retorna os números efetivamente gravados, ou None quando todas foram.
+        """
+        for cacamba in cacambas:
+            self.adicionar(cacamba)
+        return None
+
+    def remover(self, numero: str) -> bool:
+        """Remove a caçamba informada."""
+        raise NotImplementedError
+
+    def existe(self, numero: str) -> bool:
+        """Consulta se a caçamba existe (apenas com consultas_indexadas)."""
+        raise NotImplementedError
+
+    def existentes(self, numeros: Set[str]) -> Set[str]:
+        """Consulta de uma vez quais dos números já existem (apenas com consultas_indexadas)."""
+        raise NotImplementedError
+
+    def listar_para_retirada(self, data_limite: datetime.date,
+                             limite: Optional[int] = None) -> List[Cacamba]:
+        """Consulta as caçambas colocadas até a data limite (apenas com consultas_indexadas)."""
+        raise NotImplementedError
+
+    def precisa_compactar(self) -> bool:
+        """Indica se há alterações pendentes de compactação."""
+        return False
+
+    def compactar(self, cacambas: List[Cacamba]) -> None:
+        """Consolida as alterações pendentes (nada a fazer por padrão)."""
+
+
+class ArmazenamentoXlsx(Armazenamento):
+    """Armazena as caçambas diretamente na planilha Excel.
+
+    Ao lado da planilha fica um snapshot binário (marshal) com as linhas já
+    interpretadas, marcado com o mtime, o tamanho e o SHA-256 da planilha.
+    Enquanto a marca confere, as leituras vêm do snapshot; se a planilha for
+    editada fora do aplicativo, ela é relida por completo e o snapshot refeito.
+    """
+
+    nome = 'xlsx'
+    SUFIXO_SNAPSHOT = '.snapshot'
+    # Alterar quando o conteúdo do snapshot mudar, para que ele seja refeito
+    VERSAO_SNAPSHOT = 1
+
+    def __init__(self, caminho: str):
+        """Inicializa o armazenamento para a planilha e seu snapshot."""
+        super().__init__(caminho)
+        self.caminho_snapshot = caminho + self.SUFIXO_SNAPSHOT
+
+    @staticmethod
+    def _hash_arquivo(caminho: str) -> str:
+        """SHA-256 do conteúdo do arquivo."""
+        resumo = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                resumo.update(bloco)
+        return resumo.hexdigest()
+
+    def _ler_snapshot(self) -> Optional[List[tuple]]:
+        """Retorna as linhas do snapshot, ou None se ele não existir ou não corresponder à planilha."""
+        try:
+            with open(self.caminho_snapshot, 'rb') as f:
+                versao, versao_marshal, mtime_ns, tamanho, hash_planilha, linhas = marshal.load(f)
+            info = os.stat(self.caminho)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        if versao != self.VERSAO_SNAPSHOT or versao_marshal != marshal.version:
+            return None
+
+        if (info.st_mtime_ns, info.st_size) != (mtime_ns, tamanho):
+            # A planilha foi tocada: só vale se o conteúdo for o mesmo (ex.: cópia do arquivo)
+            try:
+                if info.st_size != tamanho or self._hash_arquivo(self.caminho) != hash_planilha:
+                    return None
+            except OSError:
+                return None
+            self._gravar_snapshot(linhas)
+
+        Instrumentacao.registrar_bytes('snapshot', lidos=Instrumentacao.tamanho_arquivo(self.caminho_snapshot))
+        return linhas
+
+    def _gravar_snapshot(self, linhas: List[tuple]) -> None:
+        """Grava o snapshot das linhas, marcado com a versão atual da planilha."""
+        try:
+            info = os.stat(self.caminho)
+            dados = marshal.dumps((self.VERSAO_SNAPSHOT, marshal.version, info.st_mtime_ns,
+                                   info.st_size, self._hash_arquivo(self.caminho), linhas))
+            caminho_temp = self.caminho_snapshot + '.tmp'
+            with open(caminho_temp, 'wb') as f:
+                f.write(dados)
+            os.replace(caminho_temp, self.caminho_snapshot)
+            Instrumentacao.registrar_bytes('snapshot', gravados=len(dados))
+        except (OSError, ValueError) as e:
+            # Sem snapshot a próxima leitura apenas volta à planilha
+            print(Fore.YELLOW + f"Não foi possível gravar o snapshot {self.caminho_snapshot}: {e}")
+
+    @staticmethod
+    def _linha_para_cacamba(row: tuple) -> Cacamba:
+        """Converte uma linha da planilha em caçamba."""
+        if len(row) < len(COLUNAS_PLANILHA):
+            # No modo somente leitura as células vazias do fim da linha não são devolvidas
+            row = tuple(row) + (None,) * (len(COLUNAS_PLANILHA) - len(row))
+        return Cacamba(
+            numero=str(row[0]),
+            cep=str(row[1]),
+            adnumero=str(row[2]),
+            data_colocacao=str(row[3]),
+            rua=str(row[4]),
+            bairro=str(row[5]),
+            cidade=str(row[6]),
+            uf=str(row[7]),
+            latitude=row[8],
+            longitude=row[9]
+        )
+
+    @staticmethod
+    def _cacamba_para_linha(cacamba: Cacamba) -> list:
+        """Converte uma caçamba em linha da planilha."""
+        return [
+            cacamba.numero, 
+            cacamba.cep, 
+            cacamba.adnumero, 
+            cacamba.data_colocacao, 
+            cacamba.rua, 
+            cacamba.bairro, 
+            cacamba.cidade, 
+            cacamba.uf, 
+            cacamba.latitude, 
+            cacamba.longitude
+        ]
+
+    @staticmethod
+    def _salvar_planilha(wb: 'openpyxl.Workbook', caminho: str) -> None:
+        """Grava a planilha num arquivo temporário e o move sobre o original."""
+        caminho_temp = caminho + '.tmp'
+        wb.save(caminho_temp)
+        os.replace(caminho_temp, caminho)
+        Instrumentacao.registrar_bytes('planilha', gravados=Instrumentacao.tamanho_arquivo(caminho))
+
+    @staticmethod
+    def escrever_planilha(caminho: str, cacambas: List[Cacamba]) -> None:
+        """Grava uma planilha completa no layout padrão."""
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(COLUNAS_PLANILHA)
+        for cacamba in cacambas:
+            ws.append(ArmazenamentoXlsx._cacamba_para_linha(cacamba))
+        ArmazenamentoXlsx._salvar_planilha(wb, caminho)
+
+    @staticmethod
+    def ler_planilha(caminho: str) -> List[Cacamba]:
+        """Lê uma planilha completa no layout padrão, sem usar nem gravar snapshot."""
+        return list(ArmazenamentoXlsx(caminho)._iterar_planilha())
+
+    def carregar(self) -> List[Cacamba]:
+        """Lê todas as caçambas da planilha."""
+        return list(self.iterar())
+
+    def iterar(self) -> Iterator[Cacamba]:
+        """Percorre as caçambas do snapshot ou, se ele estiver desatualizado, da planilha.
+
+        Uma leitura completa da planilha refaz o snapshot.
+        """
+        linhas = self._ler_snapshot()
+        if linhas is not None:
+            for linha in linhas:
+                yield Cacamba(*linha)
+            return
+
+        linhas = []
+        for cacamba in self._iterar_planilha():
+            linhas.append(tuple(self._cacamba_para_linha(cacamba)))
+            yield cacamba
+        self._gravar_snapshot(linhas)
+
+    def _iterar_planilha(self) -> Iterator[Cacamba]:
+        """Lê a planilha em modo somente leitura, montando uma caçamba por vez.
+
+        O modo de edição (que cria todas as células em memória) fica restrito
+        às gravações. A planilha é fechada ao fim da leitura ou quando o
+        iterador é descartado antes do fim.
+        """
+        Instrumentacao.registrar_bytes('planilha', lidos=Instrumentacao.tamanho_arquivo(self.caminho))
+        wb = openpyxl.load_workbook(self.caminho, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            # A dimensão gravada por outros programas nem sempre cobre todas as linhas
+            ws.reset_dimensions()
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                if row and row[0]:  # Verifica se o número da caçamba existe
+                    yield self._linha_para_cacamba(row)
+        finally:
+            wb.close()
+
+    def adicionar(self, cacamba: Cacamba) -> None:
+        """Acrescenta uma caçamba ao final da planilha."""
+        self.adicionar_varias([cacamba])
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> None:
+        """Acrescenta as caçambas ao final da planilha com uma única gravação."""
+        linhas = self._ler_snapshot()
+        Instrumentacao.registrar_bytes('planilha', lidos=Instrumentacao.tamanho_arquivo(self.caminho))
+        wb = openpyxl.load_workbook(self.caminho)
+        ws = wb.active
+        for cacamba in cacambas:
+            ws.append(self._cacamba_para_linha(cacamba))
+        self._salvar_planilha(wb, self.caminho)
+
+        # O snapshot acompanha a gravação se correspondia à planilha antes dela
+        if linhas is not None:
+            self._gravar_snapshot(linhas + [tuple(self._cacamba_para_linha(c)) for c in cacambas])
+
+    def remover(self, numero: str) -> bool:
+        """Remove a linha da caçamba informada da planilha."""
+        linhas = self._ler_snapshot()
+        Instrumentacao.registrar_bytes('planilha', lidos=Instrumentacao.tamanho_arquivo(self.caminho))
+        wb = openpyxl.load_workbook(self.caminho)
+        ws = wb.active
+
+        linha_para_remover = None
+        for row in ws.iter_rows(min_row=2):
+            if str(row[0].value) == numero:
+                linha_para_remover = row[0].row
+                break
+
+        if linha_para_remover:
+            ws.delete_rows(linha_para_remover, 1)
+            self._salvar_planilha(wb, self.caminho)
+            if linhas is not None:
+                indice = next((i for i, linha in enumerate(linhas) if str(linha[0]) == numero), None)
+                if indice is not None:
+                    del linhas[indice]
+                    self._gravar_snapshot(linhas)
+            return True
+
+        return False
+
+
+class ArmazenamentoJournal(ArmazenamentoXlsx):
+    """Registra as alterações num log append-only e compacta na planilha."""
+
+    nome = 'journal'
+    SUFIXO_JOURNAL = '.journal.jsonl'
+    LIMITE_COMPACTACAO = 500  # Entradas no log antes de compactar automaticamente
+
+    def __init__(self, caminho: str):
+        """Inicializa o armazenamento para a planilha e seu log."""
+        super().__init__(caminho)
+        self.caminho_journal = caminho + self.SUFIXO_JOURNAL
+        self._entradas_pendentes = 0
+        # Números registrados na última leitura, válidos enquanto a assinatura não mudar
+        self._numeros: Optional[Set[str]] = None
+        self._assinatura_numeros: Optional[tuple] = None
+
+    def assinatura(self) -> Optional[tuple]:
+        """Identifica a versão atual da planilha e do log em disco."""
+        return (self._assinatura_arquivo(self.caminho),
+                self._assinatura_arquivo(self.caminho_journal))
+
+    @staticmethod
+    def _cacamba_para_dict(cacamba: Cacamba) -> Dict[str, Any]:
+        """Converte a caçamba nos campos gravados no log."""
+        return {f.name: getattr(cacamba, f.name) for f in fields(cacamba) if f.init}
+
+    def _ler_journal(self) -> List[Dict[str, Any]]:
+        """Lê as entradas do log, ignorando uma última linha incompleta."""
+        if not os.path.exists(self.caminho_journal):
+            return []
+
+        Instrumentacao.registrar_bytes('journal', lidos=Instrumentacao.tamanho_arquivo(self.caminho_journal))
+        entradas = []
+        with open(self.caminho_journal, 'r', encoding='utf-8') as f:
+            for numero_linha, linha in enumerate(f, start=1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    entradas.append(json.loads(linha))
+                except ValueError:
+                    # Gravação interrompida: a linha é descartada
+                    print(Fore.YELLOW + f"Linha {numero_linha} do journal ignorada (incompleta)")
+        return entradas
+
+    def _anexar(self, entradas: List[Dict[str, Any]]) -> None:
+        """Acrescenta entradas ao log e força sua gravação em disco."""
+        texto = ''.join(json.dumps(entrada, ensure_ascii=False) + '\n' for entrada in entradas)
+        with open(self.caminho_journal, 'a', encoding='utf-8') as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        Instrumentacao.registrar_bytes('journal', gravados=len(texto.encode('utf-8')))
+        self._entradas_pendentes += len(entradas)
+
+    def carregar(self) -> List[Cacamba]:
+        """Lê a planilha e reaplica as alterações registradas no log."""
+        cacambas = {c.numero: c for c in super().iterar()}
+
+        entradas = self._ler_journal()
+        for entrada in entradas:
+            if entrada.get('op') == 'adicionar':
+                cacamba = Cacamba(**entrada['cacamba'])
+                cacambas[cacamba.numero] = cacamba
+            elif entrada.get('op') == 'remover':
+                cacambas.pop(entrada['numero'], None)
+        self._entradas_pendentes = len(entradas)
+        self._guardar_numeros(set(cacambas))
+
+        return list(cacambas.values())
+
+    def _guardar_numeros(self, numeros: Optional[Set[str]]) -> None:
+        """Guarda os números registrados na versão atual da planilha e do log."""
+        self._numeros = numeros
+        self._assinatura_numeros = self.assinatura()
+
+    def _numeros_atuais(self) -> Optional[Set[str]]:
+        """Números guardados, se a planilha e o log não mudaram desde que foram lidos."""
+        if self._numeros is not None and self.assinatura() == self._assinatura_numeros:
+            return self._numeros
+        return None
+
+    def iterar(self) -> Iterator[Cacamba]:
+        """Percorre as caçambas já com o log reaplicado."""
+        # O log pode alterar qualquer linha da planilha, então a carga é completa
+        return iter(self.carregar())
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> None:
+        """Registra a inclusão das caçambas no log."""
+        numeros = self._numeros_atuais()
+        self._anexar([{'op': 'adicionar', 'cacamba': self._cacamba_para_dict(c)} for c in cacambas])
+        if numeros is not None:
+            self._guardar_numeros(numeros | {c.numero for c in cacambas})
+
+    def remover(self, numero: str) -> bool:
+        """Registra a remoção de uma caçamba no log, se ela estiver registrada."""
+        numeros = self._numeros_atuais()
+        if numeros is None:
+            self.carregar()
+            numeros = self._numeros
+        if numero not in numeros:
+            return False
+        self._anexar([{'op': 'remover', 'numero': numero}])
+        self._guardar_numeros(numeros - {numero})
+        return True
+
+    def precisa_compactar(self) -> bool:
+        """Indica se o log atingiu o limite de compactação automática."""
+        return self._entradas_pendentes >= self.LIMITE_COMPACTACAO
+
+    def compactar(self, cacambas: List[Cacamba]) -> None:
+        """Grava o estado completo na planilha e esvazia o log."""
+        if not os.path.exists(self.caminho_journal):
+            return
+
+        self.escrever_planilha(self.caminho, cacambas)
+        self._gravar_snapshot([tuple(self._cacamba_para_linha(c)) for c in cacambas])
+
+        # Se houver falha antes daqui, reaplicar o log é seguro (as operações são idempotentes)
+        os.remove(self.caminho_journal)
+        self._entradas_pendentes = 0
+        self._guardar_numeros({c.numero for c in cacambas})
+        print(Fore.GREEN + f"Journal compactado em {self.caminho}")
+
+
+class ArmazenamentoSqlite(Armazenamento):
+    """Armazena as caçambas num banco SQLite local ao lado da planilha."""
+
+    nome = 'sqlite'
+    consultas_indexadas = True
+    EXTENSAO_BANCO = '.sqlite3'
+    NUMEROS_POR_CONSULTA = 500  # Abaixo do limite de parâmetros por instrução do SQLite
+
+    def __init__(self, caminho: str):
+        """Inicializa o armazenamento, criando o banco e os índices se necessário."""
+        super().__init__(caminho)
+        self.caminho_banco = os.path.splitext(caminho)[0] + self.EXTENSAO_BANCO
+        self._conexao = None
+
+    def _conectar(self) -> sqlite3.Connection:
+        """Abre (uma única vez) a conexão com o banco."""
+        if self._conexao is None:
+            conexao = sqlite3.connect(self.caminho_banco, check_same_thread=False)
+            conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS cacambas (
+                    numero TEXT PRIMARY KEY,
+                    cep TEXT,
+                    adnumero TEXT,
+                    data_colocacao TEXT,
+                    rua TEXT,
+                    bairro TEXT,
+                    cidade TEXT,
+                    uf TEXT,
+                    latitude REAL,
+                    longitude REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_cacambas_cep ON cacambas (cep);
+                CREATE INDEX IF NOT EXISTS idx_cacambas_bairro ON cacambas (bairro);
+                CREATE INDEX IF NOT EXISTS idx_cacambas_data ON cacambas (data_colocacao);
+            """)
+            self._conexao = conexao
+        return self._conexao
+
+    @staticmethod
+    def _data_para_banco(cacamba: Cacamba) -> str:
+        """Converte a data para aaaa-mm-dd, que pode ser ordenado e indexado."""
+        if cacamba.data is None:
+            return cacamba.data_colocacao
+        return cacamba.data.isoformat()
+
+    @staticmethod
+    def _data_do_banco(data_colocacao: str) -> str:
+        """Converte aaaa-mm-dd de volta para dd/mm/aaaa."""
+        if len(data_colocacao) == 10 and data_colocacao[4] == '-' and data_colocacao[7] == '-':
+            return f"{data_colocacao[8:10]}/{data_colocacao[5:7]}/{data_colocacao[0:4]}"
+        return data_colocacao
+
+    def _registro_para_cacamba(self, registro: tuple) -> Cacamba:
+        """Converte um registro do banco em caçamba."""
+        return Cacamba(
+            numero=registro[0],
+            cep=registro[1],
+            adnumero=registro[2],
+            data_colocacao=self._data_do_banco(registro[3]),
+            rua=registro[4],
+            bairro=registro[5],
+            cidade=registro[6],
+            uf=registro[7],
+            latitude=registro[8],
+            longitude=registro[9]
+        )
+
+    def assinatura(self) -> Optional[tuple]:
+        """Identifica a versão atual do banco em disco."""
+        return self._assinatura_arquivo(self.caminho_banco)
+
+    def carregar(self) -> List[Cacamba]:
+        """Lê todas as caçambas na ordem de inclusão."""
+        return list(self.iterar())
+
+    def iterar(self) -> Iterator[Cacamba]:
+        """Percorre as caçambas na ordem de inclusão, lendo o cursor sob demanda."""
+        cursor = self._conectar().execute("SELECT * FROM cacambas ORDER BY rowid")
+        return (self._registro_para_cacamba(registro) for registro in cursor)
+
+    def adicionar(self, cacamba: Cacamba) -> None:
+        """Grava uma nova caçamba."""
+        self.adicionar_varias([cacamba])
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> None:
+        """Grava as caçambas numa única transação."""
+        with self._conectar() as conexao:
+            conexao.executemany(
+                "INSERT INTO cacambas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (c.numero, c.cep, c.adnumero, self._data_para_banco(c),
+                     c.rua, c.bairro, c.cidade, c.uf, c.latitude, c.longitude)
+                    for c in cacambas
+                ]
+            )
+
+    def remover(self, numero: str) -> bool:
+        """Remove a caçamba informada."""
+        with self._conectar() as conexao:
+            cursor = conexao.execute("DELETE FROM cacambas WHERE numero = ?", (numero,))
+        return cursor.rowcount > 0
+
+    def existe(self, numero: str) -> bool:
+        """Consulta a chave primária para saber se a caçamba existe."""
+        cursor = self._conectar().execute("SELECT 1 FROM cacambas WHERE numero = ?", (numero,))
+        return cursor.fetchone() is not None
+
+    def existentes(self, numeros: Set[str]) -> Set[str]:
+        """Consulta a chave primária em blocos de números."""
+        conexao = self._conectar()
+        pendentes = list(numeros)
+        encontrados = set()
+        for inicio in range(0, len(pendentes), self.NUMEROS_POR_CONSULTA):
+            bloco = pendentes[inicio:inicio + self.NUMEROS_POR_CONSULTA]
+            cursor = conexao.execute(
+                f"SELECT numero FROM cacambas WHERE numero IN ({','.join('?' * len(bloco))})", bloco
+            )
+            encontrados.update(numero for numero, in cursor)
+        return encontrados
+
+    def listar_para_retirada(self, data_limite: datetime.date,
+                             limite: Optional[int] = None) -> List[Cacamba]:
+        """Consulta pelo índice de data as caçambas colocadas até a data limite."""
+        cursor = self._conectar().execute(
+            "SELECT * FROM cacambas "
+            "WHERE data_colocacao <= ? AND data_colocacao GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' "
+            "ORDER BY rowid LIMIT ?",
+            (data_limite.strftime('%Y-%m-%d'), -1 if limite is None else limite)
+        )
+        return [self._registro_para_cacamba(registro) for registro in cursor]
+
+
+class ArmazenamentoRemoto(Armazenamento):
+    """Usa as caçambas mantidas em memória por um ServidorCacambas (modo cliente).
+
+    O caminho é a URL do servidor e a instância do servidor junto com a versão
+    dos dados serve de assinatura, então a cópia local só é relida quando outra
+    estação grava ou o servidor é reiniciado.
+    """
+
+    nome = 'remoto'
+    consultas_indexadas = True
+    INTERVALO_CONSULTA_VERSAO = 1.0  # Segundos em que a última versão consultada é reaproveitada
+
+    def __init__(self, caminho: str):
+        """Inicializa o armazenamento para a URL do servidor."""
+        super().__init__(caminho.rstrip('/'))
+        self._instancia: Optional[str] = None
+        self._versao: Optional[int] = None
+        self._consultada_em = 0.0
+        self._desatualizado = False
+
+    def _registrar_versao(self, resposta: Dict[str, Any]) -> None:
+        """Guarda a instância e a versão informadas pelo servidor."""
+        self._instancia = resposta['instancia']
+        self._versao = resposta['versao']
+        self._consultada_em = time.monotonic()
+
+    def assinatura(self) -> Optional[tuple]:
+        """Instância do servidor e versão atual dos dados nela."""
+        if self._desatualizado:
+            # Outra estação gravou junto com esta: uma assinatura nunca repetida força
+            # a releitura no próximo acesso, mesmo que esta estação grave antes dele
+            return (self.caminho, object())
+        if self._versao is None or time.monotonic() - self._consultada_em > self.INTERVALO_CONSULTA_VERSAO:
+            self._registrar_versao(ClienteHttp.obter_json(self.caminho + '/versao'))
+        return (self.caminho, self._instancia, self._versao)
+
+    def carregar(self) -> List[Cacamba]:
+        """Lê todas as caçambas do servidor."""
+        resposta = ClienteHttp.obter_json(self.caminho + '/cacambas')
+        self._registrar_versao(resposta)
+        self._desatualizado = False
+        return [Cacamba(**dados) for dados in resposta['cacambas']]
+
+    def _gravar(self, metodo: str, rota: str, corpo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Envia uma gravação e verifica se o servidor estava na versão conhecida."""
+        resposta = ClienteHttp.enviar_json(metodo, self.caminho + rota, corpo)
+        if resposta['instancia'] != self._instancia or resposta['versao_anterior'] != self._versao:
+            self._desatualizado = True
+        self._registrar_versao(resposta)
+        return resposta
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> Optional[List[str]]:
+        """Envia as caçambas novas ao servidor e retorna os números que ele aceitou."""
+        resposta = self._gravar('POST', '/cacambas', {
+            'cacambas': [ArmazenamentoJournal._cacamba_para_dict(c) for c in cacambas]
+        })
+        incluidas = resposta['incluidas']
+        recusadas = {c.numero for c in cacambas} - set(incluidas)
+        if recusadas:
+            self._desatualizado = True
+            print(Fore.YELLOW + f"Caçambas já registradas por outra estação: {', '.join(sorted(recusadas))}")
+        return incluidas
+
+    def remover(self, numero: str) -> bool:
+        """Remove a caçamba no servidor."""
+        return self._gravar('DELETE', '/cacambas?' + urlencode({'numero': numero}))['removida']
+
+    def existe(self, numero: str) -> bool:
+        """Consulta o servidor para saber se a caçamba existe."""
+        return ClienteHttp.obter_json(self.caminho + '/existe', params={'numero': numero})['existe']
+
+    def existentes(self, numeros: Set[str]) -> Set[str]:
+        """Consulta o servidor, numa única requisição, quais dos números já existem."""
+        resposta = ClienteHttp.enviar_json('POST', self.caminho + '/existentes', {'numeros': sorted(numeros)})
+        return set(resposta['existentes'])
+
+    def listar_para_retirada(self, data_limite: datetime.date,
+                             limite: Optional[int] = None) -> List[Cacamba]:
+        """Consulta no servidor as caçambas colocadas até a data limite."""
+        hoje = data_limite + datetime.timedelta(days=Cacamba.DIAS_PARA_RETIRADA)
+        params = {'hoje': hoje.isoformat()}
+        if limite is not None:
+            params['limite'] = str(limite)
+        resposta = ClienteHttp.obter_json(self.caminho + '/retirada', params=params)
+        return [Cacamba(**dados) for dados in resposta['cacambas']]
+
+
+class IndiceEspacial:
+    """Grade de células de latitude/longitude para consultas de proximidade.
+
+    Cada caçamba com coordenadas fica no balde da sua célula; as consultas
+    examinam apenas as células que podem conter pontos dentro do raio.
+    """
+
+    TAMANHO_CELULA_GRAUS = 0.01  # Cerca de 1,1 km de latitude
+    TAMANHO_BLOCO_CELULAS = 10  # Blocos de 10x10 células usados na busca dos mais próximos
+    RAIO_TERRA_KM = 6371.0088
+    # Mesmo raio da distância haversine, para que a janela de células cubra todo o raio
+    KM_POR_GRAU = RAIO_TERRA_KM * math.pi / 180
+
+    def __init__(self):
+        """Inicializa o índice vazio."""
+        self._celulas: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self._pontos: Dict[str, Tuple[Tuple[int, int], float, float]] = {}
+        self._blocos: Dict[Tuple[int, int], set] = {}  # Células ocupadas de cada bloco
+
+    def __len__(self) -> int:
+        """Quantidade de caçambas indexadas."""
+        return len(self._pontos)
+
+    def _celula(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Célula da grade que contém o ponto."""
+        return (math.floor(latitude / self.TAMANHO_CELULA_GRAUS),
+                math.floor(longitude / self.TAMANHO_CELULA_GRAUS))
+
+    def _bloco(self, celula: Tuple[int, int]) -> Tuple[int, int]:
+        """Bloco que contém a célula."""
+        return celula[0] // self.TAMANHO_BLOCO_CELULAS, celula[1] // self.TAMANHO_BLOCO_CELULAS
+
+    def _km_por_celula(self, latitude: float) -> float:
+        """Menor lado de uma célula (em km) até a latitude informada."""
+        cosseno = math.cos(math.radians(min(89.9, abs(latitude))))
+        return self.KM_POR_GRAU * self.TAMANHO_CELULA_GRAUS * max(cosseno, 1e-6)
+
+    @staticmethod
+    def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """Distância haversine entre dois pontos em graus."""
+        dlat = math.radians(lat2 - lat1)
+        dlon = math.radians(lon2 - lon1)
+        a = (math.sin(dlat / 2) ** 2
+             + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2)
+        return 2 * IndiceEspacial.RAIO_TERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+    def adicionar(self, cacamba: Cacamba) -> None:
+        """Inclui (ou reposiciona) a caçamba; caçambas sem coordenadas são ignoradas."""
+        self.remover(cacamba.numero)
+        if not (isinstance(cacamba.latitude, (int, float)) and isinstance(cacamba.longitude, (int, float))):
+            return
+        celula = self._celula(cacamba.latitude, cacamba.longitude)
+        if celula not in self._celulas:
+            self._celulas[celula] = {}
+            self._blocos.setdefault(self._bloco(celula), set()).add(celula)
+        self._celulas[celula][cacamba.numero] = (cacamba.latitude, cacamba.longitude)
+        self._pontos[cacamba.numero] = (celula, cacamba.latitude, cacamba.longitude)
+
+    def remover(self, numero: str) -> None:
+        """Retira a caçamba do índice, se estiver nele."""
+        ponto = self._pontos.pop(numero, None)
+        if ponto is None:
+            return
+        celula = ponto[0]
+        balde = self._celulas[celula]
+        del balde[numero]
+        if not balde:
+            del self._celulas[celula]
+            bloco = self._blocos[self._bloco(celula)]
+            bloco.discard(celula)
+            if not bloco:
+                del self._blocos[self._bloco(celula)]
+
+    def reconstruir(self, cacambas: Iterable[Cacamba]) -> None:
+        """Refaz o índice com as caçambas informadas."""
+        self._celulas = {}
+        self._pontos = {}
+        self._blocos = {}
+        for cacamba in cacambas:
+            self.adicionar(cacamba)
+
+    def _distancias(self, latitude: float, longitude: float,
+                    celulas: Iterable[Tuple[int, int]]) -> Iterator[Tuple[float, str]]:
+        """Distância até cada caçamba das células informadas."""
+        for celula in celulas:
+            for numero, (lat, lon) in self._celulas.get(celula, {}).items():
+                yield self.distancia_km(latitude, longitude, lat, lon), numero
+
+    def dentro_do_raio(self, latitude: float, longitude: float, raio_km: float) -> List[Tuple[float, str]]:
+        """Retorna (distância, número) das caçambas a até raio_km, da mais próxima à mais distante."""
+        passo_lat = math.ceil(raio_km / (self.KM_POR_GRAU * self.TAMANHO_CELULA_GRAUS))
+        passo_lon = math.ceil(raio_km / self._km_por_celula(abs(latitude) + raio_km / self.KM_POR_GRAU))
+        ci, cj = self._celula(latitude, longitude)
+
+        if (2 * passo_lat + 1) * (2 * passo_lon + 1) > len(self._celulas):
+            # Raio grande: é mais barato filtrar as células ocupadas do que percorrer a janela
+            celulas = [(i, j) for i, j in self._celulas
+                       if abs(i - ci) <= passo_lat and abs(j - cj) <= passo_lon]
+        else:
+            celulas = [(i, j) for i in range(ci - passo_lat, ci + passo_lat + 1)
+                       for j in range(cj - passo_lon, cj + passo_lon + 1)]
+
+        return sorted(item for item in self._distancias(latitude, longitude, celulas) if item[0] <= raio_km)
+
+    def _distancia_minima_retangulo(self, latitude: float, longitude: float,
+                                    i: int, j: int, celulas: int) -> float:
+        """Limite inferior da distância (km) entre o ponto e um retângulo de células."""
+        lat = min(max(latitude, i * self.TAMANHO_CELULA_GRAUS), (i + celulas) * self.TAMANHO_CELULA_GRAUS)
+        lon = min(max(longitude, j * self.TAMANHO_CELULA_GRAUS), (j + celulas) * self.TAMANHO_CELULA_GRAUS)
+        # Margem de 1% porque os paralelos não são geodésicas
+        return 0.99 * self.distancia_km(latitude, longitude, lat, lon)
+
+    def mais_proximas(self, latitude: float, longitude: float, k: int) -> List[Tuple[float, str]]:
+        """Retorna (distância, número) das k caçambas mais próximas, da mais próxima à mais distante.
+
+        Busca pela melhor estimativa: blocos, células e caçambas entram numa
+        min-heap pela menor distância possível até o ponto, e só são abertos
+        os blocos e células que ainda podem conter uma das k mais próximas.
+        """
+        if k <= 0 or not self._pontos:
+            return []
+
+        # Caminho rápido: as células vizinhas já bastam na maioria das consultas urbanas
+        ci, cj = self._celula(latitude, longitude)
+        vizinhas = heapq.nsmallest(k, self._distancias(
+            latitude, longitude,
+            [(i, j) for i in range(ci - 2, ci + 3) for j in range(cj - 2, cj + 3)]))
+        alcance = 0.99 * 2 * self._km_por_celula(abs(latitude) + 3 * self.TAMANHO_CELULA_GRAUS)
+        if len(vizinhas) == k and vizinhas[-1][0] <= alcance:
+            return vizinhas
+
+        tamanho = self.TAMANHO_BLOCO_CELULAS
+        # (distância mínima, tipo, chave); tipo 0 = bloco, 1 = célula, 2 = caçamba
+        fila = [
+            (self._distancia_minima_retangulo(latitude, longitude, bi * tamanho, bj * tamanho, tamanho), 0, (bi, bj))
+            for bi, bj in self._blocos
+        ]
+        heapq.heapify(fila)
+
+        resultado = []
+        while fila and len(resultado) < k:
+            distancia, tipo, chave = heapq.heappop(fila)
+            if tipo == 2:
+                resultado.append((distancia, chave))
+            elif tipo == 1:
+                for numero, (lat, lon) in self._celulas[chave].items():
+                    heapq.heappush(fila, (self.distancia_km(latitude, longitude, lat, lon), 2, numero))
+            else:
+                for i, j in self._blocos[chave]:
+                    heapq.heappush(fila, (self._distancia_minima_retangulo(latitude, longitude, i, j, 1), 1, (i, j)))
+        return resultado
+
+
+class RepositorioCacambas:
+    """Mantém as caçambas do armazenamento em memória, indexadas pelo número."""
+
+    # Versões únicas no processo, mesmo entre repositórios recriados
+    _contador_versoes = count(1)
+
+    def __init__(self, armazenamento: Armazenamento):
+        """Inicializa o repositório sobre o armazenamento informado."""
+        self.armazenamento = armazenamento
+        self._cacambas: Dict[str, Cacamba] = {}
+        self._assinatura: Optional[tuple] = None
+        self._carregado = False
+        self._versao = 0
+        # Índice de proximidade, mantido junto com a cópia em memória
+        self._indice = IndiceEspacial()
+        # Importações em lote gravam a partir de threads de trabalho
+        self._lock = threading.RLock()
+
+    @property
+    def caminho(self) -> str:
+        """Caminho da planilha de dados."""
+        return self.armazenamento.caminho
+
+    def _atualizado(self) -> bool:
+        """Verifica se a cópia em memória corresponde ao armazenamento."""
+        return self._carregado and self.armazenamento.assinatura() == self._assinatura
+
+    def _atualizar_se_necessario(self) -> None:
+        """Relê os dados somente se o armazenamento mudou desde a última leitura."""
+        assinatura = self.armazenamento.assinatura()
+        if self._carregado and assinatura == self._assinatura:
+            return
+
+        with Instrumentacao.medir('armazenamento.carregar'):
+            cacambas = self.armazenamento.carregar()
+        self._cacambas = {c.numero: c for c in cacambas}
+        self._indice.reconstruir(self._cacambas.values())
+        self._assinatura = assinatura
+        self._carregado = True
+        self._versao = next(self._contador_versoes)
+
+    def versao(self) -> int:
+        """Identifica o conteúdo atual; muda a cada releitura ou gravação."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return self._versao
+
+    def listar(self) -> List[Cacamba]:
+        """Retorna as caçambas na ordem do arquivo."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return list(self._cacambas.values())
+
+    def listar_com_versao(self) -> Tuple[int, List[Cacamba]]:
+        """Retorna a versão e as caçambas correspondentes, lidas de uma só vez."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return self._versao, list(self._cacambas.values())
+
+    def iterar(self) -> Iterator[Cacamba]:
+        """Percorre as caçambas na ordem do arquivo, permitindo parar no meio.
+
+        As caçambas são copiadas sob o lock e percorridas fora dele, de modo que
+        um iterador pausado não bloqueia as gravações de outras threads.
+        """
+        with self._lock:
+            self._atualizar_se_necessario()
+            cacambas = list(self._cacambas.values())
+        yield from cacambas
+
+    def obter(self, numero: str) -> Optional[Cacamba]:
+        """Retorna a caçamba com o número informado, se existir."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return self._cacambas.get(numero)
+
+    def contem(self, numero: str) -> bool:
+        """Verifica se existe uma caçamba com o número informado."""
+        with self._lock:
+            if self.armazenamento.consultas_indexadas and not self._atualizado():
+                return self.armazenamento.existe(numero)
+            self._atualizar_se_necessario()
+            return numero in self._cacambas
+
+    def existentes(self, numeros: Iterable[str]) -> Set[str]:
+        """Retorna, com uma única consulta, quais dos números já estão registrados."""
+        numeros = set(numeros)
+        with self._lock:
+            if not numeros:
+                return set()
+            if self.armazenamento.consultas_indexadas and not self._atualizado():
+                return self.armazenamento.existentes(numeros)
+            self._atualizar_se_necessario()
+            return {numero for numero in numeros if numero in self._cacambas}
+
+    def listar_para_retirada(self, hoje: datetime.date, limite: Optional[int] = None) -> List[Cacamba]:
+        """Retorna as caçambas que já atingiram o prazo de retirada (no máximo `limite`)."""
+        with self._lock:
+            if self.armazenamento.consultas_indexadas and not self._atualizado():
+                data_limite = hoje - datetime.timedelta(days=Cacamba.DIAS_PARA_RETIRADA)
+                return self.armazenamento.listar_para_retirada(data_limite, limite)
+            # Desatualizado, o armazenamento é lido em streaming; a leitura para
+            # assim que o limite é atingido
+            fonte = self._cacambas.values() if self._atualizado() else self.armazenamento.iterar()
+            return list(islice((c for c in fonte if c.precisa_retirada_em(hoje)), limite))
+
+    def adicionar(self, cacamba: Cacamba) -> bool:
+        """Grava uma nova caçamba, recusando números repetidos."""
+        return len(self.adicionar_varias([cacamba])) == 1
+
+    def adicionar_varias(self, cacambas: List[Cacamba]) -> List[Cacamba]:
+        """Grava as caçambas de uma vez, ignorando números repetidos, e retorna as gravadas."""
+        with self._lock:
+            existentes = self.existentes(cacamba.numero for cacamba in cacambas)
+            novas: Dict[str, Cacamba] = {}
+            for cacamba in cacambas:
+                if cacamba.numero not in novas and cacamba.numero not in existentes:
+                    novas[cacamba.numero] = cacamba
+            if not novas:
+                return []
+
+            with Instrumentacao.medir('armazenamento.adicionar'):
+                aceitas = self.armazenamento.adicionar_varias(list(novas.values()))
+            if aceitas is not None:
+                # Armazenamentos compartilhados podem recusar números gravados por outra estação
+                novas = {numero: novas[numero] for numero in aceitas if numero in novas}
+            if self._carregado:
+                self._cacambas.update(novas)
+                for cacamba in novas.values():
+                    self._indice.adicionar(cacamba)
+            self._apos_gravacao()
+            return list(novas.values())
+
+    def remover(self, numero: str) -> bool:
+        """Remove uma caçamba existente."""
+        with self._lock:
+            if not self.contem(numero):
+                return False
+
+            with Instrumentacao.medir('armazenamento.remover'):
+                removida = self.armazenamento.remover(numero)
+            if not removida:
+                return False
+            self._cacambas.pop(numero, None)
+            self._indice.remover(numero)
+            self._apos_gravacao()
+            return True
+
+    def proximas_no_raio(self, latitude: float, longitude: float,
+                         raio_km: float) -> List[Tuple[float, Cacamba]]:
+        """Retorna (distância em km, caçamba) das caçambas a até raio_km do ponto."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return [(distancia, self._cacambas[numero])
+                    for distancia, numero in self._indice.dentro_do_raio(latitude, longitude, raio_km)]
+
+    def mais_proximas(self, latitude: float, longitude: float, k: int) -> List[Tuple[float, Cacamba]]:
+        """Retorna (distância em km, caçamba) das k caçambas mais próximas do ponto."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            return [(distancia, self._cacambas[numero])
+                    for distancia, numero in self._indice.mais_proximas(latitude, longitude, k)]
+
+    def _apos_gravacao(self) -> None:
+        """Atualiza a assinatura e compacta o armazenamento quando necessário."""
+        self._versao = next(self._contador_versoes)
+        if self.armazenamento.precisa_compactar():
+            self.compactar()
+        if self._carregado:
+            self._assinatura = self.armazenamento.assinatura()
+
+    def compactar(self) -> None:
+        """Consolida as alterações pendentes do armazenamento."""
+        with self._lock:
+            self._atualizar_se_necessario()
+            with Instrumentacao.medir('armazenamento.compactar'):
+                self.armazenamento.compactar(list(self._cacambas.values()))
+            self._assinatura = self.armazenamento.assinatura()
+
+    def invalidar(self) -> None:
+        """Força a releitura do armazenamento no próximo acesso."""
+        self._carregado = False
+
+
+@dataclass
+class ConfiguracaoResolvida:
+    """Configuração de caminhos resolvida uma única vez por processo."""
+    caminho_arquivo: str
+    diretorio_base: str
+    armazenamento: str = ArmazenamentoXlsx.nome
+
+    @property
+    def diretorio_dados(self) -> str:
+        """Diretório onde fica o arquivo de dados (no modo cliente, o diretório base)."""
+        if self.armazenamento == ArmazenamentoRemoto.nome:
+            return self.diretorio_base
+        return os.path.dirname(os.path.abspath(self.caminho_arquivo))
+
+
+class GerenciadorArquivos:
+    """Classe para gerenciar operações de arquivo."""
+    
+    ARQUIVO_PADRAO = 'cacambas.xlsx'
+    ARQUIVO_CONFIG = 'config.json'
+
+    # Formatos de armazenamento disponíveis, selecionados pela chave 'armazenamento' do config.json
+    ARMAZENAMENTOS = {
+        ArmazenamentoXlsx.nome: ArmazenamentoXlsx,
+        ArmazenamentoJournal.nome: ArmazenamentoJournal,
+        ArmazenamentoSqlite.nome: ArmazenamentoSqlite,
+        ArmazenamentoRemoto.nome: ArmazenamentoRemoto,
+    }
+
+    # Configuração resolvida e repositório em memória compartilhados pelo processo
+    _configuracao: Optional[ConfiguracaoResolvida] = None
+    _arquivo_verificado = False
+    _repositorio: Optional[RepositorioCacambas] = None
+
+    @staticmethod
+    def obter_diretorio_base() -> str:
+        """Retorna o diretório do executável ou do script."""
+        # Usa o diretório do executável em vez do __file__
+        # para compatibilidade com auto-py-to-exe
+        if getattr(sys, 'frozen', False):
+            return os.path.dirname(sys.executable)
+        return os.path.dirname(os.path.abspath(__file__))
+
+    @staticmethod
+    def obter_configuracao() -> ConfiguracaoResolvida:
+        """Retorna a configuração resolvida, resolvendo-a apenas na primeira chamada."""
+        if GerenciadorArquivos._configuracao is None:
+            diretorio_base = GerenciadorArquivos.obter_diretorio_base()
+            config = GerenciadorArquivos._ler_arquivo_config(diretorio_base)
+            GerenciadorArquivos._configuracao = ConfiguracaoResolvida(
+                caminho_arquivo=GerenciadorArquivos._resolver_caminho_arquivo(config, diretorio_base),
+                diretorio_base=diretorio_base,
+                armazenamento=config.get('armazenamento', ArmazenamentoXlsx.nome)
+            )
+        return GerenciadorArquivos._configuracao
+
+    @staticmethod
+    def _ler_arquivo_config(diretorio_base: str) -> Dict[str, Any]:
+        """Lê o config.json do diretório informado, retornando {} se não existir."""
+        caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
+        try:
+            with open(caminho_config, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def invalidar_configuracao() -> None:
+        """Descarta a configuração resolvida para que seja lida novamente."""
+        GerenciadorArquivos._configuracao = None
+        GerenciadorArquivos._arquivo_verificado = False
+
+    @staticmethod
+    def usar_arquivo_dados(caminho: str, diretorio_base: str, armazenamento: str = ArmazenamentoXlsx.nome) -> None:
+        """Usa um arquivo de dados já existente neste processo, sem consultar nem gravar o config.json."""
+        GerenciadorArquivos._configuracao = ConfiguracaoResolvida(
+            caminho_arquivo=caminho,
+            diretorio_base=diretorio_base,
+            armazenamento=armazenamento
+        )
+        GerenciadorArquivos._arquivo_verificado = True
+        GerenciadorArquivos._repositorio = None
+
+    @staticmethod
+    def obter_caminho_arquivo() -> str:
+        """Retorna o caminho completo do arquivo de dados."""
+        return GerenciadorArquivos.obter_configuracao().caminho_arquivo
+    
+    @staticmethod
+    def _resolver_caminho_arquivo(config: Dict[str, Any], diretorio_base: str) -> str:
+        """Determina o caminho do arquivo de dados a partir do config.json já lido.
+
+        Não abre diálogos: se o local configurado não existir mais, o novo local é
+        pedido uma única vez em criar_arquivo_se_nao_existir.
+        """
+        caminho_arquivo = config.get('caminho_arquivo')
+        if caminho_arquivo:
+            return caminho_arquivo
+        # Caminho padrão se não houver configuração
+        return os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+    
+    @staticmethod
+    def solicitar_novo_caminho(diretorio_base=None) -> str:
+        """Solicita um novo caminho para o arquivo caso o anterior não exista mais."""
+        try:
+            from tkinter import filedialog, Tk
+            
+            root_temp = Tk()
+            root_temp.withdraw()
+            
+            messagebox.showinfo(
+                "Localização do Arquivo",
+                "O local anterior do arquivo não está mais disponível.\n"
+                "Por favor, escolha um novo local para o arquivo de dados."
+            )
+            
+            # Define o diretório inicial como o diretório do executável se não for especificado
+            if diretorio_base is None:
+                diretorio_base = GerenciadorArquivos.obter_diretorio_base()
+                    
+            caminho_arquivo = filedialog.asksaveasfilename(
+                title="Salvar arquivo de dados das caçambas",
+                defaultextension=".xlsx",
+                filetypes=[("Arquivo Excel", "*.xlsx")],
+                initialfile=GerenciadorArquivos.ARQUIVO_PADRAO,
+                initialdir=diretorio_base
+            )
+            
+            root_temp.destroy()
+            
+            if not caminho_arquivo:
+                caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+                print(Fore.YELLOW + "Usuário cancelou. Usando caminho padrão.")
+            
+            # Salva a nova configuração
+            GerenciadorArquivos.salvar_configuracao(caminho_arquivo, diretorio_base)
+            return caminho_arquivo
+            
+        except Exception as e:
+            print(Fore.RED + f"Erro ao solicitar novo caminho: {e}")
+            if diretorio_base is None:
+                diretorio_base = GerenciadorArquivos.obter_diretorio_base()
+            return os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+    
+    @staticmethod
+    def salvar_configuracao(caminho: str, diretorio_base=None, armazenamento: str = None) -> None:
+        """Salva o caminho do arquivo (e opcionalmente o armazenamento) na configuração."""
+        try:
+            # Define o diretório de base para salvar a configuração
+            if diretorio_base is None:
+                diretorio_base = GerenciadorArquivos.obter_diretorio_base()
+
+            # Preserva as demais chaves já configuradas
+            config = GerenciadorArquivos._ler_arquivo_config(diretorio_base)
+            config['caminho_arquivo'] = caminho
+            if armazenamento:
+                config['armazenamento'] = armazenamento
+                    
+            # Atualiza a configuração resolvida do processo
+            GerenciadorArquivos.invalidar_configuracao()
+            GerenciadorArquivos._configuracao = ConfiguracaoResolvida(
+                caminho_arquivo=caminho,
+                diretorio_base=diretorio_base,
+                armazenamento=config.get('armazenamento', ArmazenamentoXlsx.nome)
+            )
+                    
+            caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
+            print(Fore.CYAN + f"Salvando configuração em: {caminho_config}")
+            
+            with open(caminho_config, 'w') as f:
+                json.dump(config, f)
+            print(Fore.GREEN + f"Configuração salva em {caminho_config}")
+        except Exception as e:
+            print(Fore.RED + f"Erro ao salvar configuração: {e}")
+    
+    @staticmethod
+    @Instrumentacao.medido('arquivos.criar_arquivo_se_nao_existir')
+    def criar_arquivo_se_nao_existir() -> None:
+        """Cria o arquivo Excel se não existir."""
+        # A verificação é feita uma única vez por processo
+        if GerenciadorArquivos._arquivo_verificado:
+            return
+
+        diretorio_base = GerenciadorArquivos.obter_diretorio_base()
+        
+        caminho_config = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_CONFIG)
+        print(Fore.CYAN + f"Verificando existência de configuração em: {caminho_config}")
+        
+        # Verifica se é a primeira execução
+        primeira_execucao = not os.path.exists(caminho_config)
+        
+        if primeira_execucao:
+            print(Fore.CYAN + "Primeira execução detectada. Solicitando local para salvar arquivo de dados.")
+            try:
+                # Solicita ao usuário o caminho para salvar o arquivo
+                from tkinter import filedialog, Tk
+                
+                root_temp = Tk()
+                root_temp.withdraw()  # Esconde a janela principal
+                
+                messagebox.showinfo(
+                    "Configuração Inicial",
+                    "Bem-vindo ao Gerenciador de Caçambas!\n\n"
+                    "Este parece ser o primeiro uso do sistema.\n"
+                    "Por favor, escolha onde salvar o arquivo de dados das caçambas."
+                )
+                
+                caminho_arquivo = filedialog.asksaveasfilename(
+                    title="Salvar arquivo de dados das caçambas",
+                    defaultextension=".xlsx",
+                    filetypes=[("Arquivo Excel", "*.xlsx")],
+                    initialfile=GerenciadorArquivos.ARQUIVO_PADRAO,
+                    initialdir=diretorio_base
+                )
+                
+                root_temp.destroy()
+                
+                if not caminho_arquivo:
+                    print(Fore.YELLOW + "Usuário cancelou a seleção de caminho. Usando caminho padrão.")
+                    caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+                
+                # Salva a configuração
+                GerenciadorArquivos.salvar_configuracao(caminho_arquivo, diretorio_base)
+                
+            except Exception as e:
+                print(Fore.RED + f"Erro ao solicitar caminho do arquivo: {e}")
+                caminho_arquivo = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+        else:
+            configuracao = GerenciadorArquivos.obter_configuracao()
+            caminho_arquivo = configuracao.caminho_arquivo
+            if configuracao.armazenamento == ArmazenamentoRemoto.nome:
+                # No modo cliente os dados ficam no servidor
+                GerenciadorArquivos._arquivo_verificado = True
+                return
+            if os.path.isdir(os.path.dirname(os.path.abspath(caminho_arquivo))):
+                print(Fore.GREEN + f"Usando arquivo de dados em: {caminho_arquivo}")
+            else:
+                print(Fore.YELLOW + f"Caminho configurado não existe mais: {caminho_arquivo}")
+                # Se o diretório não existir mais, pergunta novamente
+                caminho_arquivo = GerenciadorArquivos.solicitar_novo_caminho(diretorio_base)
+                # Mesmo se a escolha não puder ser gravada, o processo passa a usar o novo caminho
+                GerenciadorArquivos._configuracao = replace(configuracao, caminho_arquivo=caminho_arquivo)
+        
+        # Cria o arquivo se não existir
+        if not os.path.exists(caminho_arquivo):
+            try:
+                wb = openpyxl.Workbook()
+                ws = wb.active
+                ws.append(COLUNAS_PLANILHA)
+                wb.save(caminho_arquivo)
+                print(Fore.GREEN + f"Arquivo {caminho_arquivo} criado com sucesso!")
+            except Exception as e:
+                print(Fore.RED + f"Erro ao criar o arquivo {caminho_arquivo}: {e}")
+                
+                # Se houver erro, tenta criar no local padrão
+                caminho_padrao = os.path.join(diretorio_base, GerenciadorArquivos.ARQUIVO_PADRAO)
+                try:
+                    wb = openpyxl.Workbook()
+                    ws = wb.active
+                    ws.append(COLUNAS_PLANILHA)
+                    wb.save(caminho_padrao)
+                    print(Fore.YELLOW + f"Arquivo criado no local padrão: {caminho_padrao}")
+                    GerenciadorArquivos.salvar_configuracao(caminho_padrao, diretorio_base)
+                except Exception as e2:
+                    print(Fore.RED + f"Erro ao criar o arquivo no local padrão: {e2}")
+
+        GerenciadorArquivos._arquivo_verificado = True
+    
+    @staticmethod
+    def obter_repositorio() -> RepositorioCacambas:
+        """Retorna o repositório em memória do arquivo de dados atual."""
+        configuracao = GerenciadorArquivos.obter_configuracao()
+        classe = GerenciadorArquivos.ARMAZENAMENTOS.get(configuracao.armazenamento)
+        if classe is None:
+            print(Fore.YELLOW + f"Armazenamento desconhecido: {configuracao.armazenamento}. Usando xlsx.")
+            classe = ArmazenamentoXlsx
+
+        repositorio = GerenciadorArquivos._repositorio
+        if (repositorio is None
+                or repositorio.caminho != configuracao.caminho_arquivo
+                or type(repositorio.armazenamento) is not classe):
+            repositorio = RepositorioCacambas(classe(configuracao.caminho_arquivo))
+            GerenciadorArquivos._repositorio = repositorio
+        return repositorio
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.carregar_cacambas')
+    def carregar_cacambas() -> List[Cacamba]:
+        """Carrega os dados das caçambas do arquivo Excel."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().listar()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+            return []
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.carregar_cacambas_com_versao')
+    def carregar_cacambas_com_versao() -> Tuple[int, List[Cacamba]]:
+        """Carrega as caçambas e a versão correspondente.
+
+        Ao contrário de carregar_cacambas, erros de leitura são propagados, para
+        que a interface possa manter a lista atual em vez de esvaziá-la.
+        """
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        return GerenciadorArquivos.obter_repositorio().listar_com_versao()
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.versao_cacambas')
+    def versao_cacambas() -> Optional[int]:
+        """Retorna a versão atual dos dados, ou None se não for possível lê-los."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().versao()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+            return None
+
+    @staticmethod
+    def iterar_cacambas() -> Iterator[Cacamba]:
+        """Percorre as caçambas do arquivo sem montar a lista completa."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            yield from GerenciadorArquivos.obter_repositorio().iterar()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.buscar_proximas')
+    def buscar_proximas(latitude: float, longitude: float, raio_km: float) -> List[Tuple[float, Cacamba]]:
+        """Busca as caçambas a até raio_km do ponto, da mais próxima à mais distante."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().proximas_no_raio(latitude, longitude, raio_km)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao buscar caçambas próximas: {e}")
+            return []
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.buscar_mais_proximas')
+    def buscar_mais_proximas(latitude: float, longitude: float, k: int) -> List[Tuple[float, Cacamba]]:
+        """Busca as k caçambas mais próximas do ponto."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().mais_proximas(latitude, longitude, k)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao buscar caçambas próximas: {e}")
+            return []
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.existe_cacamba')
+    def existe_cacamba(numero: str) -> bool:
+        """Verifica se uma caçamba já está registrada."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().contem(numero)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+            return False
+    
+    @staticmethod
+    @Instrumentacao.medido('arquivos.cacambas_existentes')
+    def cacambas_existentes(numeros: Iterable[str]) -> Set[str]:
+        """Verifica de uma vez quais dos números já estão registrados."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            return GerenciadorArquivos.obter_repositorio().existentes(numeros)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+            return set()
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.salvar_cacamba')
+    def salvar_cacamba(cacamba: Cacamba) -> bool:
+        """Salva uma nova caçamba no arquivo."""
+        try:
+            return GerenciadorArquivos.obter_repositorio().adicionar(cacamba)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao salvar caçamba: {e}")
+            return False
+    
+    @staticmethod
+    @Instrumentacao.medido('arquivos.salvar_cacambas')
+    def salvar_cacambas(cacambas: List[Cacamba]) -> List[Cacamba]:
+        """Salva várias caçambas novas com uma única gravação e retorna as que foram salvas."""
+        try:
+            return GerenciadorArquivos.obter_repositorio().adicionar_varias(cacambas)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao salvar caçambas: {e}")
+            return []
+    
+    @staticmethod
+    @Instrumentacao.medido('arquivos.remover_cacamba')
+    def remover_cacamba(numero: str) -> bool:
+        """Remove uma caçamba do arquivo pelo número."""
+        try:
+            return GerenciadorArquivos.obter_repositorio().remover(numero)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao remover caçamba: {e}")
+            return False
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.carregar_cacambas_para_retirada')
+    def carregar_cacambas_para_retirada(limite: Optional[int] = None) -> List[Cacamba]:
+        """Carrega as caçambas que já atingiram o prazo de retirada (no máximo `limite`)."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        try:
+            hoje = datetime.date.today()
+            return GerenciadorArquivos.obter_repositorio().listar_para_retirada(hoje, limite)
+        except Exception as e:
+            print(Fore.RED + f"Erro ao carregar dados: {e}")
+            return []
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.importar_planilha')
+    def importar_planilha(caminho_planilha: str) -> int:
+        """Importa as caçambas de uma planilha no layout padrão e retorna quantas foram incluídas."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        cacambas = ArmazenamentoXlsx.ler_planilha(caminho_planilha)
+        incluidas = GerenciadorArquivos.obter_repositorio().adicionar_varias(cacambas)
+        print(Fore.GREEN + f"{len(incluidas)} de {len(cacambas)} caçambas importadas de {caminho_planilha}")
+        return len(incluidas)
+
+    @staticmethod
+    @Instrumentacao.medido('arquivos.exportar_planilha')
+    def exportar_planilha(caminho_planilha: str) -> int:
+        """Exporta todas as caçambas para uma planilha no layout padrão e retorna quantas foram gravadas."""
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+        cacambas = GerenciadorArquivos.obter_repositorio().listar()
+        ArmazenamentoXlsx.escrever_planilha(caminho_planilha, cacambas)
+        print(Fore.GREEN + f"{len(cacambas)} caçambas exportadas para {caminho_planilha}")
+        return len(cacambas)
+
+    @staticmethod
+    def compactar_armazenamento() -> None:
+        """Consolida na planilha as alterações pendentes do armazenamento."""
+        repositorio = GerenciadorArquivos._repositorio
+        if repositorio is None:
+            return
+        try:
+            repositorio.compactar()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao compactar armazenamento: {e}")
+
+
+class CachePersistente:
+    """Cache chave/valor gravado em disco, com validade (TTL) e descarte LRU.
+
+    guardar() acumula os itens e regrava o arquivo no máximo a cada
+    INTERVALO_GRAVACAO segundos; guardar_varios() e gravar_pendentes()
+    gravam na hora.
+    """
+
+    AUSENTE = object()  # Retornado por obter() quando a chave não está no cache
+    INTERVALO_GRAVACAO = 30.0  # Segundos entre regravações do arquivo por guardar()
+
+    def __init__(self, caminho: str, ttl_segundos: float, capacidade: int,
+                 ttl_negativo_segundos: Optional[float] = None):
+        """Inicializa o cache; o arquivo só é lido no primeiro acesso."""
+        self.caminho = caminho
+        self.ttl_segundos = ttl_segundos
+        self.ttl_negativo_segundos = ttl_negativo_segundos or ttl_segundos
+        self.capacidade = capacidade
+        self._itens: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._carregado = False
+        self._pendente = False  # Itens guardados que ainda não foram gravados
+        self._gravado_em: Optional[float] = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @property
+    def taxa_acertos(self) -> float:
+        """Fração das consultas respondidas pelo cache."""
+        total = self.acertos + self.falhas
+        return self.acertos / total if total else 0.0
+
+    def _carregar(self) -> None:
+        """Lê o arquivo do cache, descartando itens vencidos."""
+        self._carregado = True
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+        Instrumentacao.registrar_bytes('cache', lidos=Instrumentacao.tamanho_arquivo(self.caminho))
+
+        agora = time.time()
+        for chave, (expira_em, valor) in dados.items():
+            if expira_em > agora:
+                self._itens[chave] = (expira_em, valor)
+
+    def _persistir(self) -> None:
+        """Grava o cache num arquivo temporário e o move sobre o original."""
+        self._pendente = False
+        self._gravado_em = time.monotonic()
+        try:
+            caminho_temp = self.caminho + '.tmp'
+            with open(caminho_temp, 'w', encoding='utf-8') as f:
+                json.dump(self._itens, f, ensure_ascii=False)
+            os.replace(caminho_temp, self.caminho)
+            Instrumentacao.registrar_bytes('cache', gravados=Instrumentacao.tamanho_arquivo(self.caminho))
+        except OSError as e:
+            print(Fore.RED + f"Erro ao gravar cache {self.caminho}: {e}")
+
+    def obter(self, chave: str) -> Any:
+        """Retorna o valor guardado (que pode ser None) ou AUSENTE."""
+        with self._lock:
+            if not self._carregado:
+                self._carregar()
+
+            item = self._itens.get(chave)
+            if item is not None and item[0] <= time.time():
+                del self._itens[chave]
+                item = None
+            if item is None:
+                self.falhas += 1
+                return self.AUSENTE
+
+            self.acertos += 1
+            self._itens.move_to_end(chave)
+            return item[1]
+
+    def guardar(self, chave: str, valor: Any) -> None:
+        """Guarda um valor; None é guardado como resultado negativo, com validade menor.
+
+        O arquivo só é regravado se a última gravação tiver mais de
+        INTERVALO_GRAVACAO segundos; até lá o item fica pendente.
+        """
+        with self._lock:
+            if self._incluir({chave: valor}, substituir=True):
+                self._pendente = True
+            if self._pendente and (self._gravado_em is None
+                                   or time.monotonic() - self._gravado_em >= self.INTERVALO_GRAVACAO):
+                self._persistir()
+
+    def guardar_varios(self, itens: Dict[str, Any], substituir: bool = True) -> None:
+        """Guarda vários valores com uma única gravação em disco (incluindo os pendentes)."""
+        with self._lock:
+            if self._incluir(itens, substituir) or self._pendente:
+                self._persistir()
+
+    def gravar_pendentes(self) -> None:
+        """Grava os itens guardados desde a última gravação, se houver."""
+        with self._lock:
+            if self._pendente:
+                self._persistir()
+
+    def _incluir(self, itens: Dict[str, Any], substituir: bool) -> bool:
+        """Inclui os itens em memória e retorna se algum foi alterado (chamado com o lock)."""
+        if not self._carregado:
+            self._carregar()
+
+        agora = time.time()
+        alterado = False
+        for chave, valor in itens.items():
+            if not substituir and chave in self._itens:
+                continue
+            ttl = self.ttl_negativo_segundos if valor is None else self.ttl_segundos
+            self._itens[chave] = (agora + ttl, valor)
+            self._itens.move_to_end(chave)
+            alterado = True
+
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+        return alterado
+
+
+class LimitadorTaxa:
+    """Token bucket que limita a frequência de requisições a um serviço."""
+
+    def __init__(self, taxa_por_segundo: float, capacidade: float = 1):
+        """Inicializa o limitador com a taxa e o tamanho de rajada permitidos."""
+        self.taxa_por_segundo = taxa_por_segundo
+        self.capacidade = capacidade
+        self._fichas = capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> float:
+        """Bloqueia até haver uma ficha disponível e retorna o tempo esperado."""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade,
+                               self._fichas + (agora - self._ultimo) * self.taxa_por_segundo)
+            self._ultimo = agora
+
+            # A ficha é reservada já aqui; quem chegar depois espera na fila
+            espera = max(0.0, (1 - self._fichas) / self.taxa_por_segundo)
+            self._fichas -= 1
+
+        if espera > 0:
+            time.sleep(espera)
+            Instrumentacao.registrar_tempo('espera.limitador_taxa', espera)
+        return espera
+
+
+class ClienteHttp:
+    """Sessão HTTP compartilhada, com pool de conexões, timeouts e novas tentativas."""
+
+    TIMEOUT = (3.05, 10)  # Segundos para conectar e para ler a resposta
+    MAX_TENTATIVAS = 4
+    ESPERA_INICIAL = 0.5  # Segundos antes da segunda tentativa; dobra a cada nova falha
+    ESPERA_MAXIMA = 8.0
+    STATUS_REPETIR = {429, 500, 502, 503, 504}
+    USER_AGENT = "Mozilla/5.0 (compatible; CacambaGerenciador/1.0)"
+
+    _sessao: Optional['requests.Session'] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def obter_sessao() -> 'requests.Session':
+        """Retorna a sessão compartilhada, criando-a no primeiro uso."""
+        with ClienteHttp._lock:
+            if ClienteHttp._sessao is None:
+                sessao = requests.Session()
+                adaptador = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                sessao.mount('https://', adaptador)
+                sessao.mount('http://', adaptador)
+                sessao.headers['User-Agent'] = ClienteHttp.USER_AGENT
+                ClienteHttp._sessao = sessao
+            return ClienteHttp._sessao
+
+    @staticmethod
+    def _espera_servidor(resposta: 'requests.Response') -> float:
+        """Lê o cabeçalho Retry-After (em segundos), se houver."""
+        try:
+            return float(resposta.headers.get('Retry-After', 0))
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def obter_json(url: str, params: Optional[Dict[str, str]] = None,
+                   limitador: Optional[LimitadorTaxa] = None) -> Any:
+        """Faz um GET e retorna o JSON, repetindo com espera exponencial em 429/5xx e falhas de rede."""
+        sessao = ClienteHttp.obter_sessao()
+        espera = ClienteHttp.ESPERA_INICIAL
+
+        for tentativa in range(1, ClienteHttp.MAX_TENTATIVAS + 1):
+            if limitador:
+                limitador.aguardar()
+
+            try:
+                resposta = sessao.get(url, params=params, timeout=ClienteHttp.TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                erro = e
+                espera_servidor = 0.0
+            else:
+                Instrumentacao.registrar_bytes('http', lidos=len(resposta.content))
+                if resposta.status_code not in ClienteHttp.STATUS_REPETIR:
+                    resposta.raise_for_status()
+                    return resposta.json()
+                erro = requests.HTTPError(f"HTTP {resposta.status_code}", response=resposta)
+                espera_servidor = ClienteHttp._espera_servidor(resposta)
+
+            if tentativa == ClienteHttp.MAX_TENTATIVAS:
+                raise erro
+
+            print(Fore.YELLOW + f"Falha ao acessar {url} ({erro}). Nova tentativa {tentativa + 1}...")
+            with Instrumentacao.medir('espera.nova_tentativa'):
+                time.sleep(min(max(espera, espera_servidor), ClienteHttp.ESPERA_MAXIMA))
+            espera *= 2
+
+    @staticmethod
+    def enviar_json(metodo: str, url: str, corpo: Optional[Dict[str, Any]] = None) -> Any:
+        """Envia uma requisição com corpo JSON e retorna o JSON da resposta.
+
+        Ao contrário de obter_json, não repete em caso de falha: uma gravação
+        repetida poderia ser aplicada duas vezes.
+        """
+        resposta = ClienteHttp.obter_sessao().request(metodo, url, json=corpo, timeout=ClienteHttp.TIMEOUT)
+        Instrumentacao.registrar_bytes('http', lidos=len(resposta.content))
+        resposta.raise_for_status()
+        return resposta.json()
+
+
+class CamadaDadosMapa:
+    """Camada do mapa que lê as caçambas de um arquivo de dados e o relê periodicamente.
+
+    Os arquivos são scripts que chamam window.receberCacambas(geojson) e
+    window.receberVersaoCacambas(versao): páginas abertas por file:// não podem
+    usar fetch(), mas podem incluir scripts. Só o pequeno arquivo de versão é
+    consultado periodicamente; os dados são relidos apenas quando ela muda.
+    Os dias no local são calculados na página, então os dados não mudam com
+    a virada do dia.
+
+    A classe usada no mapa também herda de MacroElement (branca) e é montada
+    em classe() na primeira geração, para que o folium só seja importado então.
+    """
+
+    TEXTO_TEMPLATE = """
+        {% macro script(this, kwargs) %}
+        (function () {
+            var mapa = {{ this._parent.get_name() }};
+            var grupo = {{ this.grupo.get_name() }};
+            var versaoAtual = null;
+            var enquadrado = false;
+            var marcadores = {};  // número -> {marcador, assinatura, propriedades, vencida}
+            var hoje = inicioDoDia(new Date());
+
+            function inicioDoDia(data) {
+                return new Date(data.getFullYear(), data.getMonth(), data.getDate());
+            }
+
+            function diasNoLocal(p) {
+                if (!p.data) {
+                    return 0;
+                }
+                var partes = p.data.split('-');
+                var colocacao = new Date(+partes[0], partes[1] - 1, +partes[2]);
+                // Arredonda para absorver as mudanças de horário de verão
+                return Math.round((hoje - colocacao) / 86400000);
+            }
+
+            function escapar(texto) {
+                var div = document.createElement('div');
+                div.textContent = texto;
+                return div.innerHTML;
+            }
+
+            function icone(vencida) {
+                return L.AwesomeMarkers.icon({
+                    icon: 'trash',
+                    markerColor: vencida ? 'red' : 'blue',
+                    prefix: 'glyphicon'
+                });
+            }
+
+            function atualizarIcone(item) {
+                var vencida = diasNoLocal(item.propriedades) >= {{ this.dias_para_retirada }};
+                if (vencida !== item.vencida) {
+                    item.vencida = vencida;
+                    item.marcador.setIcon(icone(vencida));
+                }
+            }
+
+            function criarItem(feicao) {
+                var p = feicao.properties;
+                var coordenadas = feicao.geometry.coordinates;
+                var marcador = L.marker(L.latLng(coordenadas[1], coordenadas[0]));
+                // O texto é montado ao abrir, para os dias no local estarem sempre em dia
+                marcador.bindPopup(function () {
+                    return '<b>Caçamba ' + escapar(p.numero) + '</b><br>' +
+                        'Endereço: ' + escapar(p.endereco) + '<br>' +
+                        'Data de colocação: ' + escapar(p.data_colocacao) + '<br>' +
+                        'Dias no local: ' + diasNoLocal(p);
+                }, {maxWidth: 300});
+                var item = {marcador: marcador, assinatura: JSON.stringify(feicao),
+                            propriedades: p, vencida: null};
+                atualizarIcone(item);
+                return item;
+            }
+
+            window.receberCacambas = function (dados) {
+                if (dados.versao === versaoAtual) {
+                    return;
+                }
+                versaoAtual = dados.versao;
+
+                // Só os marcadores incluídos, removidos ou alterados são trocados
+                var vistos = {};
+                var novos = [];
+                var removidos = [];
+                dados.features.forEach(function (feicao) {
+                    var numero = feicao.properties.numero;
+                    var item = marcadores[numero];
+                    vistos[numero] = true;
+                    if (item && item.assinatura === JSON.stringify(feicao)) {
+                        return;
+                    }
+                    if (item) {
+                        removidos.push(item.marcador);
+                    }
+                    item = criarItem(feicao);
+                    marcadores[numero] = item;
+                    novos.push(item.marcador);
+                });
+                Object.keys(marcadores).forEach(function (numero) {
+                    if (!vistos[numero]) {
+                        removidos.push(marcadores[numero].marcador);
+                        delete marcadores[numero];
+                    }
+                });
+                grupo.removeLayers(removidos);
+                grupo.addLayers(novos);
+
+                // Enquadra as caçambas só na primeira carga, para não desfazer o zoom do usuário
+                if (!enquadrado && grupo.getLayers().length) {
+                    mapa.fitBounds(grupo.getBounds(), {maxZoom: {{ this.zoom_maximo }}});
+                    enquadrado = true;
+                }
+            };
+
+            // Na virada do dia só trocam de cor os marcadores que atingiram o prazo
+            function verificarViradaDoDia() {
+                var agora = new Date();
+                var dia = inicioDoDia(agora);
+                if (dia.getTime() !== hoje.getTime()) {
+                    hoje = dia;
+                    Object.keys(marcadores).forEach(function (numero) {
+                        atualizarIcone(marcadores[numero]);
+                    });
+                }
+                var amanha = new Date(dia.getFullYear(), dia.getMonth(), dia.getDate() + 1);
+                setTimeout(verificarViradaDoDia, Math.min(amanha - agora + 1000, 3600000));
+            }
+
+            window.receberVersaoCacambas = function (versao) {
+                if (versao !== versaoAtual) {
+                    incluirScript({{ this.arquivo_script|tojson }});
+                }
+            };
+
+            function incluirScript(arquivo) {
+                var script = document.createElement('script');
+                script.src = arquivo + '?v=' + Date.now();
+                script.onload = script.onerror = function () { script.remove(); };
+                document.head.appendChild(script);
+            }
+
+            incluirScript({{ this.arquivo_script|tojson }});
+            setInterval(function () {
+                incluirScript({{ this.arquivo_versao|tojson }});
+            }, {{ this.intervalo_ms }});
+            verificarViradaDoDia();
+        })();
+        {% endmacro %}
+    """
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def classe() -> type:
+        """Monta a subclasse de MacroElement com o template compilado."""
+        from jinja2 import Template
+
+        return type('CamadaDadosMapa', (CamadaDadosMapa, elementos_branca.MacroElement),
+                    {'_template': Template(CamadaDadosMapa.TEXTO_TEMPLATE)})
+
+    @staticmethod
+    def criar(grupo: 'plugins_folium.MarkerCluster', arquivo_script: str, arquivo_versao: str,
+              intervalo_ms: int, zoom_maximo: int) -> 'CamadaDadosMapa':
+        """Cria a camada que preenche o grupo de marcadores informado."""
+        return CamadaDadosMapa.classe()(grupo, arquivo_script, arquivo_versao, intervalo_ms, zoom_maximo)
+
+    def __init__(self, grupo: 'plugins_folium.MarkerCluster', arquivo_script: str,
+                 arquivo_versao: str, intervalo_ms: int, zoom_maximo: int):
+        """Inicializa a camada que preenche o grupo de marcadores informado."""
+        super().__init__()
+        self._name = 'CamadaDadosMapa'
+        self.grupo = grupo
+        self.arquivo_script = arquivo_script
+        self.arquivo_versao = arquivo_versao
+        self.intervalo_ms = intervalo_ms
+        self.zoom_maximo = zoom_maximo
+        self.dias_para_retirada = Cacamba.DIAS_PARA_RETIRADA
+
+
+class ServicoLocalizacao:
+    """Classe para serviços de localização e geolocalização."""
+
+    URL_VIACEP = "https://viacep.com.br/ws/{cep}/json/"
+    URL_NOMINATIM = "https://nominatim.openstreetmap.org/search"
+
+    LIMITADOR_VIACEP = LimitadorTaxa(taxa_por_segundo=3, capacidade=3)
+    # O Nominatim permite no máximo uma requisição por segundo
+    LIMITADOR_NOMINATIM = LimitadorTaxa(taxa_por_segundo=1, capacidade=1)
+
+    ARQUIVO_CACHE_CEP = 'cache_cep.json'
+    TTL_CACHE_CEP = 30 * 24 * 3600  # Endereços de CEP raramente mudam
+    TTL_CACHE_CEP_INEXISTENTE = 24 * 3600
+    CAPACIDADE_CACHE_CEP = 5000
+
+    ARQUIVO_CACHE_COORDENADAS = 'cache_coordenadas.json'
+    TTL_CACHE_COORDENADAS = 180 * 24 * 3600
+    TTL_CACHE_COORDENADAS_INEXISTENTE = 24 * 3600
+    CAPACIDADE_CACHE_COORDENADAS = 20000
+
+    _cache_cep: Optional[CachePersistente] = None
+    _cache_coordenadas: Optional[CachePersistente] = None
+
+    ARQUIVO_MAPA = 'mapa_cacambas.html'
+    ARQUIVO_DADOS_MAPA = 'cacambas.geojson'
+    # Cópia dos dados que a página inclui como script (file:// não permite fetch)
+    ARQUIVO_SCRIPT_DADOS_MAPA = 'cacambas.geojson.js'
+    ARQUIVO_VERSAO_MAPA = 'cacambas.versao.js'  # Consultado periodicamente pela página
+    # Alterar quando a página mudar, para que ela seja regravada
+    VERSAO_PAGINA_MAPA = '2'
+    INTERVALO_ATUALIZACAO_MAPA_MS = 5000
+    # (arquivo do mapa, versão dos dados) da última geração; a virada do dia é
+    # tratada pela própria página, que recalcula a cor dos marcadores
+    _chave_mapa: Optional[tuple] = None
+
+    # Centro usado quando nenhuma caçamba tem coordenadas (Rio de Janeiro)
+    CENTRO_PADRAO_MAPA = [-22.9068, -43.1729]
+    ZOOM_MAXIMO_AJUSTE = 16  # Evita aproximar demais quando há uma só caçamba
+
+    @staticmethod
+    def normalizar_cep(cep: str) -> Optional[str]:
+        """Mantém apenas os dígitos do CEP; retorna None se não tiver 8 dígitos."""
+        digitos = ''.join(c for c in cep if c.isdigit())
+        return digitos if len(digitos) == 8 else None
+
+    @staticmethod
+    def invalidar_caches() -> None:
+        """Descarta os caches abertos e o mapa gerado, para que sejam recriados no diretório atual."""
+        ServicoLocalizacao.gravar_caches()
+        ServicoLocalizacao._cache_cep = None
+        ServicoLocalizacao._cache_coordenadas = None
+        ServicoLocalizacao._chave_mapa = None
+
+    @staticmethod
+    def gravar_caches() -> None:
+        """Grava em disco as consultas de CEP e de coordenadas ainda pendentes."""
+        for cache in (ServicoLocalizacao._cache_cep, ServicoLocalizacao._cache_coordenadas):
+            if cache is not None:
+                cache.gravar_pendentes()
+
+    @staticmethod
+    def obter_cache_cep() -> CachePersistente:
+        """Retorna o cache de CEPs, gravado junto ao arquivo de configuração."""
+        if ServicoLocalizacao._cache_cep is None:
+            diretorio = GerenciadorArquivos.obter_configuracao().diretorio_base
+            ServicoLocalizacao._cache_cep = CachePersistente(
+                os.path.join(diretorio, ServicoLocalizacao.ARQUIVO_CACHE_CEP),
+                ttl_segundos=ServicoLocalizacao.TTL_CACHE_CEP,
+                capacidade=ServicoLocalizacao.CAPACIDADE_CACHE_CEP,
+                ttl_negativo_segundos=ServicoLocalizacao.TTL_CACHE_CEP_INEXISTENTE
+            )
+            Instrumentacao.registrar_cache('cep', ServicoLocalizacao._cache_cep)
+        return ServicoLocalizacao._cache_cep
+    
+    @staticmethod
+    @Instrumentacao.medido('localizacao.obter_endereco_por_cep')
+    def obter_endereco_por_cep(cep: str) -> Optional[Dict[str, str]]:
+        """Obtém informações de endereço a partir do CEP usando a API ViaCEP."""
+        cep_normalizado = ServicoLocalizacao.normalizar_cep(cep)
+        if not cep_normalizado:
+            return None
+
+        cache = ServicoLocalizacao.obter_cache_cep()
+        endereco = cache.obter(cep_normalizado)
+        if endereco is not CachePersistente.AUSENTE:
+            return endereco
+
+        try:
+            with Instrumentacao.medir('http.viacep'):
+                resposta = ClienteHttp.obter_json(
+                    ServicoLocalizacao.URL_VIACEP.format(cep=cep_normalizado),
+                    limitador=ServicoLocalizacao.LIMITADOR_VIACEP
+                )
+            
+            if "erro" not in resposta:
+                endereco = {
+                    'rua': resposta["logradouro"],
+                    'bairro': resposta["bairro"],
+                    'cidade': resposta["localidade"],
+                    'uf': resposta["uf"]
+                }
+                cache.guardar(cep_normalizado, endereco)
+                return endereco
+
+            # CEP inexistente também é guardado, para não consultar novamente
+            cache.guardar(cep_normalizado, None)
+            return None
+        except Exception as e:
+            print(Fore.RED + f"Erro ao obter endereço pelo CEP: {e}")
+            return None
+
+    @staticmethod
+    def montar_endereco(rua: str, adnumero: str, bairro: str, cidade: str, uf: str) -> str:
+        """Monta o endereço completo usado na geolocalização."""
+        return f"{rua}, {adnumero}, {bairro}, {cidade}, {uf}, Brasil"
+
+    @staticmethod
+    def normalizar_endereco(endereco: str) -> str:
+        """Normaliza o endereço (sem acentos, minúsculo, espaços únicos) para uso como chave."""
+        sem_acentos = ''.join(
+            c for c in unicodedata.normalize('NFKD', endereco)
+            if not unicodedata.combining(c)
+        )
+        partes = [' '.join(parte.split()) for parte in sem_acentos.lower().split(',')]
+        return ', '.join(partes)
+
+    @staticmethod
+    def obter_cache_coordenadas() -> CachePersistente:
+        """Retorna o cache de coordenadas, aquecido com as coordenadas já registradas."""
+        if ServicoLocalizacao._cache_coordenadas is None:
+            diretorio = GerenciadorArquivos.obter_configuracao().diretorio_base
+            cache = CachePersistente(
+                os.path.join(diretorio, ServicoLocalizacao.ARQUIVO_CACHE_COORDENADAS),
+                ttl_segundos=ServicoLocalizacao.TTL_CACHE_COORDENADAS,
+                capacidade=ServicoLocalizacao.CAPACIDADE_CACHE_COORDENADAS,
+                ttl_negativo_segundos=ServicoLocalizacao.TTL_CACHE_COORDENADAS_INEXISTENTE
+            )
+            ServicoLocalizacao._cache_coordenadas = cache
+            Instrumentacao.registrar_cache('coordenadas', cache)
+            ServicoLocalizacao.aquecer_cache_coordenadas(GerenciadorArquivos.iterar_cacambas())
+        return ServicoLocalizacao._cache_coordenadas
+
+    @staticmethod
+    def aquecer_cache_coordenadas(cacambas: Iterable[Cacamba]) -> None:
+        """Inclui no cache as coordenadas já gravadas na planilha."""
+        itens = {}
+        for cacamba in cacambas:
+            if isinstance(cacamba.latitude, (int, float)) and isinstance(cacamba.longitude, (int, float)):
+                endereco = ServicoLocalizacao.montar_endereco(
+                    cacamba.rua, cacamba.adnumero, cacamba.bairro, cacamba.cidade, cacamba.uf
+                )
+                itens[ServicoLocalizacao.normalizar_endereco(endereco)] = [cacamba.latitude, cacamba.longitude]
+        if itens:
+            ServicoLocalizacao.obter_cache_coordenadas().guardar_varios(itens, substituir=False)
+
+    @staticmethod
+    @Instrumentacao.medido('localizacao.obter_coordenadas')
+    def obter_coordenadas(endereco: str) -> Optional[Tuple[float, float]]:
+        """Obtém as coordenadas geográficas a partir do endereço usando a API Nominatim."""
+        chave = ServicoLocalizacao.normalizar_endereco(endereco)
+        cache = ServicoLocalizacao.obter_cache_coordenadas()
+        coordenadas = cache.obter(chave)
+        if coordenadas is not CachePersistente.AUSENTE:
+            return tuple(coordenadas) if coordenadas else None
+
+        try:
+            with Instrumentacao.medir('http.nominatim'):
+                resposta = ClienteHttp.obter_json(
+                    ServicoLocalizacao.URL_NOMINATIM,
+                    params={"q": endereco, "format": "json"},
+                    limitador=ServicoLocalizacao.LIMITADOR_NOMINATIM
+                )
     
             if resposta:
                 latitude = float(resposta[0]["lat"])
                 longitude = float(resposta[0]["lon"])
+                cache.guardar(chave, [latitude, longitude])
                 return latitude, longitude
+
+            # Endereço não encontrado também é guardado, com validade menor
+            cache.guardar(chave, None)
             return None
         except Exception as e:
             print(Fore.RED + f"Erro ao obter coordenadas: {e}")
             return None
     
     @staticmethod
-    def gerar_mapa(cacambas: List[Cacamba]) -> None:
-        """Gera um mapa interativo com as localizações das caçambas."""
-        try:
-            # Localização inicial do mapa (Brasil)
-            mapa = folium.Map(location=[-22.9068, -43.1729], zoom_start=12)
-            
-            for cacamba in cacambas:
-                if cacamba.latitude and cacamba.longitude:
-                    # Cor do marcador baseada no tempo no local
-                    cor = 'red' if cacamba.precisa_retirada else 'blue'
-                    
-                    # Texto com informações da caçamba
-                    popup_text = f"""
-                        <b>Caçamba {cacamba.numero}</b><br>
-                        Endereço: {cacamba.endereco_completo}<br>
-                        Data de colocação: {cacamba.data_colocacao}<br>
-                        Dias no local: {cacamba.dias_no_local}
-                    """
-                    
-                    folium.Marker(
-                        location=[cacamba.latitude, cacamba.longitude],
-                        popup=folium.Popup(popup_text, max_width=300),
-                        icon=folium.Icon(color=cor, icon='trash')
-                    ).add_to(mapa)
-            
-            # Obter o diretório do arquivo de dados para salvar o mapa no mesmo local
-            diretorio_dados = os.path.dirname(GerenciadorArquivos.obter_caminho_arquivo())
-            arquivo_mapa = os.path.join(diretorio_dados, 'mapa_cacambas.html')
-            
-            mapa.save(arquivo_mapa)
-            print(Fore.GREEN + f"Mapa interativo salvo como '{arquivo_mapa}'")
-            return arquivo_mapa
-        except Exception as e:
-            print(Fore.RED + f"Erro ao gerar mapa: {e}")
-            return None
+    def _gravar_se_mudou(caminho: str, conteudo: str) -> bool:
+        """Grava o arquivo de forma atômica apenas se o conteúdo mudou."""
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                if f.read() == conteudo:
+                    return False
+        except OSError:
+            pass
+
+        caminho_temp = caminho + '.tmp'
+        with open(caminho_temp, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+        os.replace(caminho_temp, caminho)
+        Instrumentacao.registrar_bytes('mapa', gravados=Instrumentacao.tamanho_arquivo(caminho))
+        return True
+
+    @staticmethod
+    def montar_geojson(cacambas: Iterable[Cacamba]) -> Dict[str, Any]:
+        """Monta a FeatureCollection das caçambas com coordenadas."""
+        feicoes = [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [cacamba.longitude, cacamba.latitude]},
+                'properties': {
+                    'numero': cacamba.numero,
+                    'endereco': cacamba.endereco_completo,
+                    'data_colocacao': cacamba.data_colocacao,
+                    'data': cacamba.data.isoformat() if cacamba.data else None,
+                },
+            }
+            for cacamba in cacambas
+            if cacamba.latitude and cacamba.longitude
+        ]
+        texto = json.dumps(feicoes, ensure_ascii=False, separators=(',', ':'))
+        # A página só redesenha os marcadores quando a versão muda
+        versao = hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+        return {'type': 'FeatureCollection', 'versao': versao, 'features': feicoes}
+
+    @staticmethod
+    @Instrumentacao.medido('localizacao.escrever_pagina_mapa')
+    def escrever_pagina_mapa(arquivo_mapa: str) -> bool:
+        """Grava a página do mapa se ela não existir ou for de outra versão."""
+        marcador_versao = f'<meta name="versao-pagina-mapa" content="{ServicoLocalizacao.VERSAO_PAGINA_MAPA}">'
+        try:
+            with open(arquivo_mapa, 'r', encoding='utf-8') as f:
+                if marcador_versao in f.read():
+                    return False
+        except OSError:
+            pass
+
+        mapa = folium.Map(location=ServicoLocalizacao.CENTRO_PADRAO_MAPA, zoom_start=12)
+        mapa.get_root().header.add_child(elementos_branca.Element(marcador_versao))
+        grupo = plugins_folium.MarkerCluster().add_to(mapa)
+        mapa.add_child(CamadaDadosMapa.criar(
+            grupo,
+            ServicoLocalizacao.ARQUIVO_SCRIPT_DADOS_MAPA,
+            ServicoLocalizacao.ARQUIVO_VERSAO_MAPA,
+            ServicoLocalizacao.INTERVALO_ATUALIZACAO_MAPA_MS,
+            ServicoLocalizacao.ZOOM_MAXIMO_AJUSTE
+        ))
+        ServicoLocalizacao._gravar_se_mudou(arquivo_mapa, mapa.get_root().render())
+        print(Fore.GREEN + f"Página do mapa gravada em '{arquivo_mapa}'")
+        return True
+
+    @staticmethod
+    @Instrumentacao.medido('localizacao.escrever_dados_mapa')
+    def escrever_dados_mapa(diretorio: str, cacambas: Iterable[Cacamba]) -> bool:
+        """Regrava o GeoJSON das caçambas, sua cópia em script e a versão se os dados mudaram."""
+        geojson = ServicoLocalizacao.montar_geojson(cacambas)
+        texto = json.dumps(geojson, ensure_ascii=False, separators=(',', ':'))
+        alterado = ServicoLocalizacao._gravar_se_mudou(
+            os.path.join(diretorio, ServicoLocalizacao.ARQUIVO_DADOS_MAPA), texto
+        )
+        ServicoLocalizacao._gravar_se_mudou(
+            os.path.join(diretorio, ServicoLocalizacao.ARQUIVO_SCRIPT_DADOS_MAPA),
+            f"window.receberCacambas({texto});\n"
+        )
+        # A versão é gravada por último, para a página nunca vê-la antes dos dados
+        ServicoLocalizacao._gravar_se_mudou(
+            os.path.join(diretorio, ServicoLocalizacao.ARQUIVO_VERSAO_MAPA),
+            f"window.receberVersaoCacambas({json.dumps(geojson['versao'])});\n"
+        )
+        return alterado
+
+    @staticmethod
+    @Instrumentacao.medido('localizacao.gerar_mapa')
+    def gerar_mapa(cacambas: Iterable[Cacamba], versao: Optional[int] = None) -> Optional[str]:
+        """Atualiza o mapa interativo: a página é gravada uma vez e só os dados são regravados.
+
+        Se a versão dos dados for a mesma da última geração, os arquivos
+        existentes são reaproveitados sem percorrer as caçambas.
+        """
+        try:
+            inicio = time.perf_counter()
+
+            # Obter o diretório do arquivo de dados para salvar o mapa no mesmo local
+            diretorio_dados = GerenciadorArquivos.obter_configuracao().diretorio_dados
+            arquivo_mapa = os.path.join(diretorio_dados, ServicoLocalizacao.ARQUIVO_MAPA)
+
+            chave = None if versao is None else (arquivo_mapa, versao)
+            if (chave is not None and chave == ServicoLocalizacao._chave_mapa
+                    and os.path.exists(arquivo_mapa)
+                    and os.path.exists(os.path.join(diretorio_dados, ServicoLocalizacao.ARQUIVO_SCRIPT_DADOS_MAPA))):
+                print(Fore.CYAN + "Mapa sem alterações; reaproveitando os arquivos existentes")
+                return arquivo_mapa
+
+            ServicoLocalizacao.escrever_pagina_mapa(arquivo_mapa)
+            alterado = ServicoLocalizacao.escrever_dados_mapa(diretorio_dados, cacambas)
+            ServicoLocalizacao._chave_mapa = chave
+
+            duracao = time.perf_counter() - inicio
+            if alterado:
+                print(Fore.GREEN + f"Dados do mapa atualizados em {duracao:.2f}s")
+            else:
+                print(Fore.CYAN + f"Dados do mapa sem alterações ({duracao:.2f}s)")
+            return arquivo_mapa
+        except Exception as e:
+            print(Fore.RED + f"Erro ao gerar mapa: {e}")
+            return None
+
+
+class ProcessadorDatas:
+    """Classe para processar formatos de data."""
+    
+    @staticmethod
+    def validar_e_formatar_data(data_texto: str) -> Optional[str]:
+        """Valida e formata uma data em diversos formatos."""
+        try:
+            # Verifica caracteres permitidos
+            if not all(c.isdigit() or c == '/' for c in data_texto):
+                return None
+                
+            data_dt = None
+            # Verifica formato com barras
+            if '/' in data_texto and data_texto.count('/') == 2:
+                partes = data_texto.split('/')
+                if len(partes[2]) == 2:  # dd/mm/yy
+                    data_dt = datetime.datetime.strptime(data_texto, '%d/%m/%y')
+                else:  # dd/mm/yyyy
+                    data_dt = datetime.datetime.strptime(data_texto, '%d/%m/%Y')
+            # Formato sem barras
+            elif data_texto.isdigit():
+                if len(data_texto) == 6:  # ddmmyy
+                    data_dt = datetime.datetime.strptime(data_texto, '%d%m%y')
+                elif len(data_texto) == 8:  # ddmmyyyy
+                    data_dt = datetime.datetime.strptime(data_texto, '%d%m%Y')
+                else:
+                    return None
+            else:
+                return None
+                
+            # Formata para padrão dd/mm/yyyy
+            return data_dt.strftime('%d/%m/%Y')
+        except ValueError:
+            return None
+
+
+@dataclass
+class ErroImportacao:
+    """Linha de um lote que não pôde ser importada."""
+    linha: int
+    numero: str
+    motivo: str
+
+
+@dataclass
+class ResultadoImportacao:
+    """Resultado da importação de um lote de caçambas."""
+    importadas: List[Cacamba]
+    erros: List[ErroImportacao]
+    arquivo_erros: Optional[str] = None
+    cancelada: bool = False
+
+
+class ImportadorLote:
+    """Importa de uma vez as caçambas de um arquivo CSV ou xlsx."""
+
+    # Colunas esperadas, nesta ordem: número, CEP, número do endereço e data de colocação
+    COLUNAS = ['numero', 'cep', 'adnumero', 'data']
+    MAX_CONSULTAS_CEP = 4  # Consultas ao ViaCEP em paralelo
+
+    @staticmethod
+    def _texto_celula(valor: Any) -> str:
+        """Converte o valor de uma célula em texto, sem o '.0' de números inteiros."""
+        if valor is None:
+            return ''
+        if isinstance(valor, datetime.datetime):
+            return valor.strftime('%d/%m/%Y')
+        if isinstance(valor, float) and valor.is_integer():
+            return str(int(valor))
+        return str(valor).strip()
+
+    @staticmethod
+    def ler_linhas(caminho: str) -> List[Tuple[int, List[str]]]:
+        """Lê as linhas do arquivo como (número da linha, valores), ignorando o cabeçalho."""
+        if caminho.lower().endswith('.xlsx'):
+            wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+            try:
+                linhas = [
+                    (indice, [ImportadorLote._texto_celula(v) for v in row[:4]])
+                    for indice, row in enumerate(wb.active.iter_rows(values_only=True), start=1)
+                ]
+            finally:
+                wb.close()
+        else:
+            with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+                amostra = f.read(4096)
+                f.seek(0)
+                # Planilhas brasileiras costumam exportar CSV separado por ';'
+                delimitador = ';' if amostra.count(';') > amostra.count(',') else ','
+                linhas = [
+                    (indice, [v.strip() for v in row[:4]])
+                    for indice, row in enumerate(csv.reader(f, delimiter=delimitador), start=1)
+                ]
+
+        linhas = [(indice, valores + [''] * (4 - len(valores)))
+                  for indice, valores in linhas if any(valores)]
+        if linhas and not ImportadorLote._texto_celula(linhas[0][1][1]).replace('-', '').isdigit():
+            linhas = linhas[1:]  # Primeira linha é cabeçalho
+        return linhas
+
+    @staticmethod
+    def _salvar_relatorio(caminho: str, erros: List[ErroImportacao]) -> Optional[str]:
+        """Grava o relatório de erros ao lado do arquivo importado."""
+        caminho_relatorio = os.path.splitext(caminho)[0] + '_erros.csv'
+        try:
+            with open(caminho_relatorio, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(['linha', 'numero', 'motivo'])
+                for erro in erros:
+                    writer.writerow([erro.linha, erro.numero, erro.motivo])
+            return caminho_relatorio
+        except OSError as e:
+            print(Fore.RED + f"Erro ao gravar relatório de importação: {e}")
+            return None
+
+    @staticmethod
+    def _cancelar(futuras: List[Future]) -> None:
+        """Cancela as consultas que ainda não começaram."""
+        for futura in futuras:
+            futura.cancel()
+        print(Fore.YELLOW + "Importação cancelada.")
+
+    @staticmethod
+    def importar(caminho: str, ao_progredir: Optional[Callable[[int, int], None]] = None,
+                 cancelado: Optional[threading.Event] = None) -> ResultadoImportacao:
+        """Valida, localiza e grava todas as caçambas do arquivo com uma única gravação."""
+        try:
+            return ImportadorLote._importar(caminho, ao_progredir, cancelado)
+        finally:
+            # As consultas do lote vão para os caches em disco numa única gravação
+            ServicoLocalizacao.gravar_caches()
+
+    @staticmethod
+    def _importar(caminho: str, ao_progredir: Optional[Callable[[int, int], None]],
+                  cancelado: Optional[threading.Event]) -> ResultadoImportacao:
+        """Corpo de importar(), sem a gravação final dos caches."""
+        erros: List[ErroImportacao] = []
+        validas = []
+        numeros_vistos = set()
+
+        linhas = ImportadorLote.ler_linhas(caminho)
+        # Uma única consulta para todo o lote, em vez de uma por linha
+        registradas = GerenciadorArquivos.cacambas_existentes(valores[0] for _, valores in linhas if valores[0])
+        for indice, (numero, cep, adnumero, data_texto) in linhas:
+            cep_normalizado = ServicoLocalizacao.normalizar_cep(cep)
+            data_formatada = ProcessadorDatas.validar_e_formatar_data(data_texto)
+            if not numero:
+                erros.append(ErroImportacao(indice, numero, "Número da caçamba vazio"))
+            elif numero in numeros_vistos:
+                erros.append(ErroImportacao(indice, numero, "Número repetido no arquivo"))
+            elif numero in registradas:
+                erros.append(ErroImportacao(indice, numero, "Caçamba já registrada"))
+            elif not cep_normalizado:
+                erros.append(ErroImportacao(indice, numero, f"CEP inválido: {cep}"))
+            elif not adnumero:
+                erros.append(ErroImportacao(indice, numero, "Número do endereço vazio"))
+            elif not data_formatada:
+                erros.append(ErroImportacao(indice, numero, f"Data inválida: {data_texto}"))
+            else:
+                validas.append((indice, numero, cep_normalizado, adnumero, data_formatada))
+            numeros_vistos.add(numero)
+
+        # Os caches são preparados aqui para não serem criados dentro das threads
+        ServicoLocalizacao.obter_cache_cep()
+        ServicoLocalizacao.obter_cache_coordenadas()
+
+        # Cada CEP e cada endereço distintos são consultados uma única vez
+        enderecos_por_cep: Dict[str, Optional[Dict[str, str]]] = {}
+        coordenadas_futuras: Dict[str, Future] = {}
+        total_consultas = len({linha[2] for linha in validas})
+        concluidas = 0
+
+        # O geocodificador tem um único trabalhador: as consultas formam uma fila
+        # que respeita o limite do Nominatim enquanto os CEPs são resolvidos em paralelo
+        with ThreadPoolExecutor(max_workers=ImportadorLote.MAX_CONSULTAS_CEP) as executor_cep, \
+                ThreadPoolExecutor(max_workers=1) as executor_geo:
+            futuras_cep = {
+                executor_cep.submit(ServicoLocalizacao.obter_endereco_por_cep, cep): cep
+                for cep in {linha[2] for linha in validas}
+            }
+            for futura in as_completed(futuras_cep):
+                if cancelado is not None and cancelado.is_set():
+                    ImportadorLote._cancelar(list(futuras_cep) + list(coordenadas_futuras.values()))
+                    return ResultadoImportacao(importadas=[], erros=erros, cancelada=True)
+
+                cep = futuras_cep[futura]
+                endereco = futura.result()
+                enderecos_por_cep[cep] = endereco
+                concluidas += 1
+                if ao_progredir:
+                    ao_progredir(concluidas, total_consultas)
+                if not endereco:
+                    continue
+
+                for _, _, cep_linha, adnumero, _ in validas:
+                    if cep_linha != cep:
+                        continue
+                    endereco_completo = ServicoLocalizacao.montar_endereco(
+                        endereco['rua'], adnumero, endereco['bairro'], endereco['cidade'], endereco['uf']
+                    )
+                    chave = ServicoLocalizacao.normalizar_endereco(endereco_completo)
+                    if chave not in coordenadas_futuras:
+                        coordenadas_futuras[chave] = executor_geo.submit(
+                            ServicoLocalizacao.obter_coordenadas, endereco_completo
+                        )
+
+            novas = []
+            for indice, numero, cep, adnumero, data_formatada in validas:
+                if cancelado is not None and cancelado.is_set():
+                    ImportadorLote._cancelar(list(coordenadas_futuras.values()))
+                    return ResultadoImportacao(importadas=[], erros=erros, cancelada=True)
+
+                endereco = enderecos_por_cep.get(cep)
+                if not endereco:
+                    erros.append(ErroImportacao(indice, numero, f"CEP não encontrado: {cep}"))
+                    continue
+
+                endereco_completo = ServicoLocalizacao.montar_endereco(
+                    endereco['rua'], adnumero, endereco['bairro'], endereco['cidade'], endereco['uf']
+                )
+                coordenadas = coordenadas_futuras[ServicoLocalizacao.normalizar_endereco(endereco_completo)].result()
+                if not coordenadas:
+                    erros.append(ErroImportacao(indice, numero, "Coordenadas não encontradas"))
+                    continue
+
+                novas.append(Cacamba(
+                    numero=numero,
+                    cep=cep,
+                    adnumero=adnumero,
+                    data_colocacao=data_formatada,
+                    rua=endereco['rua'],
+                    bairro=endereco['bairro'],
+                    cidade=endereco['cidade'],
+                    uf=endereco['uf'],
+                    latitude=coordenadas[0],
+                    longitude=coordenadas[1]
+                ))
+
+        importadas = GerenciadorArquivos.salvar_cacambas(novas)
+        if len(importadas) < len(novas):
+            numeros_importados = {c.numero for c in importadas}
+            for cacamba in novas:
+                if cacamba.numero not in numeros_importados:
+                    erros.append(ErroImportacao(0, cacamba.numero, "Não foi possível gravar a caçamba"))
+
+        erros.sort(key=lambda erro: erro.linha)
+        resultado = ResultadoImportacao(importadas=importadas, erros=erros)
+        if erros:
+            resultado.arquivo_erros = ImportadorLote._salvar_relatorio(caminho, erros)
+        print(Fore.GREEN + f"Importação concluída: {len(importadas)} caçambas, {len(erros)} erros")
+        return resultado
+
+
+@dataclass
+class RotaCaminhao:
+    """Paradas de um caminhão, na ordem de visita, saindo e voltando ao depósito."""
+    caminhao: int
+    paradas: List[Cacamba]
+    distancia_km: float
+
+
+@dataclass
+class PlanoRotas:
+    """Resultado do planejamento das rotas de retirada."""
+    deposito: Tuple[float, float]
+    rotas: List[RotaCaminhao]
+    sem_coordenadas: List[Cacamba]
+    duracao: float = 0.0
+    arquivo_mapa: Optional[str] = None
+    arquivo_lista: Optional[str] = None
+
+    @property
+    def distancia_total_km(self) -> float:
+        """Soma das distâncias de todos os caminhões."""
+        return sum(rota.distancia_km for rota in self.rotas)
+
+
+class PlanejadorRotas:
+    """Planeja a ordem de visita das caçambas a retirar, dividida entre caminhões."""
+
+    RAIO_TERRA_KM = IndiceEspacial.RAIO_TERRA_KM
+    ARQUIVO_MAPA_ROTAS = 'rotas_retirada.html'
+    ARQUIVO_LISTA_ROTAS = 'rotas_retirada.csv'
+    CORES_ROTAS = ['red', 'blue', 'green', 'purple', 'orange',
+                   'darkred', 'cadetblue', 'darkgreen', 'darkblue', 'black']
+
+    @staticmethod
+    def interpretar_coordenadas(texto: str) -> Optional[Tuple[float, float]]:
+        """Converte 'lat, lon' (ou 'lat; lon' com vírgula decimal) em coordenadas válidas."""
+        if ';' in texto:
+            partes = [parte.replace(',', '.') for parte in texto.split(';')]
+        else:
+            partes = texto.replace(',', ' ').split()
+        try:
+            latitude, longitude = (float(parte) for parte in partes)
+        except ValueError:
+            return None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+        return latitude, longitude
+
+    @staticmethod
+    def matriz_distancias(coordenadas: 'np.ndarray') -> 'np.ndarray':
+        """Distâncias haversine (km) entre todos os pares de pontos (latitude, longitude em graus)."""
+        radianos = np.radians(coordenadas)
+        latitudes = radianos[:, 0:1]
+        longitudes = radianos[:, 1:2]
+        a = (np.sin((latitudes - latitudes.T) / 2) ** 2
+             + np.cos(latitudes) * np.cos(latitudes.T) * np.sin((longitudes - longitudes.T) / 2) ** 2)
+        return 2 * PlanejadorRotas.RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    @staticmethod
+    def vizinho_mais_proximo(distancias: 'np.ndarray', pontos: List[int], inicio: int) -> List[int]:
+        """Monta o percurso indo sempre ao ponto ainda não visitado mais próximo."""
+        restantes = np.array(pontos, dtype=int)
+        rota = [inicio]
+        atual = inicio
+        while len(restantes):
+            indice = int(np.argmin(distancias[atual, restantes]))
+            atual = int(restantes[indice])
+            rota.append(atual)
+            restantes = np.delete(restantes, indice)
+        return rota
+
+    @staticmethod
+    def dois_opt(distancias: 'np.ndarray', rota: List[int]) -> List[int]:
+        """Inverte trechos do percurso enquanto isso o encurtar (2-opt).
+
+        A rota começa e termina no depósito, que não sai do lugar. Para cada
+        início de trecho, o ganho de todos os finais possíveis é calculado de
+        uma vez com NumPy e aplicada a melhor inversão.
+        """
+        rota = np.array(rota, dtype=int)
+        tamanho = len(rota)
+        melhorou = tamanho >= 5  # Com menos de três paradas não há o que inverter
+        while melhorou:
+            melhorou = False
+            for i in range(1, tamanho - 2):
+                a, b = rota[i - 1], rota[i]
+                c = rota[i + 1:tamanho - 1]
+                e = rota[i + 2:tamanho]
+                ganho = distancias[a, c] + distancias[b, e] - distancias[a, b] - distancias[c, e]
+                j = int(np.argmin(ganho))
+                if ganho[j] < -1e-9:
+                    rota[i:i + j + 2] = rota[i:i + j + 2][::-1]
+                    melhorou = True
+        return rota.tolist()
+
+    @staticmethod
+    def planejar(cacambas: List[Cacamba], deposito: Tuple[float, float], caminhoes: int) -> PlanoRotas:
+        """Ordena as caçambas com coordenadas e as divide entre os caminhões.
+
+        Um percurso único é montado (vizinho mais próximo + 2-opt) e cortado em
+        trechos consecutivos com a mesma quantidade de paradas, um por
+        caminhão; cada trecho é então melhorado novamente com 2-opt.
+        """
+        inicio = time.perf_counter()
+        com_coordenadas, sem_coordenadas = [], []
+        for cacamba in cacambas:
+            if isinstance(cacamba.latitude, (int, float)) and isinstance(cacamba.longitude, (int, float)):
+                com_coordenadas.append(cacamba)
+            else:
+                sem_coordenadas.append(cacamba)
+
+        rotas = []
+        if com_coordenadas:
+            # O índice 0 é o depósito; a parada i corresponde a com_coordenadas[i - 1]
+            coordenadas = np.array([deposito] + [(c.latitude, c.longitude) for c in com_coordenadas],
+                                   dtype=float)
+            distancias = PlanejadorRotas.matriz_distancias(coordenadas)
+
+            percurso = PlanejadorRotas.vizinho_mais_proximo(distancias, range(1, len(coordenadas)), 0)
+            percurso = PlanejadorRotas.dois_opt(distancias, percurso + [0])
+
+            trechos = np.array_split(np.array(percurso[1:-1]), min(max(caminhoes, 1), len(com_coordenadas)))
+            for numero, trecho in enumerate(trechos, start=1):
+                rota = PlanejadorRotas.dois_opt(distancias, [0] + trecho.tolist() + [0])
+                rotas.append(RotaCaminhao(
+                    caminhao=numero,
+                    paradas=[com_coordenadas[i - 1] for i in rota[1:-1]],
+                    distancia_km=float(distancias[rota[:-1], rota[1:]].sum())
+                ))
+
+        plano = PlanoRotas(deposito, rotas, sem_coordenadas, duracao=time.perf_counter() - inicio)
+        print(Fore.GREEN + f"Rotas planejadas: {sum(len(r.paradas) for r in rotas)} paradas, "
+                           f"{len(rotas)} caminhões, {plano.distancia_total_km:.1f} km "
+                           f"em {plano.duracao * 1000:.0f} ms")
+        return plano
+
+    @staticmethod
+    def desenhar_mapa(plano: PlanoRotas, arquivo: str) -> None:
+        """Desenha as rotas num mapa folium, uma cor por caminhão."""
+        mapa = folium.Map(location=list(plano.deposito), zoom_start=12)
+        folium.Marker(
+            location=list(plano.deposito),
+            tooltip="Depósito",
+            icon=folium.Icon(color='black', icon='home')
+        ).add_to(mapa)
 
+        pontos = [plano.deposito]
+        for rota in plano.rotas:
+            cor = PlanejadorRotas.CORES_ROTAS[(rota.caminhao - 1) % len(PlanejadorRotas.CORES_ROTAS)]
+            trajeto = [plano.deposito] + [(c.latitude, c.longitude) for c in rota.paradas] + [plano.deposito]
+            folium.PolyLine(
+                trajeto, color=cor, weight=4, opacity=0.8,
+                tooltip=f"Caminhão {rota.caminhao}: {len(rota.paradas)} paradas, {rota.distancia_km:.1f} km"
+            ).add_to(mapa)
+            for ordem, cacamba in enumerate(rota.paradas, start=1):
+                folium.CircleMarker(
+                    location=[cacamba.latitude, cacamba.longitude],
+                    radius=7, color=cor, fill=True, fill_opacity=0.9,
+                    tooltip=f"Caminhão {rota.caminhao} - parada {ordem}: caçamba {cacamba.numero}",
+                    popup=folium.Popup(f"{cacamba.numero} - {cacamba.endereco_completo}", max_width=300)
+                ).add_to(mapa)
+            pontos.extend(trajeto)
+
+        latitudes = [p[0] for p in pontos]
+        longitudes = [p[1] for p in pontos]
+        mapa.fit_bounds([[min(latitudes), min(longitudes)], [max(latitudes), max(longitudes)]],
+                        max_zoom=ServicoLocalizacao.ZOOM_MAXIMO_AJUSTE)
+        mapa.save(arquivo)
 
-class ProcessadorDatas:
-    """Classe para processar formatos de data."""
-    
     @staticmethod
-    def validar_e_formatar_data(data_texto: str) -> Optional[str]:
-        """Valida e formata uma data em diversos formatos."""
+    def exportar_lista(plano: PlanoRotas, arquivo: str) -> None:
+        """Grava a ordem de visita de cada caminhão em CSV (separado por ';', para o Excel)."""
+        with open(arquivo, 'w', encoding='utf-8-sig', newline='') as f:
+            escritor = csv.writer(f, delimiter=';')
+            escritor.writerow(['caminhao', 'ordem', 'numero', 'endereco', 'data_colocacao',
+                               'latitude', 'longitude'])
+            for rota in plano.rotas:
+                for ordem, cacamba in enumerate(rota.paradas, start=1):
+                    escritor.writerow([rota.caminhao, ordem, cacamba.numero, cacamba.endereco_completo,
+                                       cacamba.data_colocacao, cacamba.latitude, cacamba.longitude])
+
+    @staticmethod
+    def salvar(plano: PlanoRotas, diretorio: str) -> None:
+        """Grava o mapa e a lista das rotas no diretório informado."""
+        plano.arquivo_mapa = os.path.join(diretorio, PlanejadorRotas.ARQUIVO_MAPA_ROTAS)
+        plano.arquivo_lista = os.path.join(diretorio, PlanejadorRotas.ARQUIVO_LISTA_ROTAS)
+        PlanejadorRotas.desenhar_mapa(plano, plano.arquivo_mapa)
+        PlanejadorRotas.exportar_lista(plano, plano.arquivo_lista)
+        print(Fore.GREEN + f"Rotas salvas em '{plano.arquivo_mapa}' e '{plano.arquivo_lista}'")
+
+
+class ServidorCacambas:
+    """Serviço HTTP/JSON que mantém as caçambas em memória para várias estações.
+
+    As leituras vêm do repositório em memória do GerenciadorArquivos e as
+    gravações são serializadas, então só este processo grava no arquivo de
+    dados. Cada requisição é atendida numa thread. Não há autenticação: o
+    serviço deve ficar restrito à rede interna.
+    """
+
+    HOST_PADRAO = '127.0.0.1'
+    PORTA_PADRAO = 8765
+
+    def __init__(self, host: str = HOST_PADRAO, porta: int = PORTA_PADRAO):
+        """Prepara o servidor no endereço informado (porta 0 escolhe uma livre)."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self._lock_gravacao = threading.Lock()
+        # As versões recomeçam a cada início do processo; a instância as distingue entre reinícios
+        self.instancia = uuid.uuid4().hex
+        self.rotas: Dict[Tuple[str, str], Callable[[Dict[str, str], Any], Any]] = {
+            ('GET', '/versao'): self.versao,
+            ('GET', '/cacambas'): self.listar,
+            ('POST', '/cacambas'): self.adicionar,
+            ('DELETE', '/cacambas'): self.remover,
+            ('GET', '/existe'): self.existe,
+            ('POST', '/existentes'): self.existentes,
+            ('GET', '/retirada'): self.retirada,
+            ('GET', '/proximas'): self.proximas,
+            ('GET', '/mapa'): self.mapa,
+        }
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Mantém a conexão aberta entre requisições da mesma estação
+
+            def _atender(self):
+                url = urlparse(self.path)
+                rota = servidor.rotas.get((self.command, url.path))
+                if rota is None:
+                    self._responder(404, {'erro': f"Rota desconhecida: {self.command} {url.path}"})
+                    return
+                try:
+                    parametros = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+                    tamanho = int(self.headers.get('Content-Length') or 0)
+                    corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+                    self._responder(200, rota(parametros, corpo))
+                except (ValueError, KeyError, TypeError) as e:
+                    self._responder(400, {'erro': f"Requisição inválida: {e}"})
+                except Exception as e:
+                    print(Fore.RED + f"Erro ao atender {self.command} {self.path}: {e}")
+                    self._responder(500, {'erro': str(e)})
+
+            do_GET = do_POST = do_DELETE = _atender
+
+            def _responder(self, status: int, dados: Any) -> None:
+                conteudo = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer((host, porta), Manipulador)
+        self.servidor.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Endereço em que o servidor atende."""
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    @staticmethod
+    def _para_dict(cacamba: Cacamba) -> Dict[str, Any]:
+        """Converte a caçamba nos campos enviados às estações."""
+        return ArmazenamentoJournal._cacamba_para_dict(cacamba)
+
+    def versao(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Versão atual dos dados, consultada pelas estações para saber se devem reler."""
+        return {'instancia': self.instancia, 'versao': GerenciadorArquivos.obter_repositorio().versao()}
+
+    def listar(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Todas as caçambas, com a versão correspondente."""
+        versao, cacambas = GerenciadorArquivos.obter_repositorio().listar_com_versao()
+        return {'instancia': self.instancia, 'versao': versao, 'cacambas': [self._para_dict(c) for c in cacambas]}
+
+    def _gravar(self, gravacao: Callable[[RepositorioCacambas], Dict[str, Any]]) -> Dict[str, Any]:
+        """Executa a gravação com exclusividade e informa as versões antes e depois dela."""
+        with self._lock_gravacao:
+            repositorio = GerenciadorArquivos.obter_repositorio()
+            anterior = repositorio.versao()
+            resposta = gravacao(repositorio)
+            resposta.update(instancia=self.instancia, versao_anterior=anterior, versao=repositorio.versao())
+            return resposta
+
+    def adicionar(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Inclui as caçambas do corpo ({'cacambas': [...]}), ignorando números já registrados."""
+        cacambas = [Cacamba(**dados) for dados in corpo['cacambas']]
+        return self._gravar(lambda repositorio: {
+            'incluidas': [c.numero for c in repositorio.adicionar_varias(cacambas)]
+        })
+
+    def remover(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Remove a caçamba ?numero=."""
+        numero = parametros['numero']
+        return self._gravar(lambda repositorio: {'removida': repositorio.remover(numero)})
+
+    def existe(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Indica se a caçamba ?numero= está registrada."""
+        return {'existe': GerenciadorArquivos.obter_repositorio().contem(parametros['numero'])}
+
+    def existentes(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Quais dos números do corpo ({'numeros': [...]}) estão registrados."""
+        existentes = GerenciadorArquivos.obter_repositorio().existentes(corpo['numeros'])
+        return {'existentes': sorted(existentes)}
+
+    def retirada(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Caçambas que atingiram o prazo de retirada em ?hoje= (aaaa-mm-dd), no máximo ?limite=."""
+        hoje = (datetime.date.fromisoformat(parametros['hoje']) if 'hoje' in parametros
+                else datetime.date.today())
+        limite = int(parametros['limite']) if 'limite' in parametros else None
+        cacambas = GerenciadorArquivos.obter_repositorio().listar_para_retirada(hoje, limite)
+        return {'cacambas': [self._para_dict(c) for c in cacambas]}
+
+    def proximas(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """Caçambas a até ?raio_km= do ponto ?lat=&lon=, ou as ?k= mais próximas."""
+        latitude, longitude = float(parametros['lat']), float(parametros['lon'])
+        repositorio = GerenciadorArquivos.obter_repositorio()
+        if 'k' in parametros:
+            resultados = repositorio.mais_proximas(latitude, longitude, int(parametros['k']))
+        else:
+            resultados = repositorio.proximas_no_raio(latitude, longitude, float(parametros['raio_km']))
+        return {'cacambas': [{'distancia_km': distancia, 'cacamba': self._para_dict(cacamba)}
+                             for distancia, cacamba in resultados]}
+
+    def mapa(self, parametros: Dict[str, str], corpo: Any) -> Dict[str, Any]:
+        """GeoJSON das caçambas com coordenadas, no formato lido pela página do mapa."""
+        return ServicoLocalizacao.montar_geojson(GerenciadorArquivos.obter_repositorio().listar())
+
+    def executar(self) -> None:
+        """Atende as estações até Ctrl+C e consolida as alterações ao encerrar."""
+        # Carrega os dados antes da primeira estação se conectar
+        quantidade = len(GerenciadorArquivos.carregar_cacambas())
+        print(Fore.GREEN + f"Servidor de caçambas em {self.url} ({quantidade} caçambas). Ctrl+C para encerrar.")
         try:
-            # Verifica caracteres permitidos
-            if not all(c.isdigit() or c == '/' for c in data_texto):
-                return None
-                
-            data_dt = None
-            # Verifica formato com barras
-            if '/' in data_texto and data_texto.count('/') == 2:
-                partes = data_texto.split('/')
-                if len(partes[2]) == 2:  # dd/mm/yy
-                    data_dt = datetime.datetime.strptime(data_texto, '%d/%m/%y')
-                else:  # dd/mm/yyyy
-                    data_dt = datetime.datetime.strptime(data_texto, '%d/%m/%Y')
-            # Formato sem barras
-            elif data_texto.isdigit():
-                if len(data_texto) == 6:  # ddmmyy
-                    data_dt = datetime.datetime.strptime(data_texto, '%d%m%y')
-                elif len(data_texto) == 8:  # ddmmyyyy
-                    data_dt = datetime.datetime.strptime(data_texto, '%d%m%Y')
-                else:
-                    return None
-            else:
-                return None
-                
-            # Formata para padrão dd/mm/yyyy
-            return data_dt.strftime('%d/%m/%Y')
-        except ValueError:
-            return None
+            self.servidor.serve_forever()
+        except KeyboardInterrupt:
+            print(Fore.CYAN + "Encerrando o servidor...")
+        finally:
+            self.servidor.server_close()
+            GerenciadorArquivos.compactar_armazenamento()
+
+    def encerrar(self) -> None:
+        """Interrompe serve_forever() a partir de outra thread."""
+        self.servidor.shutdown()
 
 
 class GerenciadorCacambas:
     """Classe principal para gerenciar caçambas."""
+
+    ARQUIVO_ALERTAS_ADIADOS = 'alertas_adiados.json'
+    HORAS_ADIAMENTO_ALERTA = 24  # Período em que uma caçamba adiada não volta a alertar
+    CAPACIDADE_ALERTAS_ADIADOS = 5000
     
     def __init__(self):
         """Inicializa o gerenciador de caçambas."""
         self.interface = None  # Será definido posteriormente
+        self._alertas_adiados: Optional[CachePersistente] = None
+        self._deposito: Tuple[float, float] = tuple(ServicoLocalizacao.CENTRO_PADRAO_MAPA)
     
     def registrar_cacamba(self, root) -> None:
         """Registra uma nova caçamba com interface gráfica."""
@@ -474,9 +3129,7 @@ class GerenciadorCacambas:
             return
             
         # Verifica se já existe
-        cacambas = GerenciadorArquivos.carregar_cacambas()
-        numeros_existentes = [c.numero for c in cacambas]
-        if numero in numeros_existentes:
+        if GerenciadorArquivos.existe_cacamba(numero):
             messagebox.showwarning("ALERTA", f"A caçamba {numero} já está registrada.")
             return
 
@@ -486,105 +3139,962 @@ class GerenciadorCacambas:
                                     parent=root)
         if not cep:
             return
-            
-        # Obtém informações de endereço pelo CEP
-        endereco_info = ServicoLocalizacao.obter_endereco_por_cep(cep)
-        if not endereco_info:
+        if not ServicoLocalizacao.normalizar_cep(cep):
             messagebox.showerror("Erro", "CEP inválido ou não encontrado.")
             return
             
+        # Consulta o CEP em segundo plano enquanto o usuário preenche o restante
+        consulta_cep = None
+        if self.interface:
+            consulta_cep = self.interface.executor.submit(ServicoLocalizacao.obter_endereco_por_cep, cep)
+            
         # Solicita número do endereço
         adnumero = simpledialog.askstring("Registrar Caçamba", 
                                          "Digite o número do endereço:", 
                                          parent=root)
         if not adnumero:
             return
-            
-        # Solicita data de colocação
-        data_texto = simpledialog.askstring("Registrar Caçamba", 
-                                          "Digite a data de colocação (dd/mm/aa):", 
-                                          parent=root)
-        if not data_texto:
+            
+        # Solicita data de colocação
+        data_texto = simpledialog.askstring("Registrar Caçamba", 
+                                          "Digite a data de colocação (dd/mm/aa):", 
+                                          parent=root)
+        if not data_texto:
+            return
+            
+        # Valida e formata a data
+        data_formatada = ProcessadorDatas.validar_e_formatar_data(data_texto)
+        if not data_formatada:
+            messagebox.showerror("Erro", 
+                             "Data inválida. Formatos aceitos: dd/mm/aa, dd/mm/aaaa, ddmmaa, ddmmaaaa")
+            return
+
+        def localizar(tarefa: TarefaSegundoPlano) -> Tuple[Optional[Dict[str, str]], Optional[Tuple[float, float]]]:
+            """Aguarda o CEP e obtém as coordenadas (executado fora da thread do Tk)."""
+            if consulta_cep is None:
+                endereco_info = ServicoLocalizacao.obter_endereco_por_cep(cep)
+            else:
+                endereco_info = consulta_cep.result()
+            if not endereco_info or tarefa.cancelada.is_set():
+                return endereco_info, None
+
+            # Monta o endereço completo para geolocalização
+            endereco_completo = ServicoLocalizacao.montar_endereco(
+                endereco_info['rua'], adnumero, endereco_info['bairro'],
+                endereco_info['cidade'], endereco_info['uf']
+            )
+            return endereco_info, ServicoLocalizacao.obter_coordenadas(endereco_completo)
+
+        self._executar(
+            f"Localizando endereço da caçamba {numero}...",
+            localizar,
+            lambda resultado: self._concluir_registro(numero, cep, adnumero, data_formatada, *resultado)
+        )
+
+    def _executar(self, descricao: str,
+                  funcao: Callable[['TarefaSegundoPlano'], Any],
+                  ao_concluir: Callable[[Any], None],
+                  ao_falhar: Optional[Callable[[Exception], None]] = None) -> None:
+        """Executa funcao(tarefa) fora da thread do Tk; sem interface, executa aqui mesmo."""
+        if self.interface:
+            self.interface.executar_em_segundo_plano(descricao, funcao, ao_concluir, ao_falhar)
+            return
+        try:
+            resultado = funcao(TarefaSegundoPlano(descricao))
+        except Exception as e:
+            if ao_falhar is None:
+                raise
+            ao_falhar(e)
+            return
+        ao_concluir(resultado)
+
+    def _concluir_registro(self, numero: str, cep: str, adnumero: str, data_formatada: str,
+                           endereco_info: Optional[Dict[str, str]],
+                           coordenadas: Optional[Tuple[float, float]]) -> None:
+        """Grava a caçamba depois que as consultas terminaram (executado na thread do Tk)."""
+        if not endereco_info:
+            messagebox.showerror("Erro", "CEP inválido ou não encontrado.")
+            return
+        if not coordenadas:
+            messagebox.showerror("Erro", "Não foi possível obter as coordenadas do endereço.")
+            return
+            
+        # Cria objeto Cacamba
+        nova_cacamba = Cacamba(
+            numero=numero,
+            cep=cep,
+            adnumero=adnumero,
+            data_colocacao=data_formatada,
+            rua=endereco_info['rua'],
+            bairro=endereco_info['bairro'],
+            cidade=endereco_info['cidade'],
+            uf=endereco_info['uf'],
+            latitude=coordenadas[0],
+            longitude=coordenadas[1]
+        )
+        
+        # Salva a caçamba
+        if GerenciadorArquivos.salvar_cacamba(nova_cacamba):
+            messagebox.showinfo("Sucesso", f"Caçamba {numero} registrada com sucesso!")
+            # Atualiza a interface
+            if self.interface:
+                self.interface.atualizar_lista_cacambas()
+                self.interface.atualizar_mapa()
+        else:
+            messagebox.showerror("Erro", "Não foi possível registrar a caçamba.")
+    
+    def remover_cacamba(self, root) -> None:
+        """Remove uma caçamba existente."""
+        numero = simpledialog.askstring("Remover Caçamba", 
+                                      "Digite o número da caçamba:", 
+                                      parent=root)
+        if not numero:
+            return
+
+        self._executar(
+            f"Removendo a caçamba {numero}...",
+            lambda tarefa: GerenciadorArquivos.remover_cacamba(numero),
+            lambda removida: self._concluir_remocao(numero, removida)
+        )
+
+    def _concluir_remocao(self, numero: str, removida: bool) -> None:
+        """Informa o resultado da remoção e atualiza a interface (executado na thread do Tk)."""
+        if removida:
+            messagebox.showinfo("Sucesso", f"Caçamba {numero} removida com sucesso!")
+            # Atualiza a interface
+            if self.interface:
+                self.interface.atualizar_lista_cacambas()
+                self.interface.atualizar_mapa()
+        else:
+            messagebox.showwarning("ALERTA", f"A caçamba {numero} não está registrada ou não pôde ser removida.")
+    
+    def importar_lote(self, root) -> None:
+        """Importa caçambas de um arquivo CSV ou xlsx escolhido pelo usuário."""
+        from tkinter import filedialog
+
+        caminho = filedialog.askopenfilename(
+            parent=root,
+            title="Importar caçambas (número, CEP, número do endereço, data)",
+            filetypes=[("Planilha ou CSV", "*.xlsx *.csv"), ("Todos os arquivos", "*.*")]
+        )
+        if not caminho:
+            return
+
+        def ao_falhar(erro: Exception) -> None:
+            messagebox.showerror("Erro", f"Não foi possível importar o arquivo: {erro}")
+
+        self._executar(
+            "Importando lote...",
+            lambda tarefa: ImportadorLote.importar(
+                caminho, ao_progredir=tarefa.atualizar_progresso, cancelado=tarefa.cancelada
+            ),
+            self._mostrar_resultado_importacao,
+            ao_falhar
+        )
+
+    def planejar_rota(self, root) -> None:
+        """Planeja a rota de retirada das caçambas vencidas a partir do depósito informado."""
+        self._executar(
+            "Buscando caçambas para retirada...",
+            lambda tarefa: self.verificar_cacambas_para_retirada(),
+            lambda cacambas: self._escolher_parametros_rota(root, cacambas)
+        )
+
+    def _escolher_parametros_rota(self, root, cacambas: List[Cacamba]) -> None:
+        """Pede o depósito e a quantidade de caminhões e planeja a rota fora da thread do Tk."""
+        if not cacambas:
+            messagebox.showinfo("Planejar Rota", "Nenhuma caçamba está pronta para retirada.")
+            return
+
+        texto = simpledialog.askstring(
+            "Planejar Rota",
+            "Coordenadas do depósito (latitude, longitude):",
+            initialvalue=f"{self._deposito[0]}, {self._deposito[1]}",
+            parent=root
+        )
+        if not texto:
+            return
+        deposito = PlanejadorRotas.interpretar_coordenadas(texto)
+        if deposito is None:
+            messagebox.showerror("Erro", "Coordenadas inválidas. Use, por exemplo: -22.9068, -43.1729")
+            return
+        self._deposito = deposito
+
+        caminhoes = simpledialog.askinteger(
+            "Planejar Rota", "Quantidade de caminhões:",
+            initialvalue=1, minvalue=1, maxvalue=len(PlanejadorRotas.CORES_ROTAS), parent=root
+        )
+        if not caminhoes:
+            return
+
+        def planejar(tarefa: TarefaSegundoPlano) -> PlanoRotas:
+            """Calcula e grava o plano (executado fora da thread do Tk)."""
+            plano = PlanejadorRotas.planejar(cacambas, deposito, caminhoes)
+            if plano.rotas:
+                PlanejadorRotas.salvar(plano, GerenciadorArquivos.obter_configuracao().diretorio_dados)
+            return plano
+
+        def ao_falhar(erro: Exception) -> None:
+            messagebox.showerror("Erro", f"Não foi possível planejar a rota: {erro}")
+
+        self._executar("Planejando rota...", planejar, self._mostrar_plano, ao_falhar)
+
+    def _mostrar_plano(self, plano: PlanoRotas) -> None:
+        """Resume as rotas planejadas e abre o mapa delas (executado na thread do Tk)."""
+        linhas = [
+            f"Caminhão {rota.caminhao}: {len(rota.paradas)} paradas, {rota.distancia_km:.1f} km"
+            for rota in plano.rotas
+        ]
+        if plano.sem_coordenadas:
+            linhas.append(f"{len(plano.sem_coordenadas)} caçambas sem coordenadas ficaram de fora: " +
+                          ", ".join(c.numero for c in plano.sem_coordenadas[:10]))
+        if plano.arquivo_lista:
+            linhas.append(f"\nLista salva em {plano.arquivo_lista}")
+        messagebox.showinfo("Planejar Rota", "\n".join(linhas))
+
+        if plano.arquivo_mapa and self.interface:
+            self.interface.abrir_no_navegador(plano.arquivo_mapa)
+
+    def _mostrar_resultado_importacao(self, resultado: ResultadoImportacao) -> None:
+        """Exibe o resumo de uma importação e atualiza a interface."""
+        mensagem = f"{len(resultado.importadas)} caçambas importadas."
+        if resultado.erros:
+            mensagem += f"\n{len(resultado.erros)} linhas com erro"
+            if resultado.arquivo_erros:
+                mensagem += f" (detalhes em {resultado.arquivo_erros})"
+            mensagem += ":\n\n" + "\n".join(
+                f"Linha {erro.linha} ({erro.numero}): {erro.motivo}" for erro in resultado.erros[:10]
+            )
+            messagebox.showwarning("Importação", mensagem)
+        else:
+            messagebox.showinfo("Importação", mensagem)
+
+        if resultado.importadas and self.interface:
+            self.interface.atualizar_lista_cacambas()
+            self.interface.atualizar_mapa()
+
+    def verificar_cacambas_para_retirada(self, limite: Optional[int] = None) -> List[Cacamba]:
+        """Verifica quais caçambas estão prontas para retirada (no máximo `limite`)."""
+        return GerenciadorArquivos.carregar_cacambas_para_retirada(limite)
+
+    def obter_alertas_adiados(self) -> CachePersistente:
+        """Retorna os alertas adiados, gravados junto ao arquivo de configuração."""
+        if self._alertas_adiados is None:
+            diretorio = GerenciadorArquivos.obter_configuracao().diretorio_base
+            self._alertas_adiados = CachePersistente(
+                os.path.join(diretorio, self.ARQUIVO_ALERTAS_ADIADOS),
+                ttl_segundos=self.HORAS_ADIAMENTO_ALERTA * 3600,
+                capacidade=self.CAPACIDADE_ALERTAS_ADIADOS
+            )
+            Instrumentacao.registrar_cache('alertas_adiados', self._alertas_adiados)
+        return self._alertas_adiados
+
+    @staticmethod
+    def chave_alerta(cacamba: Cacamba) -> str:
+        """Identifica o alerta de uma colocação; recolocar a caçamba gera um novo alerta."""
+        return f"{cacamba.numero}|{cacamba.data_colocacao}"
+
+    def resumir_retiradas(self, hoje: datetime.date, cacambas: Optional[Iterable[Cacamba]] = None
+                          ) -> List[Tuple[str, List[Tuple[int, Cacamba]]]]:
+        """Agrupa por bairro as caçambas a retirar que não foram adiadas.
+
+        Sem `cacambas`, considera todas as que já atingiram o prazo. Cada grupo
+        traz (dias no local, caçamba) do mais antigo para o mais recente, e os
+        bairros vêm ordenados pela caçamba mais antiga.
+        """
+        if cacambas is None:
+            cacambas = self.verificar_cacambas_para_retirada()
+        adiados = self.obter_alertas_adiados()
+        grupos: Dict[str, List[Tuple[int, Cacamba]]] = {}
+        for cacamba in cacambas:
+            if adiados.obter(self.chave_alerta(cacamba)) is CachePersistente.AUSENTE:
+                grupos.setdefault(cacamba.bairro, []).append((cacamba.dias_em(hoje), cacamba))
+
+        for itens in grupos.values():
+            itens.sort(key=lambda item: item[0], reverse=True)
+        return sorted(grupos.items(), key=lambda grupo: (-grupo[1][0][0], grupo[0]))
+
+    def adiar_alertas(self, cacambas: List[Cacamba]) -> None:
+        """Silencia os alertas das caçambas informadas pelo período de adiamento."""
+        self.obter_alertas_adiados().guardar_varios({self.chave_alerta(c): True for c in cacambas})
+        print(Fore.CYAN + f"{len(cacambas)} alertas adiados por {self.HORAS_ADIAMENTO_ALERTA}h")
+    
+    def set_interface(self, interface) -> None:
+        """Define a interface gráfica associada ao gerenciador."""
+        self.interface = interface
+
+
+class ListaVirtualCacambas:
+    """Lista de caçambas em ttk.Treeview que desenha apenas as linhas visíveis."""
+
+    # (coluna, título, largura, alinhamento)
+    COLUNAS = (
+        ('numero', 'Número', 80, tk.W),
+        ('endereco', 'Endereço', 330, tk.W),
+        ('bairro', 'Bairro', 140, tk.W),
+        ('dias', 'Dias', 60, tk.CENTER),
+        ('status', 'Status', 80, tk.CENTER),
+    )
+    ALTURA_LINHA = 22
+    ALTURA_CABECALHO = 26  # Usada até a primeira linha ser desenhada
+    LINHAS_POR_GIRO = 3  # Linhas roladas por passo da roda do mouse
+
+    def __init__(self, master, cores: Dict[str, str]):
+        """Cria a Treeview e a barra de rolagem dentro de master."""
+        self.frame = ttk.Frame(master, style='Rounded.TFrame')
+
+        style = ttk.Style()
+        style.configure(
+            'Cacambas.Treeview',
+            font=('Roboto', 10),
+            rowheight=self.ALTURA_LINHA,
+            background='white',
+            fieldbackground='white',
+            foreground=cores['texto'],
+            borderwidth=0
+        )
+        style.configure('Cacambas.Treeview.Heading', font=('Roboto', 10, 'bold'))
+        style.map(
+            'Cacambas.Treeview',
+            background=[('selected', cores['azul'])],
+            foreground=[('selected', 'white')]
+        )
+
+        self.tree = ttk.Treeview(
+            self.frame,
+            columns=[coluna[0] for coluna in self.COLUNAS],
+            show='headings',
+            selectmode='browse',
+            height=1,
+            style='Cacambas.Treeview'
+        )
+        for nome, titulo, largura, alinhamento in self.COLUNAS:
+            self.tree.heading(nome, text=titulo, command=lambda n=nome: self.ordenar_por(n))
+            self.tree.column(nome, width=largura, anchor=alinhamento, stretch=(nome == 'endereco'))
+        self.tree.tag_configure('retirar', foreground=cores['vermelho'])
+
+        self.scrollbar = Scrollbar(self.frame, command=self._rolar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', self._ajustar_linhas_visiveis)
+        self.tree.bind('<MouseWheel>', self._rolar_roda)
+        self.tree.bind('<Button-4>', lambda e: self._rolar('scroll', -self.LINHAS_POR_GIRO, 'units') or 'break')
+        self.tree.bind('<Button-5>', lambda e: self._rolar('scroll', self.LINHAS_POR_GIRO, 'units') or 'break')
+        self.tree.bind('<<TreeviewSelect>>', self._ao_selecionar)
+
+        # Modelo: linhas por número, mantidas ordenadas pela chave da coluna escolhida
+        self._linhas: Dict[str, tuple] = {}
+        self._posicoes: Dict[str, int] = {}  # Ordem de chegada, usada quando não há ordenação
+        self._proxima_posicao = 0
+        self._chaves: List[tuple] = []
+        self._ordem: List[str] = []
+        self._coluna_ordem: Optional[str] = None
+        self._decrescente = False
+        # Dias e status são calculados ao desenhar, em relação a esta data
+        self._hoje = datetime.date.today()
+
+        # Visão: itens fixos da Treeview reaproveitados durante a rolagem
+        self._itens: List[str] = []
+        self._exibidos: Dict[str, Optional[tuple]] = {}
+        self._inicio = 0
+        self._selecionada: Optional[str] = None
+
+    def pack(self, **kwargs) -> None:
+        """Posiciona a lista no contêiner."""
+        self.frame.pack(**kwargs)
+
+    @staticmethod
+    def _chave_numero(numero: str) -> tuple:
+        """Ordena números de caçamba numericamente quando possível."""
+        return (0, int(numero), numero) if numero.isdigit() else (1, 0, numero)
+
+    def _chave(self, numero: str, linha: tuple) -> tuple:
+        """Chave de ordenação da linha conforme a coluna escolhida."""
+        if self._coluna_ordem == 'numero':
+            return self._chave_numero(numero)
+        if self._coluna_ordem == 'bairro':
+            return (linha[2].casefold(),) + self._chave_numero(numero)
+        if self._coluna_ordem == 'dias':
+            # Mais dias no local equivale a colocação mais antiga; sem data conta como 0 dias
+            data = linha[3]
+            return ((0, 0) if data is None else (1, -data.toordinal())) + self._chave_numero(numero)
+        return (self._posicoes[numero],)
+
+    @staticmethod
+    def _montar_linha(cacamba: Cacamba) -> tuple:
+        """Dados da caçamba guardados no modelo; não dependem do dia atual."""
+        return (cacamba.numero, cacamba.endereco_completo, cacamba.bairro, cacamba.data)
+
+    def _valores(self, linha: tuple) -> tuple:
+        """Valores exibidos para uma linha do modelo no dia atual."""
+        data = linha[3]
+        dias = (self._hoje - data).days if data is not None else 0
+        status = 'RETIRAR' if dias >= Cacamba.DIAS_PARA_RETIRADA else ''
+        return linha[:3] + (dias, status)
+
+    def _inserir(self, numero: str, linha: tuple) -> None:
+        """Insere a linha no modelo, na posição da ordenação atual."""
+        if numero not in self._posicoes:
+            self._posicoes[numero] = self._proxima_posicao
+            self._proxima_posicao += 1
+        self._linhas[numero] = linha
+        chave = self._chave(numero, linha)
+        indice = bisect.bisect_left(self._chaves, chave)
+        self._chaves.insert(indice, chave)
+        self._ordem.insert(indice, numero)
+
+    def _retirar(self, numero: str, manter_posicao: bool = False) -> None:
+        """Retira a linha do modelo."""
+        chave = self._chave(numero, self._linhas[numero])
+        indice = bisect.bisect_left(self._chaves, chave)
+        del self._chaves[indice]
+        del self._ordem[indice]
+        del self._linhas[numero]
+        if not manter_posicao:
+            del self._posicoes[numero]
+
+    def atualizar(self, cacambas: List[Cacamba], hoje: Optional[datetime.date] = None) -> None:
+        """Aplica ao modelo apenas as linhas incluídas, removidas ou alteradas e redesenha."""
+        self._hoje = hoje or datetime.date.today()
+        novas = {c.numero: self._montar_linha(c) for c in cacambas}
+
+        for numero in [n for n in self._linhas if n not in novas]:
+            self._retirar(numero)
+        for numero, linha in novas.items():
+            antiga = self._linhas.get(numero)
+            if antiga == linha:
+                continue
+            if antiga is not None:
+                self._retirar(numero, manter_posicao=True)
+            self._inserir(numero, linha)
+
+        self._desenhar()
+
+    def definir_hoje(self, hoje: datetime.date) -> None:
+        """Muda o dia de referência; só as linhas visíveis são redesenhadas."""
+        if hoje != self._hoje:
+            self._hoje = hoje
+            self._desenhar()
+
+    def ordenar_por(self, coluna: str) -> None:
+        """Ordena pela coluna; clicar de novo na mesma coluna inverte a ordem."""
+        if coluna == self._coluna_ordem:
+            self._decrescente = not self._decrescente
+        else:
+            self._coluna_ordem = coluna
+            self._decrescente = False
+
+        pares = sorted((self._chave(numero, linha), numero) for numero, linha in self._linhas.items())
+        self._chaves = [chave for chave, _ in pares]
+        self._ordem = [numero for _, numero in pares]
+
+        for nome, titulo, _, _ in self.COLUNAS:
+            seta = (' ▼' if self._decrescente else ' ▲') if nome == coluna else ''
+            self.tree.heading(nome, text=titulo + seta)
+        self._inicio = 0
+        self._desenhar()
+
+    def _numero_na_posicao(self, indice: int) -> str:
+        """Número exibido na posição indice da lista (considerando a ordem inversa)."""
+        if self._decrescente:
+            indice = len(self._ordem) - 1 - indice
+        return self._ordem[indice]
+
+    def _desenhar(self) -> None:
+        """Atualiza apenas os itens visíveis cujo conteúdo mudou."""
+        total = len(self._ordem)
+        visiveis = len(self._itens)
+        self._inicio = max(0, min(self._inicio, total - visiveis))
+
+        selecao = []
+        for posicao, item in enumerate(self._itens):
+            indice = self._inicio + posicao
+            exibido = None
+            if indice < total:
+                numero = self._numero_na_posicao(indice)
+                exibido = (numero, self._linhas[numero], self._hoje)
+                if numero == self._selecionada:
+                    selecao.append(item)
+
+            anterior = self._exibidos.get(item)
+            if anterior == exibido:
+                continue
+            if exibido is None:
+                self.tree.detach(item)
+            else:
+                if anterior is None:
+                    self.tree.move(item, '', posicao)
+                valores = self._valores(exibido[1])
+                self.tree.item(item, values=valores, tags=('retirar',) if valores[4] else ())
+            self._exibidos[item] = exibido
+
+        if tuple(self.tree.selection()) != tuple(selecao):
+            self.tree.selection_set(selecao)
+
+        if total:
+            self.scrollbar.set(self._inicio / total, min(1.0, (self._inicio + visiveis) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _ajustar_linhas_visiveis(self, event) -> None:
+        """Cria ou descarta itens da Treeview para caber exatamente na área visível."""
+        cabecalho = self.ALTURA_CABECALHO
+        if self._itens and self._exibidos.get(self._itens[0]) is not None:
+            caixa = self.tree.bbox(self._itens[0])
+            if caixa:
+                cabecalho = caixa[1]
+        quantidade = max(1, (event.height - cabecalho) // self.ALTURA_LINHA)
+
+        while len(self._itens) < quantidade:
+            item = self.tree.insert('', tk.END, iid=f'linha{len(self._itens)}')
+            self.tree.detach(item)
+            self._itens.append(item)
+            self._exibidos[item] = None
+        while len(self._itens) > quantidade:
+            item = self._itens.pop()
+            self.tree.delete(item)
+            del self._exibidos[item]
+
+        self._desenhar()
+
+    def _rolar(self, *args) -> None:
+        """Trata os comandos da barra de rolagem ('moveto' e 'scroll')."""
+        total = len(self._ordem)
+        if args[0] == 'moveto':
+            self._inicio = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            passo = int(args[1])
+            if args[2] == 'pages':
+                passo *= max(1, len(self._itens) - 1)
+            self._inicio += passo
+        self._desenhar()
+
+    def _rolar_roda(self, event) -> str:
+        """Rola a lista com a roda do mouse (Windows/macOS)."""
+        passos = -1 if event.delta > 0 else 1
+        self._rolar('scroll', passos * self.LINHAS_POR_GIRO, 'units')
+        return 'break'
+
+    def _ao_selecionar(self, event) -> None:
+        """Guarda o número selecionado para manter a seleção durante a rolagem."""
+        selecao = self.tree.selection()
+        if selecao and self._exibidos.get(selecao[0]):
+            self._selecionada = self._exibidos[selecao[0]][0]
+
+
+class AgendadorRetiradas:
+    """Min-heap com as datas em que cada caçamba atinge o prazo de retirada.
+
+    Remoções apenas descartam a caçamba de _pendentes; a entrada antiga fica na
+    fila e é ignorada ao chegar ao topo.
+    """
+
+    def __init__(self):
+        """Inicializa a fila vazia."""
+        self._fila: List[Tuple[datetime.date, str]] = []
+        self._pendentes: Dict[str, Tuple[datetime.date, Cacamba]] = {}
+
+    @staticmethod
+    def prazo(cacamba: Cacamba) -> Optional[datetime.date]:
+        """Data em que a caçamba atinge o prazo de retirada."""
+        if cacamba.data is None:
+            return None
+        return cacamba.data + datetime.timedelta(days=Cacamba.DIAS_PARA_RETIRADA)
+
+    def adicionar(self, cacamba: Cacamba, hoje: datetime.date) -> None:
+        """Agenda a caçamba se ela ainda vai atingir o prazo depois de hoje."""
+        prazo = self.prazo(cacamba)
+        if prazo is None or prazo <= hoje:
+            self.remover(cacamba.numero)
+            return
+        atual = self._pendentes.get(cacamba.numero)
+        self._pendentes[cacamba.numero] = (prazo, cacamba)
+        if atual is None or atual[0] != prazo:
+            heapq.heappush(self._fila, (prazo, cacamba.numero))
+
+    def remover(self, numero: str) -> None:
+        """Tira a caçamba da agenda."""
+        if self._pendentes.pop(numero, None) is not None and len(self._fila) > 2 * len(self._pendentes) + 64:
+            # Descarta as entradas antigas quando passam a ocupar a maior parte da fila
+            self._fila = [(prazo, numero) for numero, (prazo, _) in self._pendentes.items()]
+            heapq.heapify(self._fila)
+
+    def sincronizar(self, cacambas: Iterable[Cacamba], hoje: datetime.date) -> None:
+        """Ajusta a agenda às caçambas informadas, mexendo na fila só para as que mudaram."""
+        numeros = set()
+        for cacamba in cacambas:
+            numeros.add(cacamba.numero)
+            self.adicionar(cacamba, hoje)
+        for numero in [numero for numero in self._pendentes if numero not in numeros]:
+            self.remover(numero)
+
+    def _descartar_antigas(self) -> None:
+        """Tira do topo as entradas de caçambas removidas ou reagendadas."""
+        while self._fila:
+            prazo, numero = self._fila[0]
+            pendente = self._pendentes.get(numero)
+            if pendente is not None and pendente[0] == prazo:
+                return
+            heapq.heappop(self._fila)
+
+    def proximo_vencimento(self) -> Optional[datetime.date]:
+        """Data do próximo prazo pendente, se houver."""
+        self._descartar_antigas()
+        return self._fila[0][0] if self._fila else None
+
+    def vencidas_ate(self, hoje: datetime.date) -> List[Cacamba]:
+        """Retira da agenda e retorna as caçambas cujo prazo foi atingido até hoje."""
+        vencidas = []
+        self._descartar_antigas()
+        while self._fila and self._fila[0][0] <= hoje:
+            numero = heapq.heappop(self._fila)[1]
+            vencidas.append(self._pendentes.pop(numero)[1])
+            self._descartar_antigas()
+        return vencidas
+
+
+class PainelAlertasRetirada:
+    """Janela não modal com as caçambas prontas para retirada, agrupadas por bairro."""
+
+    # (coluna, título, largura, alinhamento)
+    COLUNAS = (
+        ('numero', 'Número', 80, tk.W),
+        ('endereco', 'Endereço', 300, tk.W),
+        ('dias', 'Dias', 60, tk.CENTER),
+        ('data', 'Colocação', 90, tk.CENTER),
+    )
+
+    def __init__(self, master, cores: Dict[str, str],
+                 grupos: List[Tuple[str, List[Tuple[int, Cacamba]]]],
+                 ao_adiar: Callable[[List[Cacamba]], None]):
+        """Cria a janela com o resumo; a janela principal continua utilizável."""
+        self.ao_adiar = ao_adiar
+        self._cacambas: Dict[str, Cacamba] = {}
+
+        self.janela = tk.Toplevel(master)
+        self.janela.title("Caçambas para retirada")
+        self.janela.geometry("620x400")
+        self.janela.configure(bg=cores['bg'])
+        self.janela.transient(master)
+
+        total = sum(len(itens) for _, itens in grupos)
+        self.label_resumo = ttk.Label(
+            self.janela,
+            text=f"{total} caçambas prontas para retirada em {len(grupos)} bairros",
+            font=('Roboto', 11, 'bold'),
+            foreground=cores['vermelho'],
+            background=cores['bg']
+        )
+        self.label_resumo.pack(padx=10, pady=(10, 5), anchor=tk.W)
+
+        frame_lista = ttk.Frame(self.janela, style='Rounded.TFrame')
+        frame_lista.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(
+            frame_lista,
+            columns=[coluna[0] for coluna in self.COLUNAS],
+            show='tree headings',
+            style='Cacambas.Treeview'
+        )
+        self.tree.heading('#0', text='Bairro')
+        self.tree.column('#0', width=150, stretch=False)
+        for nome, titulo, largura, alinhamento in self.COLUNAS:
+            self.tree.heading(nome, text=titulo)
+            self.tree.column(nome, width=largura, anchor=alinhamento, stretch=(nome == 'endereco'))
+        self.tree.tag_configure('retirar', foreground=cores['vermelho'])
+
+        scrollbar = Scrollbar(frame_lista, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for indice, (bairro, itens) in enumerate(grupos):
+            pai = self.tree.insert('', tk.END, iid=f"bairro:{indice}",
+                                   text=f"{bairro} ({len(itens)})", open=True)
+            for dias, cacamba in itens:
+                iid = f"cacamba:{cacamba.numero}"
+                self._cacambas[iid] = cacamba
+                self.tree.insert(pai, tk.END, iid=iid, tags=('retirar',), values=(
+                    cacamba.numero, cacamba.endereco_completo, dias, cacamba.data_colocacao
+                ))
+
+        frame_botoes = ttk.Frame(self.janela, style='Footer.TFrame')
+        frame_botoes.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(frame_botoes, text="Adiar selecionadas", style='Chrome.TButton',
+                   command=self.adiar_selecionadas).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(frame_botoes, text="Adiar todas", style='Chrome.TButton',
+                   command=self.adiar_todas).pack(side=tk.LEFT)
+        ttk.Button(frame_botoes, text="Fechar", style='Red.TButton',
+                   command=self.fechar).pack(side=tk.RIGHT)
+
+    def aberto(self) -> bool:
+        """Indica se a janela ainda está aberta."""
+        try:
+            return bool(self.janela.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def cacambas(self) -> List[Cacamba]:
+        """Caçambas que ainda estão no painel."""
+        return list(self._cacambas.values())
+
+    def adiar_selecionadas(self) -> None:
+        """Adia as caçambas selecionadas (selecionar um bairro inclui todas as dele)."""
+        iids = []
+        for item in self.tree.selection():
+            iids.extend(self.tree.get_children(item) if item.startswith('bairro:') else [item])
+        self._adiar(list(dict.fromkeys(iid for iid in iids if iid in self._cacambas)))
+
+    def adiar_todas(self) -> None:
+        """Adia todas as caçambas do painel."""
+        self._adiar(list(self._cacambas))
+
+    def _adiar(self, iids: List[str]) -> None:
+        """Grava o adiamento e tira as caçambas do painel, fechando-o se esvaziar."""
+        if not iids:
             return
-            
-        # Valida e formata a data
-        data_formatada = ProcessadorDatas.validar_e_formatar_data(data_texto)
-        if not data_formatada:
-            messagebox.showerror("Erro", 
-                             "Data inválida. Formatos aceitos: dd/mm/aa, dd/mm/aaaa, ddmmaa, ddmmaaaa")
+        self.ao_adiar([self._cacambas.pop(iid) for iid in iids])
+
+        for iid in iids:
+            pai = self.tree.parent(iid)
+            self.tree.delete(iid)
+            restantes = len(self.tree.get_children(pai))
+            if restantes:
+                bairro = self.tree.item(pai, 'text').rsplit(' (', 1)[0]
+                self.tree.item(pai, text=f"{bairro} ({restantes})")
+            else:
+                self.tree.delete(pai)
+
+        if not self._cacambas:
+            self.fechar()
             return
-            
-        # Monta o endereço completo para geolocalização
-        endereco_completo = (
-            f"{endereco_info['rua']}, {adnumero}, "
-            f"{endereco_info['bairro']}, {endereco_info['cidade']}, "
-            f"{endereco_info['uf']}, Brasil"
+        bairros = len(self.tree.get_children(''))
+        self.label_resumo.config(
+            text=f"{len(self._cacambas)} caçambas prontas para retirada em {bairros} bairros"
         )
-        
-        # Obtém coordenadas
-        coordenadas = ServicoLocalizacao.obter_coordenadas(endereco_completo)
-        if not coordenadas:
-            messagebox.showerror("Erro", "Não foi possível obter as coordenadas do endereço.")
-            return
-            
-        # Cria objeto Cacamba
-        nova_cacamba = Cacamba(
-            numero=numero,
-            cep=cep,
-            adnumero=adnumero,
-            data_colocacao=data_formatada,
-            rua=endereco_info['rua'],
-            bairro=endereco_info['bairro'],
-            cidade=endereco_info['cidade'],
-            uf=endereco_info['uf'],
-            latitude=coordenadas[0],
-            longitude=coordenadas[1]
+
+    def fechar(self) -> None:
+        """Fecha a janela."""
+        if self.aberto():
+            self.janela.destroy()
+
+
+class JanelaCacambasProximas:
+    """Janela com as caçambas próximas de um ponto, da mais próxima à mais distante."""
+
+    COLUNAS = (
+        ('numero', 'Número', 80, tk.W),
+        ('endereco', 'Endereço', 300, tk.W),
+        ('distancia', 'Distância', 80, tk.CENTER),
+        ('dias', 'Dias', 60, tk.CENTER),
+    )
+
+    def __init__(self, master, cores: Dict[str, str], titulo: str,
+                 resultados: List[Tuple[float, Cacamba]], hoje: datetime.date):
+        """Cria a janela com o resultado da busca."""
+        self.janela = tk.Toplevel(master)
+        self.janela.title("Caçambas próximas")
+        self.janela.geometry("620x360")
+        self.janela.configure(bg=cores['bg'])
+        self.janela.transient(master)
+
+        ttk.Label(
+            self.janela,
+            text=titulo,
+            font=('Roboto', 11, 'bold'),
+            foreground=cores['azul'],
+            background=cores['bg']
+        ).pack(padx=10, pady=(10, 5), anchor=tk.W)
+
+        frame_lista = ttk.Frame(self.janela, style='Rounded.TFrame')
+        frame_lista.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(
+            frame_lista,
+            columns=[coluna[0] for coluna in self.COLUNAS],
+            show='headings',
+            style='Cacambas.Treeview'
         )
-        
-        # Salva a caçamba
-        if GerenciadorArquivos.salvar_cacamba(nova_cacamba):
-            messagebox.showinfo("Sucesso", f"Caçamba {numero} registrada com sucesso!")
-            # Atualiza a interface
-            if self.interface:
-                self.interface.atualizar_lista_cacambas()
-                self.interface.gerar_e_mostrar_mapa()
+        for nome, titulo_coluna, largura, alinhamento in self.COLUNAS:
+            self.tree.heading(nome, text=titulo_coluna)
+            self.tree.column(nome, width=largura, anchor=alinhamento, stretch=(nome == 'endereco'))
+        self.tree.tag_configure('retirar', foreground=cores['vermelho'])
+
+        scrollbar = Scrollbar(frame_lista, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for distancia, cacamba in resultados:
+            tags = ('retirar',) if cacamba.precisa_retirada_em(hoje) else ()
+            self.tree.insert('', tk.END, tags=tags, values=(
+                cacamba.numero, cacamba.endereco_completo, f"{distancia:.2f} km", cacamba.dias_em(hoje)
+            ))
+
+        frame_botoes = ttk.Frame(self.janela, style='Footer.TFrame')
+        frame_botoes.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(frame_botoes, text="Fechar", style='Red.TButton',
+                   command=self.janela.destroy).pack(side=tk.RIGHT)
+
+
+class JanelaDiagnostico:
+    """Janela com os tempos, bytes e caches medidos pela Instrumentacao."""
+
+    COLUNAS = (
+        ('chamadas', 'Chamadas', 70, tk.CENTER),
+        ('media', 'Média (ms)', 80, tk.E),
+        ('p95', 'p95 (ms)', 80, tk.E),
+        ('maximo', 'Máx. (ms)', 80, tk.E),
+        ('total', 'Total (s)', 80, tk.E),
+        ('falhas', 'Falhas', 60, tk.CENTER),
+    )
+
+    def __init__(self, master, cores: Dict[str, str]):
+        """Cria a janela; os valores são atualizados pelo botão Atualizar."""
+        self.janela = tk.Toplevel(master)
+        self.janela.title("Diagnóstico")
+        self.janela.geometry("760x460")
+        self.janela.configure(bg=cores['bg'])
+        self.janela.transient(master)
+
+        frame_lista = ttk.Frame(self.janela, style='Rounded.TFrame')
+        frame_lista.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+        self.tree = ttk.Treeview(
+            frame_lista,
+            columns=[coluna[0] for coluna in self.COLUNAS],
+            show='tree headings',
+            style='Cacambas.Treeview'
+        )
+        self.tree.heading('#0', text='Operação')
+        self.tree.column('#0', width=240, stretch=True)
+        for nome, titulo, largura, alinhamento in self.COLUNAS:
+            self.tree.heading(nome, text=titulo)
+            self.tree.column(nome, width=largura, anchor=alinhamento, stretch=False)
+
+        scrollbar = Scrollbar(frame_lista, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        frame_botoes = ttk.Frame(self.janela, style='Footer.TFrame')
+        frame_botoes.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(frame_botoes, text="Atualizar", style='Chrome.TButton',
+                   command=self.atualizar).pack(side=tk.LEFT, padx=(0, 8))
+        self.btn_perfil = ttk.Button(frame_botoes, style='Chrome.TButton', command=self.alternar_perfil)
+        self.btn_perfil.pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(frame_botoes, text="Salvar relatório", style='Chrome.TButton',
+                   command=self.salvar).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(frame_botoes, text="Zerar", style='Chrome.TButton',
+                   command=self.zerar).pack(side=tk.LEFT)
+        ttk.Button(frame_botoes, text="Fechar", style='Red.TButton',
+                   command=self.janela.destroy).pack(side=tk.RIGHT)
+
+        self.atualizar()
+
+    def atualizar(self) -> None:
+        """Redesenha a tabela com as medições atuais."""
+        self.btn_perfil.config(text="Parar perfil" if Instrumentacao.perfil_ativo() else "Iniciar perfil")
+        self.tree.delete(*self.tree.get_children())
+        relatorio = Instrumentacao.relatorio()
+
+        grupos: Dict[str, str] = {}
+        for nome, medida in relatorio['operacoes'].items():
+            grupo = nome.split('.', 1)[0]
+            if grupo not in grupos:
+                grupos[grupo] = self.tree.insert('', tk.END, text=grupo, open=True)
+            self.tree.insert(grupos[grupo], tk.END, text=nome.split('.', 1)[-1], values=(
+                medida['chamadas'], f"{medida['media_ms']:.1f}", f"{medida['p95_ms']:.1f}",
+                f"{medida['maximo_ms']:.1f}", f"{medida['total_ms'] / 1000:.2f}", medida['falhas']
+            ))
+
+        pai = self.tree.insert('', tk.END, text='bytes (lidos / gravados)', open=True)
+        for categoria, totais in relatorio['bytes'].items():
+            self.tree.insert(pai, tk.END, text=f"{categoria}: {totais['lidos'] / 1024:.0f} KiB"
+                                               f" / {totais['gravados'] / 1024:.0f} KiB")
+
+        pai = self.tree.insert('', tk.END, text='caches (acertos)', open=True)
+        for nome, cache in relatorio['caches'].items():
+            self.tree.insert(pai, tk.END, text=f"{nome}: {cache['taxa_acertos']:.0%}"
+                                               f" de {cache['acertos'] + cache['falhas']}")
+
+    def alternar_perfil(self) -> None:
+        """Inicia ou encerra a captura com cProfile."""
+        if Instrumentacao.perfil_ativo():
+            Instrumentacao.parar_perfil()
         else:
-            messagebox.showerror("Erro", "Não foi possível registrar a caçamba.")
-    
-    def remover_cacamba(self, root) -> None:
-        """Remove uma caçamba existente."""
-        numero = simpledialog.askstring("Remover Caçamba", 
-                                      "Digite o número da caçamba:", 
-                                      parent=root)
-        if not numero:
+            Instrumentacao.iniciar_perfil()
+        self.atualizar()
+
+    def salvar(self) -> None:
+        """Grava o relatório em JSON no local escolhido."""
+        from tkinter import filedialog
+
+        caminho = filedialog.asksaveasfilename(
+            parent=self.janela,
+            title="Salvar relatório de diagnóstico",
+            defaultextension=".json",
+            initialfile="diagnostico_cacambas.json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not caminho:
             return
-            
-        if GerenciadorArquivos.remover_cacamba(numero):
-            messagebox.showinfo("Sucesso", f"Caçamba {numero} removida com sucesso!")
-            # Atualiza a interface
-            if self.interface:
-                self.interface.atualizar_lista_cacambas()
-                self.interface.gerar_e_mostrar_mapa()
-        else:
-            messagebox.showwarning("ALERTA", f"A caçamba {numero} não está registrada ou não pôde ser removida.")
-    
-    def verificar_cacambas_para_retirada(self) -> List[Cacamba]:
-        """Verifica quais caçambas estão prontas para retirada."""
-        cacambas = GerenciadorArquivos.carregar_cacambas()
-        return [c for c in cacambas if c.precisa_retirada]
-    
-    def set_interface(self, interface) -> None:
-        """Define a interface gráfica associada ao gerenciador."""
-        self.interface = interface
+        try:
+            Instrumentacao.gravar_relatorio(caminho)
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível gravar o relatório: {e}", parent=self.janela)
+
+    def zerar(self) -> None:
+        """Descarta as medições acumuladas."""
+        Instrumentacao.zerar()
+        self.atualizar()
+
+
+class TarefaSegundoPlano:
+    """Operação demorada executada fora da thread do Tk, com cancelamento cooperativo."""
+
+    def __init__(self, descricao: str, cancelavel: bool = True):
+        """Inicializa a tarefa com a descrição exibida ao usuário."""
+        self.descricao = descricao
+        self.cancelavel = cancelavel
+        self.cancelada = threading.Event()
+        self.progresso: Optional[Tuple[int, int]] = None
+        self.futura: Optional[Future] = None
+
+    def atualizar_progresso(self, feitas: int, total: int) -> None:
+        """Registra o progresso (chamado pela thread de trabalho)."""
+        self.progresso = (feitas, total)
 
 
 class InterfaceGrafica:
     """Classe para gerenciar a interface gráfica."""
+
+    INTERVALO_ACOMPANHAMENTO_MS = 100  # Frequência de verificação das tarefas em segundo plano
+    ATRASO_ATUALIZACAO_MAPA_MS = 500  # Alterações em sequência geram uma única atualização do mapa
+    # Teto da espera pela virada do dia (cobre suspensão do computador e ajustes de relógio)
+    INTERVALO_MAXIMO_VIRADA_DIA_MS = 3600 * 1000
+    # No modo cliente, frequência da consulta às alterações feitas por outras estações
+    INTERVALO_SINCRONIZACAO_MS = 5000
+    RAIO_BUSCA_PADRAO_KM = 2  # Raio inicial da busca de caçambas próximas
+    QUANTIDADE_MAIS_PROXIMAS = 5  # Exibidas quando nenhuma caçamba está dentro do raio
     
     def __init__(self, gerenciador: GerenciadorCacambas):
         """Inicializa a interface gráfica."""
         self.gerenciador = gerenciador
         self.gerenciador.set_interface(self)
+
+        # Consultas de rede rodam fora da thread do Tk
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cacambas')
+        self._lock_mapa = threading.Lock()  # Evita duas gravações simultâneas dos arquivos do mapa
+        self._tarefa: Optional[TarefaSegundoPlano] = None
+
+        # A página do mapa relê os dados sozinha; só é aberta no navegador uma vez
+        self._mapa_aberto = False
+        self._atualizacao_mapa_agendada: Optional[str] = None
+        self._painel_alertas: Optional[PainelAlertasRetirada] = None
+
+        # Prazos de retirada pendentes, reavaliados apenas na virada do dia
+        self.agendador = AgendadorRetiradas()
+        self._hoje = datetime.date.today()
+        self._versao_exibida: Optional[int] = None
         
         # Cores e estilos - atualizado com cores Chromium
         self.cores = {
@@ -608,11 +4118,8 @@ class InterfaceGrafica:
         # Configuração de estilo
         self.configurar_estilo()
         
-        # Criação da UI
+        # Criação da UI; a lista é preenchida em segundo plano depois que a janela aparece
         self.criar_interface()
-        
-        # Atualiza a lista de caçambas
-        self.atualizar_lista_cacambas()
     
     def configurar_estilo(self) -> None:
         """Configura o estilo visual da aplicação no estilo Chromium."""
@@ -729,21 +4236,89 @@ class InterfaceGrafica:
             command=lambda: self.gerenciador.remover_cacamba(self.root),
             style='Red.TButton'
         )
+        self.btn_importar = ttk.Button(
+            container_botoes, 
+            text="Importar Lote", 
+            command=lambda: self.gerenciador.importar_lote(self.root),
+            style='Chrome.TButton'
+        )
         self.btn_mapa = ttk.Button(
             container_botoes, 
             text="Visualizar Mapa", 
             command=self.gerar_e_mostrar_mapa,
             style='Chrome.TButton'
         )
+        self.btn_rota = ttk.Button(
+            container_botoes, 
+            text="Planejar Rota", 
+            command=lambda: self.gerenciador.planejar_rota(self.root),
+            style='Chrome.TButton'
+        )
         
         # Adicionar bordas arredondadas aos botões
         self._aplicar_cantos_arredondados(self.btn_registrar, 20)
         self._aplicar_cantos_arredondados(self.btn_remover, 20)
+        self._aplicar_cantos_arredondados(self.btn_importar, 20)
         self._aplicar_cantos_arredondados(self.btn_mapa, 20)
+        self._aplicar_cantos_arredondados(self.btn_rota, 20)
         
         self.btn_registrar.pack(side=tk.LEFT, padx=8)
         self.btn_remover.pack(side=tk.LEFT, padx=8)
+        self.btn_importar.pack(side=tk.LEFT, padx=8)
         self.btn_mapa.pack(side=tk.LEFT, padx=8)
+        self.btn_rota.pack(side=tk.LEFT, padx=8)
+
+        # Busca de caçambas próximas a um ponto (coordenadas, CEP ou endereço)
+        frame_busca = ttk.Frame(self.frame_principal, style='Rounded.TFrame')
+        frame_busca.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(
+            frame_busca,
+            text="Perto de:",
+            font=('Roboto', 10),
+            foreground=self.cores['texto'],
+            background='white'
+        ).pack(side=tk.LEFT, padx=(8, 4))
+        self.entrada_busca = ttk.Entry(frame_busca)
+        self.entrada_busca.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+        self.entrada_busca.bind('<Return>', lambda evento: self.buscar_proximas())
+        ttk.Label(
+            frame_busca,
+            text="Raio (km):",
+            font=('Roboto', 10),
+            foreground=self.cores['texto'],
+            background='white'
+        ).pack(side=tk.LEFT, padx=4)
+        self.raio_busca = tk.StringVar(value=str(self.RAIO_BUSCA_PADRAO_KM))
+        ttk.Spinbox(
+            frame_busca, from_=0.5, to=50, increment=0.5, width=5, textvariable=self.raio_busca
+        ).pack(side=tk.LEFT, padx=4)
+        self.btn_buscar = ttk.Button(
+            frame_busca,
+            text="Buscar",
+            command=self.buscar_proximas,
+            style='Chrome.TButton'
+        )
+        self._aplicar_cantos_arredondados(self.btn_buscar, 20)
+        self.btn_buscar.pack(side=tk.LEFT, padx=8)
+
+        # Painel de progresso, exibido apenas durante tarefas em segundo plano
+        self.frame_tarefa = ttk.Frame(self.frame_principal, style='Rounded.TFrame')
+        self.label_tarefa = ttk.Label(
+            self.frame_tarefa,
+            font=('Roboto', 10),
+            foreground=self.cores['texto'],
+            background='white'
+        )
+        self.barra_tarefa = ttk.Progressbar(self.frame_tarefa, mode='indeterminate', length=200)
+        self.btn_cancelar_tarefa = ttk.Button(
+            self.frame_tarefa,
+            text="Cancelar",
+            command=self.cancelar_tarefa,
+            style='Red.TButton'
+        )
+        self.label_tarefa.pack(side=tk.LEFT, padx=8)
+        self.barra_tarefa.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=8)
+        self.btn_cancelar_tarefa.pack(side=tk.RIGHT, padx=8)
         
         # Frame para listbox com cantos arredondados
         self.frame_lista = ttk.LabelFrame(
@@ -755,23 +4330,9 @@ class InterfaceGrafica:
         self.frame_lista.pack(fill=tk.BOTH, expand=True, pady=15)
         self._aplicar_cantos_arredondados(self.frame_lista, 10)
     
-        # Listbox com scrollbar e visual melhorado
-        self.listbox = tk.Listbox(
-            self.frame_lista, 
-            font=('Roboto', 10),
-            bg='white',
-            fg=self.cores['texto'],
-            borderwidth=0,
-            highlightthickness=0,
-            selectbackground=self.cores['azul'],
-            selectforeground='white'
-        )
-        scrollbar = Scrollbar(self.frame_lista)
-        self.listbox.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.listbox.yview)
-        
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Lista virtualizada: apenas as linhas visíveis são desenhadas
+        self.lista = ListaVirtualCacambas(self.frame_lista, self.cores)
+        self.lista.pack(fill=tk.BOTH, expand=True)
     
         # Rodapé com estilo Chromium
         frame_rodape = ttk.Frame(self.root, style='Footer.TFrame')
@@ -785,6 +4346,14 @@ class InterfaceGrafica:
         )
         self._aplicar_cantos_arredondados(btn_sair, 20)
         btn_sair.pack(pady=15)
+
+        btn_diagnostico = ttk.Button(
+            frame_rodape,
+            text="Diagnóstico",
+            command=lambda: JanelaDiagnostico(self.root, self.cores),
+            style='Chrome.TButton'
+        )
+        btn_diagnostico.place(relx=1.0, rely=0.5, x=-15, anchor=tk.E)
     
     def _aplicar_cantos_arredondados(self, widget, raio=10):
         """Aplica cantos arredondados a um widget."""
@@ -796,63 +4365,438 @@ class InterfaceGrafica:
             pass
         
     def atualizar_lista_cacambas(self) -> None:
-        """Atualiza a lista de caçambas na interface."""
-        self.listbox.delete(0, tk.END)
-        
-        cacambas = GerenciadorArquivos.carregar_cacambas()
-        for cacamba in cacambas:
-            # Formata a exibição na lista
-            status = ""
-            if cacamba.precisa_retirada:
-                status = f" [RETIRAR - {cacamba.dias_no_local} dias]"
-                
-            texto = f"Caçamba {cacamba.numero} - {cacamba.endereco_completo}{status}"
-            self.listbox.insert(tk.END, texto)
+        """Relê as caçambas fora da thread do Tk e atualiza a lista ao concluir."""
+        futura = self.executor.submit(GerenciadorArquivos.carregar_cacambas_com_versao)
+        self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS, self._concluir_atualizacao_lista, futura)
+
+    def _concluir_atualizacao_lista(self, futura: Future) -> None:
+        """Exibe as caçambas lidas; se a leitura falhou, mantém a lista atual."""
+        if not futura.done():
+            self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS, self._concluir_atualizacao_lista, futura)
+            return
+        try:
+            versao, cacambas = futura.result()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao atualizar a lista de caçambas, mantendo a lista atual: {e}")
+            return
+        # Leituras concluídas fora de ordem não podem sobrescrever uma lista mais nova
+        if self._versao_exibida is not None and versao < self._versao_exibida:
+            return
+        self._exibir_cacambas(versao, cacambas)
+
+    @Instrumentacao.medido('interface.atualizar_lista_cacambas')
+    def _exibir_cacambas(self, versao: int, cacambas: List[Cacamba]) -> None:
+        """Preenche a lista e reagenda os prazos com as caçambas informadas."""
+        self.lista.atualizar(cacambas, self._hoje)
+        self.agendador.sincronizar(cacambas, self._hoje)
+        self._versao_exibida = versao
+
+    def _agendar_sincronizacao(self) -> None:
+        """No modo cliente, consulta periodicamente se outra estação alterou as caçambas."""
+        if GerenciadorArquivos.obter_configuracao().armazenamento == ArmazenamentoRemoto.nome:
+            self.root.after(self.INTERVALO_SINCRONIZACAO_MS, self._sincronizar)
+
+    def _sincronizar(self) -> None:
+        """Consulta a versão dos dados fora da thread do Tk."""
+        futura = self.executor.submit(GerenciadorArquivos.versao_cacambas)
+        self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS, self._concluir_sincronizacao, futura)
+
+    def _concluir_sincronizacao(self, futura: Future) -> None:
+        """Atualiza a lista se a versão mudou e agenda a próxima consulta."""
+        if not futura.done():
+            self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS, self._concluir_sincronizacao, futura)
+            return
+        versao = futura.result()
+        if versao is not None and versao != self._versao_exibida:
+            self.atualizar_lista_cacambas()
+            if self._mapa_aberto:
+                self.atualizar_mapa()
+        self._agendar_sincronizacao()
+
+    def _carregar_lista_inicial(self) -> None:
+        """Lê o arquivo de dados fora da thread do Tk, com a janela já exibida."""
+        Instrumentacao.marcar_inicializacao('janela')
+        # Sem cancelamento: os alertas e a sincronização só começam depois desta leitura
+        self.executar_em_segundo_plano(
+            "Carregando caçambas...",
+            lambda tarefa: GerenciadorArquivos.carregar_cacambas_com_versao(),
+            lambda resultado: self._concluir_lista_inicial(*resultado),
+            self._falhar_lista_inicial,
+            cancelavel=False
+        )
+
+    def _concluir_lista_inicial(self, versao: int, cacambas: List[Cacamba]) -> None:
+        """Exibe a lista inicial e, com os dados já em memória, os alertas de retirada."""
+        self._exibir_cacambas(versao, cacambas)
+        Instrumentacao.marcar_inicializacao('lista')
+        print(Fore.CYAN + Instrumentacao.resumo_inicializacao())
+        self._iniciar_acompanhamento()
+
+    def _falhar_lista_inicial(self, erro: Exception) -> None:
+        """Avisa da falha; a sincronização tenta carregar a lista novamente."""
+        messagebox.showerror("Erro", f"Não foi possível carregar as caçambas: {erro}")
+        self._iniciar_acompanhamento()
+
+    def _iniciar_acompanhamento(self) -> None:
+        """Exibe os alertas de retirada e, no modo cliente, inicia a sincronização."""
+        self.verificar_e_notificar_retiradas()
+        self._agendar_sincronizacao()
+
+    def buscar_proximas(self) -> None:
+        """Lista as caçambas no raio do ponto informado (coordenadas, CEP ou endereço)."""
+        texto = self.entrada_busca.get().strip()
+        if not texto or self._tarefa is not None:
+            return  # O Enter na busca continua ativo durante uma tarefa: a nova busca é ignorada
+        try:
+            raio_km = float(self.raio_busca.get().replace(',', '.'))
+        except ValueError:
+            messagebox.showerror("Erro", "Raio inválido.")
+            return
+        if raio_km <= 0:
+            messagebox.showerror("Erro", "O raio deve ser maior que zero.")
+            return
+
+        coordenadas = PlanejadorRotas.interpretar_coordenadas(texto)
+
+        def procurar(tarefa: TarefaSegundoPlano) -> Optional[Tuple[List[Tuple[float, Cacamba]], bool]]:
+            """Localiza o ponto e busca as caçambas (executado fora da thread do Tk)."""
+            # CEP e endereço dependem de serviços externos, e no modo cliente a busca vai ao servidor
+            ponto = coordenadas if coordenadas is not None else self.localizar_ponto(texto)
+            if ponto is None:
+                return None
+            return self.procurar_proximas(ponto, raio_km, self.QUANTIDADE_MAIS_PROXIMAS)
+
+        self.executar_em_segundo_plano(
+            "Buscando caçambas próximas...",
+            procurar,
+            lambda busca: self._mostrar_proximas(texto, raio_km, busca)
+        )
+
+    @staticmethod
+    def localizar_ponto(texto: str) -> Optional[Tuple[float, float]]:
+        """Obtém as coordenadas de um CEP ou endereço."""
+        if ServicoLocalizacao.normalizar_cep(texto):
+            endereco = ServicoLocalizacao.obter_endereco_por_cep(texto)
+            if not endereco:
+                return None
+            texto = f"{endereco['rua']}, {endereco['bairro']}, {endereco['cidade']}, {endereco['uf']}, Brasil"
+        return ServicoLocalizacao.obter_coordenadas(texto)
+
+    @staticmethod
+    def procurar_proximas(ponto: Tuple[float, float], raio_km: float,
+                          quantidade: int) -> Tuple[List[Tuple[float, Cacamba]], bool]:
+        """Caçambas no raio do ponto ou, se não houver nenhuma, as `quantidade` mais próximas.
+
+        O segundo item indica se os resultados estão dentro do raio.
+        """
+        latitude, longitude = ponto
+        resultados = GerenciadorArquivos.buscar_proximas(latitude, longitude, raio_km)
+        if resultados:
+            return resultados, True
+        return GerenciadorArquivos.buscar_mais_proximas(latitude, longitude, quantidade), False
+
+    def _mostrar_proximas(self, texto: str, raio_km: float,
+                          busca: Optional[Tuple[List[Tuple[float, Cacamba]], bool]]) -> None:
+        """Exibe as caçambas próximas do ponto encontradas pela busca."""
+        if busca is None:
+            messagebox.showerror("Erro", f"Não foi possível localizar: {texto}")
+            return
+
+        resultados, no_raio = busca
+        if no_raio:
+            titulo = f"{len(resultados)} caçambas a até {raio_km:g} km de {texto}"
+        else:
+            if not resultados:
+                messagebox.showinfo("Caçambas próximas", "Nenhuma caçamba com coordenadas registrada.")
+                return
+            titulo = f"Nenhuma caçamba a até {raio_km:g} km; as {len(resultados)} mais próximas de {texto}"
+        JanelaCacambasProximas(self.root, self.cores, titulo, resultados, self._hoje)
+
+    def _agendar_virada_do_dia(self) -> None:
+        """Agenda a próxima verificação para logo após a meia-noite."""
+        agora = datetime.datetime.now()
+        amanha = datetime.datetime.combine(agora.date() + datetime.timedelta(days=1), datetime.time())
+        atraso_ms = int((amanha - agora).total_seconds() * 1000) + 1000
+        self.root.after(min(atraso_ms, self.INTERVALO_MAXIMO_VIRADA_DIA_MS), self._verificar_virada_do_dia)
+
+    def _verificar_virada_do_dia(self) -> None:
+        """Na virada do dia, atualiza os dias exibidos e alerta as caçambas que atingiram o prazo."""
+        hoje = datetime.date.today()
+        if hoje != self._hoje:
+            self._hoje = hoje
+            self.lista.definir_hoje(hoje)
+            vencidas = self.agendador.vencidas_ate(hoje)
+            if vencidas:
+                numeros = ', '.join(cacamba.numero for cacamba in vencidas)
+                print(Fore.YELLOW + f"{len(vencidas)} caçambas atingiram o prazo de retirada: {numeros}")
+                self.verificar_e_notificar_retiradas(vencidas)
+        self._agendar_virada_do_dia()
     
-    def verificar_e_notificar_retiradas(self) -> None:
-        """Verifica e notifica sobre caçambas prontas para retirada."""
-        cacambas_para_retirada = self.gerenciador.verificar_cacambas_para_retirada()
-        
-        # Exibe notificações para caçambas que precisam ser retiradas
-        for cacamba in cacambas_para_retirada:
-            messagebox.showwarning(
-                "ALERTA", 
-                f"A caçamba {cacamba.numero} localizada em {cacamba.endereco_completo} " +
-                f"está no local há {cacamba.dias_no_local} dias e está pronta para retirada. " +
-                f"Data de colocação: {cacamba.data_colocacao}"
-            )
+    def executar_em_segundo_plano(self, descricao: str,
+                                  funcao: Callable[[TarefaSegundoPlano], Any],
+                                  ao_concluir: Callable[[Any], None],
+                                  ao_falhar: Optional[Callable[[Exception], None]] = None,
+                                  cancelavel: bool = True) -> None:
+        """Executa funcao(tarefa) numa thread de trabalho e entrega o resultado na thread do Tk."""
+        if self._tarefa is not None:
+            messagebox.showinfo("Aguarde", "Já existe uma consulta em andamento.")
+            return
+
+        tarefa = TarefaSegundoPlano(descricao, cancelavel)
+        tarefa.futura = self.executor.submit(funcao, tarefa)
+        self._tarefa = tarefa
+        self._mostrar_tarefa(tarefa)
+        self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS,
+                        self._acompanhar_tarefa, tarefa, ao_concluir, ao_falhar)
+
+    def _mostrar_tarefa(self, tarefa: TarefaSegundoPlano) -> None:
+        """Exibe o painel de progresso e bloqueia novas consultas."""
+        self.label_tarefa.config(text=tarefa.descricao)
+        self.barra_tarefa.config(mode='indeterminate', value=0)
+        self.barra_tarefa.start(15)
+        self.frame_tarefa.pack(fill=tk.X, pady=(5, 0), before=self.frame_lista)
+        self.btn_cancelar_tarefa.state(['!disabled'] if tarefa.cancelavel else ['disabled'])
+        for botao in self._botoes_tarefa():
+            botao.state(['disabled'])
+
+    def _esconder_tarefa(self) -> None:
+        """Esconde o painel de progresso e libera novas consultas."""
+        self._tarefa = None
+        self.barra_tarefa.stop()
+        self.frame_tarefa.pack_forget()
+        for botao in self._botoes_tarefa():
+            botao.state(['!disabled'])
+
+    def _botoes_tarefa(self) -> List[ttk.Button]:
+        """Botões que iniciam tarefas em segundo plano, bloqueados enquanto uma está em andamento."""
+        return [self.btn_registrar, self.btn_remover, self.btn_importar, self.btn_rota, self.btn_buscar]
+
+    def _acompanhar_tarefa(self, tarefa: TarefaSegundoPlano,
+                           ao_concluir: Callable[[Any], None],
+                           ao_falhar: Optional[Callable[[Exception], None]]) -> None:
+        """Atualiza o progresso e, ao final, entrega o resultado da tarefa."""
+        if tarefa.cancelada.is_set():
+            if not tarefa.futura.done():
+                self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS,
+                                self._acompanhar_tarefa, tarefa, ao_concluir, ao_falhar)
+                return
+            self._esconder_tarefa()
+            return  # O resultado de uma tarefa cancelada é descartado
+
+        if tarefa.progresso:
+            feitas, total = tarefa.progresso
+            if str(self.barra_tarefa.cget('mode')) != 'determinate':
+                self.barra_tarefa.stop()
+                self.barra_tarefa.config(mode='determinate')
+            self.barra_tarefa.config(maximum=max(total, 1), value=feitas)
+
+        if not tarefa.futura.done():
+            self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS,
+                            self._acompanhar_tarefa, tarefa, ao_concluir, ao_falhar)
+            return
+
+        self._esconder_tarefa()
+        try:
+            resultado = tarefa.futura.result()
+        except Exception as e:
+            print(Fore.RED + f"Erro em '{tarefa.descricao}': {e}")
+            if ao_falhar:
+                ao_falhar(e)
+            else:
+                messagebox.showerror("Erro", f"Não foi possível concluir a operação: {e}")
+            return
+        ao_concluir(resultado)
+
+    def cancelar_tarefa(self) -> None:
+        """Cancela a tarefa em andamento.
+
+        A thread de trabalho pode estar no meio de uma gravação, então a
+        interface só é liberada quando ela terminar.
+        """
+        if self._tarefa is None or not self._tarefa.cancelavel or self._tarefa.cancelada.is_set():
+            return
+        self._tarefa.cancelada.set()
+        print(Fore.YELLOW + f"Tarefa cancelada: {self._tarefa.descricao}")
+        self.label_tarefa.config(text="Cancelando...")
+        self.btn_cancelar_tarefa.state(['disabled'])
+
+    def verificar_e_notificar_retiradas(self, novas: Optional[List[Cacamba]] = None) -> None:
+        """Exibe num único painel não modal as caçambas prontas para retirada e não adiadas.
+
+        Com `novas`, apenas elas são somadas às que o painel aberto já mostra,
+        sem percorrer novamente todas as caçambas. Sem elas, a consulta de todas
+        as caçambas no prazo é feita fora da thread do Tk.
+        """
+        if novas is None:
+            futura = self.executor.submit(self.gerenciador.verificar_cacambas_para_retirada)
+            self._quando_concluir(futura, lambda concluida: self._notificar_retiradas(concluida.result()))
+            return
+        cacambas = list(novas)
+        if self._painel_alertas is not None and self._painel_alertas.aberto():
+            cacambas.extend(self._painel_alertas.cacambas())
+        self._notificar_retiradas(cacambas)
+
+    @Instrumentacao.medido('interface.verificar_e_notificar_retiradas')
+    def _notificar_retiradas(self, cacambas: List[Cacamba]) -> None:
+        """Substitui o painel de alertas pelo resumo das caçambas informadas."""
+        grupos = self.gerenciador.resumir_retiradas(datetime.date.today(), cacambas)
+
+        if self._painel_alertas is not None:
+            self._painel_alertas.fechar()
+            self._painel_alertas = None
+        if not grupos:
+            return
+
+        self._painel_alertas = PainelAlertasRetirada(
+            self.root, self.cores, grupos, self.gerenciador.adiar_alertas
+        )
     
+    def atualizar_mapa(self) -> None:
+        """Agenda a regravação dos dados do mapa, reiniciando a espera a cada nova alteração."""
+        self._cancelar_atualizacao_mapa()
+        self._atualizacao_mapa_agendada = self.root.after(
+            self.ATRASO_ATUALIZACAO_MAPA_MS, self._executar_atualizacao_mapa
+        )
+
+    def _cancelar_atualizacao_mapa(self) -> None:
+        """Descarta a atualização do mapa agendada, se houver."""
+        if self._atualizacao_mapa_agendada is not None:
+            self.root.after_cancel(self._atualizacao_mapa_agendada)
+            self._atualizacao_mapa_agendada = None
+
+    @Instrumentacao.medido('interface.atualizar_mapa')
+    def _executar_atualizacao_mapa(self) -> None:
+        """Regrava os dados do mapa; a página aberta recarrega apenas os marcadores."""
+        self._atualizacao_mapa_agendada = None
+        if not self._mapa_aberto:
+            self.gerar_e_mostrar_mapa()
+            return
+        self.executor.submit(self._gerar_mapa)
+
+    @Instrumentacao.medido('interface.gerar_e_mostrar_mapa')
     def gerar_e_mostrar_mapa(self) -> None:
         """Gera e abre o mapa com as localizações das caçambas."""
-        cacambas = GerenciadorArquivos.carregar_cacambas()
-        arquivo_mapa = ServicoLocalizacao.gerar_mapa(cacambas)
-        
+        self._cancelar_atualizacao_mapa()
+        self._quando_concluir(self.executor.submit(self._gerar_mapa), self._abrir_mapa_gerado)
+
+    def _gerar_mapa(self) -> Optional[str]:
+        """Regrava os arquivos do mapa (executado fora da thread do Tk, um de cada vez)."""
+        with self._lock_mapa:
+            return ServicoLocalizacao.gerar_mapa(GerenciadorArquivos.iterar_cacambas(),
+                                                 GerenciadorArquivos.versao_cacambas())
+
+    def _abrir_mapa_gerado(self, futura: Future) -> None:
+        """Abre no navegador o mapa gerado em segundo plano."""
+        arquivo_mapa = futura.result()
         if arquivo_mapa:
-            # Abre o arquivo do mapa no navegador padrão
-            try:
-                import webbrowser
-                caminho_completo = os.path.abspath(arquivo_mapa)
-                webbrowser.open(f'file://{caminho_completo}')
-            except Exception as e:
-                print(Fore.RED + f"Erro ao abrir o mapa: {e}")
-                messagebox.showinfo(
-                    "Informação", 
-                    f"Mapa salvo em {arquivo_mapa}. Abra-o manualmente em seu navegador."
-                )
+            self._mapa_aberto = True
+            self.abrir_no_navegador(arquivo_mapa)
+
+    def _quando_concluir(self, futura: Future, callback: Callable[[Future], None]) -> None:
+        """Chama callback(futura) na thread do Tk quando a futura terminar."""
+        if not futura.done():
+            self.root.after(self.INTERVALO_ACOMPANHAMENTO_MS, self._quando_concluir, futura, callback)
+            return
+        callback(futura)
+
+    def abrir_no_navegador(self, arquivo_mapa: str) -> None:
+        """Abre o arquivo do mapa no navegador padrão."""
+        try:
+            import webbrowser
+            caminho_completo = os.path.abspath(arquivo_mapa)
+            webbrowser.open(f'file://{caminho_completo}')
+        except Exception as e:
+            print(Fore.RED + f"Erro ao abrir o mapa: {e}")
+            messagebox.showinfo(
+                "Informação", 
+                f"Mapa salvo em {arquivo_mapa}. Abra-o manualmente em seu navegador."
+            )
     
     def iniciar(self) -> None:
         """Inicia a execução da interface gráfica."""
-        # Verifica caçambas para retirada na inicialização
-        self.verificar_e_notificar_retiradas()
+        # Carrega a lista e verifica as retiradas assim que a janela principal for exibida
+        self.root.after_idle(self._carregar_lista_inicial)
+        self._agendar_virada_do_dia()
         
         # Inicia o loop principal
         self.root.mainloop()
 
+        # Interrompe as consultas pendentes ao encerrar
+        if self._tarefa is not None:
+            self._tarefa.cancelada.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-def main():
+
+def main(argv: Optional[List[str]] = None):
     """Função principal que inicia a aplicação."""
-    # Verifica/cria arquivo necessário
-    GerenciadorArquivos.criar_arquivo_se_nao_existir()
+    parser = argparse.ArgumentParser(description="Gerenciador de Caçambas")
+    parser.add_argument('--importar-xlsx', metavar='ARQUIVO',
+                        help="importa uma planilha para o armazenamento configurado e encerra")
+    parser.add_argument('--exportar-xlsx', metavar='ARQUIVO',
+                        help="exporta o armazenamento configurado para uma planilha e encerra")
+    parser.add_argument('--importar-lote', metavar='ARQUIVO',
+                        help="registra as caçambas de um CSV/xlsx (número, CEP, número, data) e encerra")
+    parser.add_argument('--servidor', nargs='?', metavar='HOST:PORTA',
+                        const=f"{ServidorCacambas.HOST_PADRAO}:{ServidorCacambas.PORTA_PADRAO}",
+                        help="atende outras estações por HTTP, sem abrir a janela "
+                             "(sem autenticação; use 0.0.0.0:PORTA apenas na rede interna)")
+    parser.add_argument('--conectar', metavar='URL',
+                        help="usa as caçambas de um servidor (ex.: http://servidor:8765) em vez do arquivo local")
+    parser.add_argument('--perfil', action='store_true',
+                        help="captura a execução com cProfile desde o início")
+    parser.add_argument('--relatorio-diagnostico', metavar='ARQUIVO',
+                        help="grava o relatório de diagnóstico em JSON ao encerrar")
+    args = parser.parse_args(argv)
+    Instrumentacao.marcar_inicializacao('importacao')
+
+    if args.perfil:
+        Instrumentacao.iniciar_perfil()
+    if args.relatorio_diagnostico:
+        atexit.register(Instrumentacao.parar_perfil_e_gravar, args.relatorio_diagnostico)
+    atexit.register(ServicoLocalizacao.gravar_caches)
+
+    if args.conectar:
+        # Modo cliente: os dados ficam no servidor; caches e mapa, junto do executável
+        GerenciadorArquivos.usar_arquivo_dados(args.conectar, GerenciadorArquivos.obter_diretorio_base(),
+                                               ArmazenamentoRemoto.nome)
+    else:
+        # Verifica/cria arquivo necessário
+        GerenciadorArquivos.criar_arquivo_se_nao_existir()
+    Instrumentacao.marcar_inicializacao('configuracao')
+
+    if args.servidor:
+        host, _, porta = args.servidor.rpartition(':')
+        try:
+            servidor = ServidorCacambas(host or ServidorCacambas.HOST_PADRAO, int(porta))
+        except (ValueError, OSError) as e:
+            print(Fore.RED + f"Não foi possível iniciar o servidor em {args.servidor}: {e}")
+            sys.exit(1)
+        servidor.executar()
+        return
+
+    # Comandos de migração entre formatos de armazenamento
+    if args.importar_xlsx or args.exportar_xlsx:
+        try:
+            if args.importar_xlsx:
+                GerenciadorArquivos.importar_planilha(args.importar_xlsx)
+            if args.exportar_xlsx:
+                GerenciadorArquivos.exportar_planilha(args.exportar_xlsx)
+            GerenciadorArquivos.compactar_armazenamento()
+        except Exception as e:
+            print(Fore.RED + f"Erro na migração: {e}")
+            sys.exit(1)
+        return
+
+    # Importação em lote pela linha de comando
+    if args.importar_lote:
+        resultado = ImportadorLote.importar(
+            args.importar_lote,
+            ao_progredir=lambda feitas, total: print(Fore.CYAN + f"CEPs consultados: {feitas}/{total}")
+        )
+        for erro in resultado.erros:
+            print(Fore.YELLOW + f"Linha {erro.linha} ({erro.numero}): {erro.motivo}")
+        GerenciadorArquivos.compactar_armazenamento()
+        return
     
     # Inicializa o gerenciador
     gerenciador = GerenciadorCacambas()
@@ -863,6 +4807,9 @@ def main():
     # Inicia a aplicação
     interface.iniciar()
 
+    # Consolida as alterações pendentes antes de encerrar
+    GerenciadorArquivos.compactar_armazenamento()
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
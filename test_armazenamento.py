@@ -0,0 +1,207 @@
+"""Testes de ida e volta dos formatos de armazenamento."""
+import datetime
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from cacamba_gui import (
+    ArmazenamentoJournal, ArmazenamentoSqlite, ArmazenamentoXlsx, Cacamba, RepositorioCacambas
+)
+
+
+def cacamba(numero: str, dias_no_local: int = 0) -> Cacamba:
+    """Caçamba colocada há dias_no_local dias."""
+    data = datetime.date.today() - datetime.timedelta(days=dias_no_local)
+    return Cacamba(numero, '01001000', '10', data.strftime('%d/%m/%Y'),
+                   'Praça da Sé', 'Sé', 'São Paulo', 'SP', -23.55, -46.63)
+
+
+class RoundTripArmazenamento:
+    """Casos comuns a todos os formatos; cada subclasse informa o formato testado."""
+
+    classe = None
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.caminho = os.path.join(diretorio.name, 'cacambas.xlsx')
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [])
+
+    def abrir(self) -> RepositorioCacambas:
+        """Repositório novo sobre o formato testado, como numa nova execução."""
+        return RepositorioCacambas(self.classe(self.caminho))
+
+    def numeros(self, repositorio: RepositorioCacambas):
+        return [c.numero for c in repositorio.listar()]
+
+    def test_adicionar_recusa_repetida_e_persiste(self):
+        repositorio = self.abrir()
+        self.assertTrue(repositorio.adicionar(cacamba('1')))
+        self.assertFalse(repositorio.adicionar(cacamba('1', 5)))
+        self.assertEqual([c.numero for c in repositorio.adicionar_varias([cacamba('2'), cacamba('1'), cacamba('2')])],
+                         ['2'])
+
+        reaberto = self.abrir()
+        self.assertEqual(reaberto.listar(), [cacamba('1'), cacamba('2')])
+
+    def test_remover(self):
+        repositorio = self.abrir()
+        repositorio.adicionar_varias([cacamba('1'), cacamba('2')])
+        self.assertTrue(repositorio.remover('1'))
+        self.assertFalse(repositorio.remover('1'))
+        self.assertFalse(repositorio.remover('desconhecida'))
+        self.assertEqual(self.numeros(self.abrir()), ['2'])
+
+    def test_compactar_preserva_o_conteudo(self):
+        repositorio = self.abrir()
+        repositorio.adicionar_varias([cacamba(str(n)) for n in range(5)])
+        repositorio.remover('3')
+        repositorio.compactar()
+        self.assertEqual(self.numeros(self.abrir()), ['0', '1', '2', '4'])
+
+    def test_iterador_pausado_nao_bloqueia_gravacao(self):
+        self.abrir().adicionar(cacamba('1'))
+        # Recém-aberto, o repositório ainda não tem a cópia em memória
+        repositorio = self.abrir()
+        iterador = repositorio.iterar()
+        self.assertEqual(next(iterador).numero, '1')
+
+        gravacao = threading.Thread(target=repositorio.adicionar, args=(cacamba('2'),))
+        gravacao.start()
+        gravacao.join(timeout=10)
+        self.assertFalse(gravacao.is_alive())
+        self.assertEqual(list(iterador), [])
+        self.assertEqual(self.numeros(repositorio), ['1', '2'])
+
+    def test_listar_para_retirada(self):
+        repositorio = self.abrir()
+        repositorio.adicionar_varias([cacamba('antiga', 10), cacamba('no_prazo', Cacamba.DIAS_PARA_RETIRADA),
+                                      cacamba('recente', 1)])
+        hoje = datetime.date.today()
+        esperado = ['antiga', 'no_prazo']
+        # Com o repositório recém-aberto, formatos indexados respondem sem a carga completa
+        self.assertEqual([c.numero for c in self.abrir().listar_para_retirada(hoje)], esperado)
+        self.assertEqual([c.numero for c in repositorio.listar_para_retirada(hoje)], esperado)
+        self.assertEqual(len(self.abrir().listar_para_retirada(hoje, limite=1)), 1)
+
+
+class TestArmazenamentoXlsx(RoundTripArmazenamento, unittest.TestCase):
+    classe = ArmazenamentoXlsx
+
+    def ler_sem_planilha(self) -> list:
+        """Lê as caçambas falhando se a planilha precisar ser aberta."""
+        armazenamento = ArmazenamentoXlsx(self.caminho)
+        with mock.patch.object(armazenamento, '_iterar_planilha', side_effect=AssertionError('leu a planilha')):
+            return [c.numero for c in armazenamento.iterar()]
+
+    def test_leitura_usa_o_snapshot(self):
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [cacamba('1'), cacamba('2')])
+        armazenamento = ArmazenamentoXlsx(self.caminho)
+        self.assertFalse(os.path.exists(armazenamento.caminho_snapshot))
+        self.assertEqual(armazenamento.carregar(), [cacamba('1'), cacamba('2')])
+        self.assertTrue(os.path.exists(armazenamento.caminho_snapshot))
+        self.assertEqual(self.ler_sem_planilha(), ['1', '2'])
+
+    def test_planilha_editada_fora_invalida_o_snapshot(self):
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [cacamba('1')])
+        ArmazenamentoXlsx(self.caminho).carregar()
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [cacamba('1'), cacamba('outra')])
+        self.assertEqual([c.numero for c in ArmazenamentoXlsx(self.caminho).carregar()], ['1', 'outra'])
+        self.assertEqual(self.ler_sem_planilha(), ['1', 'outra'])
+
+    def test_planilha_tocada_sem_alteracao_mantem_o_snapshot(self):
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [cacamba('1')])
+        ArmazenamentoXlsx(self.caminho).carregar()
+        info = os.stat(self.caminho)
+        os.utime(self.caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.ler_sem_planilha(), ['1'])
+
+    def test_snapshot_de_outra_versao_e_ignorado(self):
+        ArmazenamentoXlsx.escrever_planilha(self.caminho, [cacamba('1')])
+        ArmazenamentoXlsx(self.caminho).carregar()
+        with mock.patch.object(ArmazenamentoXlsx, 'VERSAO_SNAPSHOT', ArmazenamentoXlsx.VERSAO_SNAPSHOT + 1):
+            self.assertIsNone(ArmazenamentoXlsx(self.caminho)._ler_snapshot())
+            self.assertEqual([c.numero for c in ArmazenamentoXlsx(self.caminho).carregar()], ['1'])
+            self.assertEqual(self.ler_sem_planilha(), ['1'])
+
+    def test_alteracoes_atualizam_o_snapshot(self):
+        armazenamento = ArmazenamentoXlsx(self.caminho)
+        armazenamento.carregar()
+        armazenamento.adicionar_varias([cacamba('1'), cacamba('2'), cacamba('3')])
+        self.assertTrue(armazenamento.remover('2'))
+        self.assertEqual(self.ler_sem_planilha(), ['1', '3'])
+        self.assertEqual(ArmazenamentoXlsx.ler_planilha(self.caminho), [cacamba('1'), cacamba('3')])
+
+
+class TestArmazenamentoJournal(RoundTripArmazenamento, unittest.TestCase):
+    classe = ArmazenamentoJournal
+
+    def test_remover_desconhecida_nao_grava_no_log(self):
+        armazenamento = ArmazenamentoJournal(self.caminho)
+        self.assertFalse(armazenamento.remover('desconhecida'))
+        self.assertFalse(os.path.exists(armazenamento.caminho_journal))
+
+    def test_remover_reconhece_alteracao_de_outro_processo(self):
+        armazenamento = ArmazenamentoJournal(self.caminho)
+        armazenamento.carregar()
+        ArmazenamentoJournal(self.caminho).adicionar_varias([cacamba('1')])
+        self.assertTrue(armazenamento.remover('1'))
+        self.assertEqual(armazenamento.carregar(), [])
+
+    def test_linha_incompleta_do_log_e_ignorada(self):
+        armazenamento = ArmazenamentoJournal(self.caminho)
+        armazenamento.adicionar_varias([cacamba('1')])
+        with open(armazenamento.caminho_journal, 'a', encoding='utf-8') as f:
+            f.write('{"op": "adicionar", "cacamba": {"numero"')
+        self.assertEqual([c.numero for c in ArmazenamentoJournal(self.caminho).carregar()], ['1'])
+
+    def test_compactar_esvazia_o_log(self):
+        repositorio = self.abrir()
+        repositorio.adicionar_varias([cacamba('1'), cacamba('2')])
+        repositorio.compactar()
+        self.assertFalse(os.path.exists(repositorio.armazenamento.caminho_journal))
+        self.assertEqual([c.numero for c in ArmazenamentoXlsx.ler_planilha(self.caminho)], ['1', '2'])
+
+
+class TestArmazenamentoSqlite(RoundTripArmazenamento, unittest.TestCase):
+    classe = ArmazenamentoSqlite
+
+    def abrir(self) -> RepositorioCacambas:
+        repositorio = super().abrir()
+        self.addCleanup(self._fechar, repositorio.armazenamento)
+        return repositorio
+
+    @staticmethod
+    def _fechar(armazenamento: ArmazenamentoSqlite):
+        if armazenamento._conexao is not None:
+            armazenamento._conexao.close()
+
+    def test_data_gravada_em_iso(self):
+        repositorio = self.abrir()
+        repositorio.adicionar(Cacamba('1', '', '', '05/01/2026', '', '', '', '', None, None))
+        conexao = repositorio.armazenamento._conectar()
+        self.assertEqual(conexao.execute("SELECT data_colocacao FROM cacambas").fetchone(), ('2026-01-05',))
+        self.assertEqual(self.abrir().listar()[0].data_colocacao, '05/01/2026')
+
+    def test_retirada_ordena_datas_entre_anos(self):
+        armazenamento = self.abrir().armazenamento
+        armazenamento.adicionar_varias([
+            Cacamba(numero, '', '', data, '', '', '', '', None, None)
+            for numero, data in [('a', '02/01/2026'), ('b', '31/12/2025'), ('c', '15/11/2025')]
+        ])
+        # Em dd/mm/aaaa, '02/01/2026' viria antes de '31/12/2025'
+        retirada = armazenamento.listar_para_retirada(datetime.date(2026, 1, 1))
+        self.assertEqual(sorted(c.numero for c in retirada), ['b', 'c'])
+
+    def test_existentes_em_varios_blocos(self):
+        armazenamento = self.abrir().armazenamento
+        quantidade = ArmazenamentoSqlite.NUMEROS_POR_CONSULTA * 2 + 1
+        armazenamento.adicionar_varias([cacamba(str(n)) for n in range(0, quantidade, 2)])
+        existentes = armazenamento.existentes({str(n) for n in range(quantidade)})
+        self.assertEqual(existentes, {str(n) for n in range(0, quantidade, 2)})
+
+
+if __name__ == '__main__':
+    unittest.main()
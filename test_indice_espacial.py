@@ -0,0 +1,84 @@
+"""Testes do IndiceEspacial contra a busca exaustiva."""
+import math
+import random
+import unittest
+
+from cacamba_gui import Cacamba, IndiceEspacial
+
+
+def destino(latitude: float, longitude: float, distancia_km: float, rumo: float):
+    """Ponto a distancia_km do ponto de partida no rumo informado (em radianos)."""
+    delta = distancia_km / IndiceEspacial.RAIO_TERRA_KM
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2 = math.asin(math.sin(lat1) * math.cos(delta) + math.cos(lat1) * math.sin(delta) * math.cos(rumo))
+    lon2 = lon1 + math.atan2(math.sin(rumo) * math.sin(delta) * math.cos(lat1),
+                             math.cos(delta) - math.sin(lat1) * math.sin(lat2))
+    return math.degrees(lat2), math.degrees(lon2)
+
+
+def cacamba(numero: str, latitude: float, longitude: float) -> Cacamba:
+    """Caçamba mínima com as coordenadas informadas."""
+    return Cacamba(numero, '', '', '01/01/2026', '', '', '', '', latitude, longitude)
+
+
+class TestIndiceEspacial(unittest.TestCase):
+
+    def test_ponto_na_borda_da_celula(self):
+        indice = IndiceEspacial()
+        latitude, longitude = 0.0099999, 0.005
+        indice.adicionar(cacamba('1', *destino(latitude, longitude, 1.11309, 0.0)))
+        self.assertEqual([numero for _, numero in indice.dentro_do_raio(latitude, longitude, 1.1132)], ['1'])
+
+    def test_dentro_do_raio_igual_a_busca_exaustiva(self):
+        aleatorio = random.Random(20)
+        for latitude_centro in (0.0, -23.55, 45.0, 70.0):
+            for _ in range(20):
+                latitude = latitude_centro + aleatorio.uniform(-0.05, 0.05)
+                longitude = aleatorio.uniform(-46.7, -46.5)
+                raio_km = aleatorio.uniform(0.2, 5.0)
+
+                indice = IndiceEspacial()
+                pontos = {}
+                for n in range(60):
+                    # Metade dos pontos fica logo dentro ou logo fora da borda do raio
+                    fator = aleatorio.choice([1 - 1e-9, 1 + 1e-9, aleatorio.uniform(0, 1.5)])
+                    lat, lon = destino(latitude, longitude, raio_km * fator, aleatorio.uniform(0, 2 * math.pi))
+                    pontos[str(n)] = (lat, lon)
+                    indice.adicionar(cacamba(str(n), lat, lon))
+
+                esperado = sorted(
+                    (IndiceEspacial.distancia_km(latitude, longitude, lat, lon), numero)
+                    for numero, (lat, lon) in pontos.items()
+                    if IndiceEspacial.distancia_km(latitude, longitude, lat, lon) <= raio_km
+                )
+                self.assertEqual(indice.dentro_do_raio(latitude, longitude, raio_km), esperado)
+
+    def test_mais_proximas_igual_a_busca_exaustiva(self):
+        aleatorio = random.Random(1063)
+        indice = IndiceEspacial()
+        pontos = {}
+        for n in range(400):
+            # Concentração urbana com alguns pontos espalhados por centenas de quilômetros
+            dispersao = 0.05 if n % 4 else 3.0
+            lat = -23.55 + aleatorio.uniform(-dispersao, dispersao)
+            lon = -46.63 + aleatorio.uniform(-dispersao, dispersao)
+            pontos[str(n)] = (lat, lon)
+            indice.adicionar(cacamba(str(n), lat, lon))
+
+        for _ in range(1500):
+            dispersao = aleatorio.choice([0.05, 1.0, 10.0])
+            latitude = -23.55 + aleatorio.uniform(-dispersao, dispersao)
+            longitude = -46.63 + aleatorio.uniform(-dispersao, dispersao)
+            k = aleatorio.choice([1, 3, 10, 50, 500])
+            esperado = sorted(
+                (IndiceEspacial.distancia_km(latitude, longitude, lat, lon), numero)
+                for numero, (lat, lon) in pontos.items()
+            )[:k]
+            self.assertEqual(indice.mais_proximas(latitude, longitude, k), esperado)
+
+    def test_mais_proximas_sem_pontos(self):
+        self.assertEqual(IndiceEspacial().mais_proximas(0.0, 0.0, 5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()